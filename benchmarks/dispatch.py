@@ -0,0 +1,87 @@
+"""
+Redis round trips and wall time per tick as the number of due crons grows.
+
+Usage:
+    python -m benchmarks.dispatch [--sizes 10 100 1000]
+"""
+
+import argparse
+import time
+
+from benchmarks.support import RoundTripCounter, setup_django, use_fake_redis
+
+
+def enqueue_one_by_one(crons):
+    """The pre-batching dispatch loop, kept here as the baseline."""
+    import django_rq
+
+    from django_rq_cron.runner import run_cron
+
+    for cron in crons:
+        django_rq.get_queue(cron.queue).enqueue(run_cron, cron.name)
+
+
+def measure(function, crons):
+    counter = RoundTripCounter()
+    start = time.perf_counter()
+    with counter.counting():
+        function(crons)
+    return counter.count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--queues", type=int, default=2)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from unittest.mock import patch
+
+    from django_rq.settings import QUEUES
+
+    from django_rq_cron.models import CronJob
+    from django_rq_cron.registry import (
+        HOURLY_CRON_TAB,
+        REGISTERED_CRON_JOBS,
+        RegisteredCronJob,
+        build_schedule,
+    )
+    from django_rq_cron.runner import dispatch
+
+    connection = use_fake_redis()
+    queue_names = list(QUEUES)[: args.queues]
+
+    print(
+        f"{'crons':>8} {'baseline trips':>15} {'batched trips':>14} "
+        f"{'baseline ms':>12} {'batched ms':>11}"
+    )
+    for size in args.sizes:
+        crons = [
+            RegisteredCronJob(
+                name=f"benchmark_{i}",
+                description="",
+                cadence=CronJob.Cadence.HOURLY,
+                function=lambda: None,
+                queue=queue_names[i % len(queue_names)],
+            )
+            for i in range(size)
+        ]
+        REGISTERED_CRON_JOBS.clear()
+        REGISTERED_CRON_JOBS.update((cron.name, cron) for cron in crons)
+        crons_by_queue = build_schedule().jobs[HOURLY_CRON_TAB]
+
+        # The baseline builds its own queues, so hand it the same fake connection.
+        with patch("django_rq.queues.get_connection", return_value=connection):
+            baseline_trips, baseline_time = measure(enqueue_one_by_one, crons)
+        batched_trips, batched_time = measure(dispatch, crons_by_queue)
+        connection.flushall()
+        print(
+            f"{size:>8} {baseline_trips:>15} {batched_trips:>14} "
+            f"{baseline_time * 1000:>12.1f} {batched_time * 1000:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
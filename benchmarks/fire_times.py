@@ -0,0 +1,90 @@
+"""
+Time to compute upcoming fire times: parsing on every call versus the cached, bulk API.
+
+Usage:
+    python -m benchmarks.fire_times [--days 7] [--repeat 1000]
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+EXPRESSIONS = [
+    "* * * * *",
+    "*/10 * * * *",
+    "0 * * * *",
+    "0 20 * * *",
+    "0 9 * * mon-fri",
+    "0 0 * * 1",
+    "0 0 1 * *",
+]
+
+
+def next_times_parsing_each_call(expressions, start, end):
+    """The baseline: a fresh `CronTab` and a `next()` from scratch for every fire time."""
+    import crontab
+
+    times = {}
+    for expression in expressions:
+        times[expression] = []
+        moment = start
+        while True:
+            moment = crontab.CronTab(expression).next(
+                now=moment, return_datetime=True, default_utc=True
+            )
+            if moment > end:
+                break
+            times[expression].append(moment)
+    return times
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    import crontab
+
+    from django_rq_cron.utils import compile_crontab, fire_times
+
+    start = datetime(2026, 1, 1, 0, 0, 30, tzinfo=timezone.utc)
+    end = start + timedelta(days=args.days)
+
+    baseline, baseline_time = timed(
+        next_times_parsing_each_call, EXPRESSIONS, start, end
+    )
+    fire_times(EXPRESSIONS, start, start)  # Warm the caches.
+    bulk, bulk_time = timed(fire_times, EXPRESSIONS, start, end)
+    assert bulk == baseline, "fire_times disagrees with CronTab.next"
+
+    count = sum(len(times) for times in bulk.values())
+    print(
+        f"{count} fire times over {args.days} days for {len(EXPRESSIONS)} expressions"
+    )
+    print(f"{'per-call parsing':>20} {baseline_time * 1000:>10.1f} ms")
+    print(f"{'fire_times':>20} {bulk_time * 1000:>10.1f} ms")
+
+    def parse_each_time():
+        for _ in range(args.repeat):
+            crontab.CronTab("0 9 * * mon-fri")
+
+    def cached():
+        for _ in range(args.repeat):
+            compile_crontab("0 9 * * mon-fri")
+
+    _, parse_time = timed(parse_each_time)
+    _, cached_time = timed(cached)
+    print(f"\n{args.repeat} lookups of one expression")
+    print(f"{'parsing':>20} {parse_time * 1000:>10.1f} ms")
+    print(f"{'compile_crontab':>20} {cached_time * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Query plans and timings of the hot run/transition queries on a large SQLite table.
+
+Seeds a throwaway SQLite database, then checks that each query's EXPLAIN QUERY
+PLAN uses the index meant for it. Exits non-zero if any of them doesn't.
+
+Usage:
+    python -m benchmarks.query_plans [--runs 2000000] [--jobs 200]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.support import setup_django
+
+
+def seed(connection, jobs: int, runs: int, transitions: int):
+    """Insert synthetic history with raw executemany calls, which is far quicker than the ORM."""
+    from django.db import transaction
+
+    from django_rq_cron.models import CronJob, CronJobRun, CronJobStatusTransition
+
+    now = datetime.now(tz=timezone.utc)
+
+    def timestamp(days_ago: float) -> str:
+        return (now - timedelta(days=days_ago)).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    job_ids = [uuid.uuid4().hex for _ in range(jobs)]
+    statuses = [CronJobRun.Status.SUCCEEDED] * 97 + [
+        CronJobRun.Status.FAILED,
+        CronJobRun.Status.FAILED,
+        CronJobRun.Status.IN_PROGRESS,
+    ]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {CronJob._meta.db_table} (id, creation_date, modification_date, "
+            "name, description, cadence, status) VALUES (%s, %s, %s, %s, '', %s, %s)",
+            [
+                (
+                    job_id,
+                    timestamp(90),
+                    timestamp(0),
+                    f"benchmark_{i}",
+                    CronJob.Cadence.EVERY_MINUTE,
+                    CronJob.Status.SUCCEEDING,
+                )
+                for i, job_id in enumerate(job_ids)
+            ],
+        )
+        for start in range(0, runs, 50_000):
+            rows = []
+            for _ in range(min(50_000, runs - start)):
+                created = timestamp(random.uniform(0, 90))
+                rows.append(
+                    (
+                        uuid.uuid4().hex,
+                        created,
+                        created,
+                        created,
+                        random.choice(job_ids),
+                        random.choice(statuses),
+                    )
+                )
+            cursor.executemany(
+                f"INSERT INTO {CronJobRun._meta.db_table} (id, creation_date, "
+                "modification_date, completion_date, cron_job_id, status, error, "
+                "attempts) VALUES (%s, %s, %s, %s, %s, %s, '', 1)",
+                rows,
+            )
+        cursor.executemany(
+            f"INSERT INTO {CronJobStatusTransition._meta.db_table} (id, creation_date, "
+            "parent_id, old_value, new_value) VALUES (%s, %s, %s, %s, %s)",
+            [
+                (
+                    uuid.uuid4().hex,
+                    timestamp(random.uniform(0, 90)),
+                    random.choice(job_ids),
+                    CronJob.Status.FAILING,
+                    CronJob.Status.SUCCEEDING,
+                )
+                for _ in range(transitions)
+            ],
+        )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def hot_queries():
+    """The queries to check, each with the name of the index it should use."""
+    from django_rq_cron.models import CronJob, CronJobRun, CronJobStatusTransition
+
+    cron_job = CronJob.objects.order_by("?").first()
+    cutoff = datetime.now(tz=timezone.utc) - timedelta(days=30)
+    run_indexes = {
+        tuple(index.fields): index.name for index in CronJobRun._meta.indexes
+    }
+    (transition_index,) = CronJobStatusTransition._meta.indexes
+
+    return [
+        (
+            "stale in-progress runs",
+            CronJobRun.objects.filter(
+                cron_job=cron_job, status=CronJobRun.Status.IN_PROGRESS
+            )
+            .exclude(id=uuid.uuid4())
+            # Mirror the DELETE, which has no ORDER BY to steer the planner.
+            .order_by(),
+            run_indexes[("cron_job", "status")],
+        ),
+        (
+            "expired runs of a job",
+            CronJobRun.objects.filter(
+                cron_job=cron_job,
+                creation_date__lt=cutoff,
+                creation_date__gte=cutoff - timedelta(days=30),
+            )
+            .exclude(creation_date=cutoff - timedelta(days=30), pk__lte=uuid.uuid4())
+            .order_by("creation_date", "pk")
+            .values_list("creation_date", "pk")[:500],
+            run_indexes[("cron_job", "-creation_date")],
+        ),
+        (
+            "expired runs of all jobs",
+            CronJobRun.objects.filter(creation_date__lt=cutoff).values_list(
+                "pk", flat=True
+            )[:500],
+            run_indexes[("creation_date",)],
+        ),
+        (
+            "latest runs of a job",
+            CronJobRun.objects.filter(cron_job=cron_job).order_by("-creation_date")[
+                :20
+            ],
+            run_indexes[("cron_job", "-creation_date")],
+        ),
+        (
+            "latest transitions of a job",
+            CronJobStatusTransition.objects.filter(parent=cron_job).order_by(
+                "-creation_date"
+            )[:20],
+            transition_index.name,
+        ),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=2_000_000)
+    parser.add_argument("--transitions", type=int, default=50_000)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    directory = tempfile.mkdtemp()
+    connection.settings_dict["NAME"] = os.path.join(directory, "benchmark.sqlite3")
+    call_command("migrate", verbosity=0)
+    with connection.cursor() as cursor:
+        # Durability is irrelevant for a throwaway database.
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute("PRAGMA journal_mode = MEMORY")
+
+    start = time.perf_counter()
+    seed(connection, args.jobs, args.runs, args.transitions)
+    print(f"Seeded {args.runs} runs in {time.perf_counter() - start:.1f}s\n")
+
+    failures = 0
+    for label, queryset, index_name in hot_queries():
+        plan = queryset.explain()
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+        uses_index = index_name in plan
+        failures += not uses_index
+        print(
+            f"{'ok  ' if uses_index else 'FAIL'} {label:<28} "
+            f"median {statistics.median(timings):8.2f}ms  max {max(timings):8.2f}ms"
+        )
+        print("     " + plan.replace("\n", "\n     "))
+
+    connection.close()
+    shutil.rmtree(directory)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Process startup time and peak RSS with eager versus lazy (manifest-based) cron discovery.
+
+Generates a throwaway app whose `crons` package holds `--modules` cron modules.
+Each module imports a few stdlib packages and builds a module-level table, to
+stand in for the dependencies real cron modules pull in. Then it starts fresh
+interpreters that run `django.setup()` with and without `DJANGO_RQ_CRON_LAZY`.
+
+Usage:
+    python -m benchmarks.startup [--modules 200] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.support import ROOT
+
+CRON_MODULE = """\
+import decimal
+import email.parser
+import http.client
+import xml.etree.ElementTree
+
+from django_rq_cron.registry import register_cron
+
+TABLE = [str(i) * 10 for i in range(2_000)]
+
+
+@register_cron(cadence="hourly")
+def do():
+    pass
+"""
+
+SETTINGS = """\
+import os
+
+from tests.settings import *  # noqa: F403
+
+INSTALLED_APPS = INSTALLED_APPS + ["benchmark_crons_app"]  # noqa: F405
+DJANGO_RQ_CRON_MANIFEST = {manifest!r}
+DJANGO_RQ_CRON_LAZY = os.environ.get("LAZY") == "1"
+"""
+
+MEASURE = """\
+import json, resource, time
+start = time.perf_counter()
+import django
+django.setup()
+from django_rq_cron.registry import REGISTERED_CRON_JOBS
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "crons": len(REGISTERED_CRON_JOBS),
+}))
+"""
+
+
+def generate_app(directory: str, modules: int):
+    crons = os.path.join(directory, "benchmark_crons_app", "crons")
+    os.makedirs(crons)
+    open(os.path.join(directory, "benchmark_crons_app", "__init__.py"), "w").close()
+    open(os.path.join(crons, "__init__.py"), "w").close()
+    for i in range(modules):
+        with open(os.path.join(crons, f"cron_{i}.py"), "w") as f:
+            f.write(CRON_MODULE)
+    with open(os.path.join(directory, "benchmark_settings.py"), "w") as f:
+        f.write(SETTINGS.format(manifest=os.path.join(directory, "crons.json")))
+
+
+def run(directory: str, *args, lazy: bool = False) -> str:
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join([directory, ROOT]),
+        DJANGO_SETTINGS_MODULE="benchmark_settings",
+        LAZY="1" if lazy else "0",
+    )
+    return subprocess.run(
+        [sys.executable, *args], env=env, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modules", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        generate_app(directory, args.modules)
+        run(directory, "-m", "django", "write_cron_manifest")
+
+        print(f"{'mode':>6} {'crons':>6} {'startup ms':>11} {'peak RSS MB':>12}")
+        for lazy in (False, True):
+            samples = [
+                json.loads(run(directory, "-c", MEASURE, lazy=lazy))
+                for _ in range(args.repeat)
+            ]
+            seconds = statistics.median(sample["seconds"] for sample in samples)
+            rss = statistics.median(sample["max_rss_kb"] for sample in samples)
+            print(
+                f"{'lazy' if lazy else 'eager':>6} {samples[0]['crons']:>6} "
+                f"{seconds * 1000:>11.1f} {rss / 1024:>12.1f}"
+            )
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
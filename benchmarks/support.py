@@ -0,0 +1,72 @@
+"""Shared helpers for the benchmark scripts."""
+
+import contextlib
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    """Configure Django with the test settings so benchmarks can run standalone."""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+
+    import django
+
+    django.setup()
+
+
+def use_fake_redis():
+    """Point every queue at a single in-memory Redis and return it."""
+    import fakeredis
+
+    from django_rq_cron import queues
+
+    connection = fakeredis.FakeRedis()
+    queues.clear_cache()
+    queues.get_redis_connection = lambda *args, **kwargs: connection
+    return connection
+
+
+class RoundTripCounter:
+    """
+    Count the requests sent to Redis; a pipeline counts as a single round trip.
+
+    `commands` counts the commands inside them, pipelined or not.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.commands = 0
+
+    @contextlib.contextmanager
+    def counting(self):
+        from redis.connection import AbstractConnection
+
+        originals = {
+            name: getattr(AbstractConnection, name)
+            for name in ("send_packed_command", "send_command", "pack_commands")
+        }
+
+        def send_packed_command(connection, *args, **kwargs):
+            self.count += 1
+            return originals["send_packed_command"](connection, *args, **kwargs)
+
+        def send_command(connection, *args, **kwargs):
+            self.commands += 1
+            return originals["send_command"](connection, *args, **kwargs)
+
+        def pack_commands(connection, commands):
+            self.commands += len(commands)
+            return originals["pack_commands"](connection, commands)
+
+        AbstractConnection.send_packed_command = send_packed_command
+        AbstractConnection.send_command = send_command
+        AbstractConnection.pack_commands = pack_commands
+        try:
+            yield self
+        finally:
+            for name, original in originals.items():
+                setattr(AbstractConnection, name, original)
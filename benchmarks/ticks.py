@@ -0,0 +1,276 @@
+"""
+Simulate a stretch of scheduler ticks on a frozen clock and report what each one cost.
+
+Registers `--crons` synthetic crons spread across cadences and queues, then
+plays the scheduler: the clock jumps to the next job in rq's scheduled
+registries, due jobs are moved onto their queues, and every queued job is run
+in-process, the way a worker would. Everything runs against fakeredis and an
+in-memory SQLite database, so the numbers only depend on this package.
+
+For each tick the report records the Redis commands and round trips, SQL
+queries, time spent scheduling (`run_crons`) and running (`run_cron`), and the
+process's peak RSS. Counts are deterministic, so two reports can be compared
+exactly; `--compare` prints the difference against an earlier report and exits
+non-zero if any count went up.
+
+Usage:
+    python -m benchmarks.ticks [--crons 100] [--days 7] [--output report.json]
+    python -m benchmarks.ticks --compare baseline.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from benchmarks.support import RoundTripCounter, setup_django, use_fake_redis
+
+CADENCES = [
+    "every_ten_minutes",
+    "hourly",
+    "daily",
+    "weekly",
+    "0 9 * * mon-fri",
+]
+
+# Totals that are the same from one run to the next, so any increase is a regression.
+COUNTS = ("jobs", "redis_commands", "round_trips", "sql_queries")
+
+
+class Clock:
+    """A frozen clock that the simulation moves forward by hand."""
+
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def register(crons: int, cadences, queue_names):
+    from django_rq_cron.registry import (
+        REGISTERED_CRON_JOBS,
+        RegisteredCronJob,
+        build_schedule,
+    )
+
+    REGISTERED_CRON_JOBS.clear()
+    for i in range(crons):
+        REGISTERED_CRON_JOBS[f"benchmark_{i}"] = RegisteredCronJob(
+            name=f"benchmark_{i}",
+            description="",
+            cadence=cadences[i % len(cadences)],
+            function=lambda: None,
+            queue=queue_names[i % len(queue_names)],
+        )
+    build_schedule()
+
+
+def next_scheduled(queues):
+    """Get the earliest time any job is scheduled for, across every queue."""
+    from rq.registry import ScheduledJobRegistry
+
+    times = []
+    for queue in queues:
+        first = queue.connection.zrange(
+            ScheduledJobRegistry(queue=queue).key, 0, 0, withscores=True
+        )
+        if first:
+            times.append(first[0][1])
+    return datetime.fromtimestamp(min(times), tz=timezone.utc) if times else None
+
+
+def fire(queues, moment: datetime):
+    """Move every job due at `moment` onto its queue, like rq's scheduler does."""
+    from rq.registry import ScheduledJobRegistry
+
+    for queue in queues:
+        registry = ScheduledJobRegistry(queue=queue)
+        job_ids = registry.get_jobs_to_schedule(int(moment.timestamp()))
+        for job_id in job_ids:
+            registry.remove(job_id)
+            queue.connection.rpush(queue.key, job_id)
+
+
+def drain(queues) -> dict:
+    """
+    Run every queued job in-process until the queues are empty.
+
+    Only the jobs themselves are measured, not the simulator's bookkeeping.
+    """
+    from django.db import connection
+    from rq.job import Job
+
+    from django_rq_cron.runner import run_crons
+
+    counter = RoundTripCounter()
+    spent = {"jobs": 0, "sql_queries": 0, "schedule_seconds": 0.0, "run_seconds": 0.0}
+
+    def count_query(execute, *args):
+        spent["sql_queries"] += 1
+        return execute(*args)
+
+    while job_ids := [
+        (queue, job_id) for queue in queues for job_id in queue.get_job_ids()
+    ]:
+        for queue, job_id in job_ids:
+            queue.remove(job_id)
+            job = Job.fetch(job_id, connection=queue.connection)
+            with counter.counting(), connection.execute_wrapper(count_query):
+                start = time.perf_counter()
+                job.func(*job.args, **job.kwargs)
+                elapsed = time.perf_counter() - start
+            key = "schedule_seconds" if job.func is run_crons else "run_seconds"
+            spent[key] += elapsed
+            spent["jobs"] += 1
+            job.delete()
+    spent["redis_commands"] = counter.commands
+    spent["round_trips"] = counter.count
+    return spent
+
+
+def simulate(args) -> dict:
+    setup_django()
+
+    from django.core.management import call_command
+    from django_rq.settings import QUEUES
+
+    from django_rq_cron.queues import get_queue
+    from django_rq_cron.runner import bootstrap
+    from django_rq_cron.utils import peak_rss_kb
+
+    call_command("migrate", verbosity=0)
+    use_fake_redis()
+    queue_names = list(QUEUES)[: args.queues]
+    register(args.crons, args.cadences, queue_names)
+    queues = [get_queue(name) for name in queue_names]
+
+    start = datetime(2026, 1, 5, tzinfo=timezone.utc)
+    end = start + timedelta(days=args.days)
+    clock = Clock(start)
+    ticks = []
+    with patch("django.utils.timezone.now", clock):
+        bootstrap(queue_names[0])
+        if args.trace_memory:
+            tracemalloc.start()
+        while (moment := next_scheduled(queues)) and moment <= end:
+            clock.now = moment
+            if args.trace_memory:
+                tracemalloc.reset_peak()
+            fire(queues, moment)
+            spent = drain(queues)
+            tick = {
+                "time": moment.isoformat(),
+                "jobs": spent["jobs"],
+                "redis_commands": spent["redis_commands"],
+                "round_trips": spent["round_trips"],
+                "sql_queries": spent["sql_queries"],
+                "schedule_ms": round(spent["schedule_seconds"] * 1000, 3),
+                "run_ms": round(spent["run_seconds"] * 1000, 3),
+                "peak_rss_kb": peak_rss_kb(),
+            }
+            if args.trace_memory:
+                tick["allocated_peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+            ticks.append(tick)
+
+    return {
+        "config": {
+            "crons": args.crons,
+            "days": args.days,
+            "queues": queue_names,
+            "cadences": args.cadences,
+            "python": platform.python_version(),
+        },
+        "summary": summarize(ticks),
+        "ticks": ticks,
+    }
+
+
+def summarize(ticks) -> dict:
+    summary = {"ticks": len(ticks)}
+    for key in COUNTS:
+        summary[key] = sum(tick[key] for tick in ticks)
+    for key in ("schedule_ms", "run_ms"):
+        values = sorted(tick[key] for tick in ticks) or [0]
+        summary[key] = {
+            "total": round(sum(values), 3),
+            "p50": values[len(values) // 2],
+            "p95": values[int(len(values) * 0.95)],
+            "max": values[-1],
+        }
+    summary["peak_rss_kb"] = max((tick["peak_rss_kb"] for tick in ticks), default=0)
+    if ticks and "allocated_peak_kb" in ticks[0]:
+        summary["allocated_peak_kb"] = statistics.median(
+            tick["allocated_peak_kb"] for tick in ticks
+        )
+    return summary
+
+
+def compare(baseline: dict, report: dict) -> bool:
+    """Print how the report differs from a baseline; returns False if a count went up."""
+    ok = True
+    if baseline["config"] != report["config"]:
+        print("Warning: the reports were made with different settings.")
+    print(f"{'':>22} {'baseline':>12} {'current':>12} {'change':>8}")
+    rows = [(key, baseline["summary"][key], report["summary"][key]) for key in COUNTS]
+    rows += [
+        (f"{key} {stat}", baseline["summary"][key][stat], report["summary"][key][stat])
+        for key in ("schedule_ms", "run_ms")
+        for stat in ("p50", "p95", "total")
+    ]
+    for name, before, after in rows:
+        change = f"{(after - before) / before * 100:+.1f}%" if before else ""
+        print(f"{name:>22} {before:>12} {after:>12} {change:>8}")
+        if name in COUNTS and after > before:
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--crons", type=int, default=100)
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--queues", type=int, default=2)
+    parser.add_argument("--cadences", nargs="+", default=CADENCES)
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Also record the peak Python allocations of each tick (slower).",
+    )
+    parser.add_argument("--output", help="Write the full report to this JSON file.")
+    parser.add_argument("--compare", help="A report to compare this run against.")
+    args = parser.parse_args()
+
+    report = simulate(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    summary = report["summary"]
+    print(
+        f"{summary['ticks']} ticks, {summary['jobs']} jobs, "
+        f"{summary['redis_commands']} Redis commands in {summary['round_trips']} "
+        f"round trips, {summary['sql_queries']} SQL queries"
+    )
+    for key in ("schedule_ms", "run_ms"):
+        stats = summary[key]
+        print(
+            f"{key:>12}: p50 {stats['p50']:.2f} ms, p95 {stats['p95']:.2f} ms, "
+            f"max {stats['max']:.2f} ms, total {stats['total']:.0f} ms"
+        )
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print()
+        if not compare(baseline, report):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,146 @@
+from django.conf import settings
 from django.contrib import admin
-from django.utils import timezone
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import DurationField, ExpressionWrapper, F
+from django.forms.models import BaseInlineFormSet
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
 
-from django_rq_cron.models import CronJob, CronJobRun, CronJobStatusTransition
+from django_rq_cron.models import (
+    CronJob,
+    CronJobDailyRollup,
+    CronJobRun,
+    CronJobStatusTransition,
+)
+
+
+class RecentFormSet(BaseInlineFormSet):
+    """An inline formset showing only the `limit` most recent objects."""
+
+    limit = 20
+
+    def get_queryset(self):
+        # Cached, so that the slice is only queried once per page.
+        if not hasattr(self, "_recent"):
+            self._recent = super().get_queryset()[: self.limit]
+        return self._recent
+
+
+class CappedCountPaginator(Paginator):
+    """
+    A paginator that stops counting after `limit` rows.
+
+    Counting every run of a busy job means scanning all of them; past the limit,
+    later pages aren't reachable, which is fine for history nobody pages through.
+    """
+
+    @cached_property
+    def count(self):
+        limit = getattr(settings, "DJANGO_RQ_CRON_ADMIN_COUNT_LIMIT", 10_000)
+        return self.object_list.order_by().values("pk")[:limit].count()
+
+
+def cadence_label(cadence: str) -> str:
+    """Label a cadence, showing custom cadences and crontab expressions as they are."""
+    if cadence in CronJob.Cadence.values:
+        return CronJob.Cadence(cadence).label
+    return cadence
+
+
+class CadenceListFilter(admin.SimpleListFilter):
+    """Filter cron jobs by any cadence in use, not just the built-in ones."""
+
+    title = "cadence"
+    parameter_name = "cadence"
+
+    def lookups(self, request, model_admin):
+        cadences = (
+            CronJob.objects.order_by("cadence")
+            .values_list("cadence", flat=True)
+            .distinct()
+        )
+        return [(cadence, cadence_label(cadence)) for cadence in cadences]
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        return queryset.filter(cadence=self.value())
+
+
+class CronJobListFilter(admin.SimpleListFilter):
+    """
+    Filter by cron job, offering only the job already filtered by as a choice.
+
+    Listing every job would load all of them on each page. A job's runs are
+    reached from its "View all runs" link instead, or by searching for its name.
+    """
+
+    title = "cron job"
+    parameter_name = "cron_job__id__exact"
+
+    def cron_job_id(self):
+        return CronJob._meta.pk.to_python(self.value())
+
+    def lookups(self, request, model_admin):
+        try:
+            cron_job = CronJob.objects.filter(pk=self.cron_job_id()).first()
+        except ValidationError:
+            return []
+        return [(self.value(), cron_job.name)] if cron_job else []
+
+    def has_output(self):
+        # Without a choice to show, the filter would be left out, and so not applied.
+        return self.value() is not None
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        try:
+            return queryset.filter(cron_job__id=self.cron_job_id())
+        except ValidationError as e:
+            raise IncorrectLookupParameters(e)
 
 
 class CronJobRunInline(admin.TabularInline):
     model = CronJobRun
+    formset = RecentFormSet
     fields = ("status", "creation_date", "completion_date", "error")
     readonly_fields = ("status", "creation_date", "completion_date", "error")
     extra = 0
     max_num = 0
+    verbose_name_plural = f"Latest {RecentFormSet.limit} cron job runs"
 
 
 class CronJobStatusTransitionInline(admin.TabularInline):
     model = CronJobStatusTransition
+    formset = RecentFormSet
     fields = ("creation_date", "old_value", "new_value")
     readonly_fields = ("creation_date", "old_value", "new_value")
     extra = 0
     max_num = 0
+    verbose_name_plural = f"Latest {RecentFormSet.limit} status transitions"
 
 
 @admin.register(CronJob)
 class CronJobAdmin(admin.ModelAdmin):
     list_display = (
         "name",
-        "cadence",
+        "cadence_display",
         "status",
         "latest_run_date",
         "latest_status_change",
         "human_readable_time_since_status_change",
     )
-    list_filter = ("status", "cadence")
+    list_filter = ("status", CadenceListFilter)
     search_fields = ("name", "description")
     readonly_fields = (
         "latest_run_date",
         "latest_status_change",
         "human_readable_time_since_status_change",
+        "all_runs",
     )
     inlines = (CronJobRunInline, CronJobStatusTransitionInline)
     fieldsets = (
@@ -57,11 +162,28 @@ class CronJobAdmin(admin.ModelAdmin):
                     "latest_run_date",
                     "latest_status_change",
                     "human_readable_time_since_status_change",
+                    "all_runs",
                 )
             },
         ),
     )
 
+    def all_runs(self, obj):
+        if obj.pk is None:
+            return ""
+        url = reverse("admin:django_rq_cron_cronjobrun_changelist")
+        return format_html(
+            '<a href="{}?cron_job__id__exact={}">View all runs</a>', url, obj.pk
+        )
+
+    all_runs.short_description = "Run history"
+
+    def cadence_display(self, obj):
+        return cadence_label(obj.cadence)
+
+    cadence_display.short_description = "Cadence"
+    cadence_display.admin_order_field = "cadence"
+
 
 @admin.register(CronJobRun)
 class CronJobRunAdmin(admin.ModelAdmin):
@@ -71,8 +193,13 @@ class CronJobRunAdmin(admin.ModelAdmin):
         "creation_date",
         "completion_date",
         "processing_time",
+        "wall_time",
     )
-    list_filter = ("status", "cron_job")
+    list_filter = ("status", CronJobListFilter)
+    list_select_related = ("cron_job",)
+    # Skip the unfiltered COUNT(*) of the whole table, and cap the filtered one.
+    show_full_result_count = False
+    paginator = CappedCountPaginator
     search_fields = ("cron_job__name", "error")
     readonly_fields = (
         "cron_job",
@@ -81,6 +208,12 @@ class CronJobRunAdmin(admin.ModelAdmin):
         "completion_date",
         "error",
         "data",
+        "attempts",
+        "wall_time",
+        "cpu_user",
+        "cpu_system",
+        "rss_delta",
+        "gc_collections",
     )
     fieldsets = (
         (
@@ -91,18 +224,82 @@ class CronJobRunAdmin(admin.ModelAdmin):
                     "status",
                     "creation_date",
                     "completion_date",
+                    "attempts",
                     "error",
                     "data",
                 )
             },
         ),
+        (
+            "Resources",
+            {
+                "fields": (
+                    "wall_time",
+                    "cpu_user",
+                    "cpu_system",
+                    "rss_delta",
+                    "gc_collections",
+                )
+            },
+        ),
     )
 
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                processing_time=ExpressionWrapper(
+                    F("completion_date") - F("creation_date"),
+                    output_field=DurationField(),
+                )
+            )
+        )
+
     def processing_time(self, obj):
-        if obj.completion_date:
-            return (obj.completion_date - obj.creation_date).total_seconds()
-        if obj.status == CronJobRun.Status.IN_PROGRESS:
-            return (timezone.now() - obj.creation_date).total_seconds()
-        return None
+        if obj.processing_time is None:
+            return None
+        return obj.processing_time.total_seconds()
 
     processing_time.short_description = "Processing Time (s)"
+    processing_time.admin_order_field = "processing_time"
+
+
+@admin.register(CronJobDailyRollup)
+class CronJobDailyRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "cron_job",
+        "day",
+        "runs",
+        "failures",
+        "success_rate",
+        "average_duration",
+        "p95_duration",
+        "max_duration",
+    )
+    list_filter = (CronJobListFilter,)
+    list_select_related = ("cron_job",)
+    search_fields = ("cron_job__name",)
+    date_hierarchy = "day"
+    readonly_fields = tuple(
+        field.name for field in CronJobDailyRollup._meta.fields if field.name != "id"
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def success_rate(self, obj):
+        if obj.success_rate is None:
+            return None
+        return f"{obj.success_rate:.1%}"
+
+    def average_duration(self, obj):
+        durations = sum(obj.histogram)
+        return round(obj.total_duration / durations, 3) if durations else None
+
+    average_duration.short_description = "Average duration (s)"
+
+    def p95_duration(self, obj):
+        return obj.duration_percentile(95)
+
+    p95_duration.short_description = "p95 duration (s, bucketed)"
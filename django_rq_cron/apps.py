@@ -7,7 +7,7 @@ class DjangoRQCronConfig(AppConfig):
     verbose_name = "Django RQ Cron"
 
     def ready(self):
-        """Import crons when the app is ready."""
-        from django_rq_cron.registry import import_crons
+        """Discover crons when the app is ready."""
+        from django_rq_cron.registry import discover_crons
 
-        import_crons()
+        discover_crons()
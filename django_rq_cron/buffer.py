@@ -0,0 +1,268 @@
+"""
+Buffered writes of cron job run history.
+
+When `DJANGO_RQ_CRON_BUFFER_RUNS` is enabled, `run_cron` does not touch the
+database at all. Each finished run is appended to a Redis list instead, and the
+list is written out in batches: whenever it holds `DJANGO_RQ_CRON_BUFFER_SIZE`
+runs, whenever its oldest run is older than `DJANGO_RQ_CRON_BUFFER_WINDOW`
+seconds, and whenever a run fails. The `flush_run_buffer` cron drains it once a
+minute so that quiet periods don't leave runs behind; its own runs are written
+straight away, or each flush would leave one behind. The window is only checked
+as runs arrive, so a window under a minute is only kept to while they do.
+
+Runs only leave Redis once their batch is committed, so a worker dying mid-flush
+means the batch is written again by the next flush rather than lost.
+
+Nothing is written when a run starts, though. Unbuffered, a run killed mid-run
+(say, its work horse was OOM-killed) leaves an `IN_PROGRESS` row until the job's
+next run clears it; buffered, it leaves no trace in the run history, only the
+job rq records as failed. Jobs whose runs need to be visible while they're going
+shouldn't be buffered.
+"""
+
+import json
+import logging
+import typing
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from redis.exceptions import LockError, RedisError
+
+from django_rq_cron import rollups
+from django_rq_cron.models import CronJob, CronJobRun, CronJobStatusTransition
+from django_rq_cron.queues import get_connection
+from django_rq_cron.utils import ResourceUsage
+
+logger = logging.getLogger("django_rq_cron")
+
+BUFFER_KEY = "django_rq_cron:runs"
+LOCK_KEY = "django_rq_cron:runs:lock"
+# Seconds a flush holds the lock for, renewed after every batch.
+LOCK_TIMEOUT = 300
+
+# Named after its module; see `django_rq_cron.crons.flush_run_buffer`.
+FLUSH_CRON = "flush_run_buffer"
+
+RUN_FIELDS = (
+    "status",
+    "creation_date",
+    "completion_date",
+    "error",
+    "attempts",
+) + ResourceUsage._fields
+DATE_FIELDS = ("creation_date", "completion_date")
+
+
+def is_enabled() -> bool:
+    """Whether run history should be buffered rather than written synchronously."""
+    return getattr(settings, "DJANGO_RQ_CRON_BUFFER_RUNS", False)
+
+
+def buffers(cron_name: str) -> bool:
+    """Whether a cron's runs should be buffered; never the flushing cron's own."""
+    return is_enabled() and cron_name != FLUSH_CRON
+
+
+def get_buffer_connection():
+    """Get the Redis connection that holds the buffer."""
+    return get_connection(getattr(settings, "DJANGO_RQ_CRON_BUFFER_QUEUE", "default"))
+
+
+def serialize(record: dict) -> str:
+    return json.dumps(
+        {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in record.items()
+        }
+    )
+
+
+def deserialize(raw) -> dict:
+    record = json.loads(raw)
+    # Runs buffered by older versions lack the fields added since.
+    record.setdefault("attempts", 1)
+    for field in ResourceUsage._fields:
+        record.setdefault(field, None)
+    for key in DATE_FIELDS:
+        if record.get(key):
+            record[key] = datetime.fromisoformat(record[key])
+    return record
+
+
+def push_run(
+    cron_name: str,
+    status: CronJobRun.Status,
+    creation_date: datetime,
+    completion_date: typing.Optional[datetime] = None,
+    error: str = "",
+    cadence: typing.Optional[str] = None,
+    description: typing.Optional[str] = None,
+    run_id: typing.Optional[str] = None,
+    attempts: int = 1,
+    usage: typing.Optional[ResourceUsage] = None,
+):
+    """
+    Buffer a finished run, flushing the buffer if it is due.
+
+    `cadence` and `description` are only copied onto the cron job for successful
+    runs, mirroring what `run_cron` does when writing synchronously.
+    """
+    record = {
+        "id": str(run_id or uuid.uuid4()),
+        "cron_job": cron_name,
+        "status": status,
+        "creation_date": creation_date,
+        "completion_date": completion_date,
+        "error": error,
+        "attempts": attempts,
+        "cadence": cadence,
+        "description": description,
+        **(usage._asdict() if usage else dict.fromkeys(ResourceUsage._fields)),
+    }
+    try:
+        with get_buffer_connection().pipeline() as pipeline:
+            pipeline.rpush(BUFFER_KEY, serialize(record))
+            pipeline.lindex(BUFFER_KEY, 0)
+            length, oldest = pipeline.execute()
+    except RedisError as e:
+        # Losing the run entirely would be worse than paying for a synchronous write.
+        logger.error(f"Could not buffer cron job run: {cron_name} - {e}")
+        write_runs([record])
+        return
+
+    window = timedelta(seconds=getattr(settings, "DJANGO_RQ_CRON_BUFFER_WINDOW", 60))
+    if (
+        status in CronJobRun.FAILED_STATUSES
+        or length >= getattr(settings, "DJANGO_RQ_CRON_BUFFER_SIZE", 100)
+        or deserialize(oldest)["creation_date"] <= timezone.now() - window
+    ):
+        flush_runs()
+
+
+def flush_runs(batch_size: int = 500) -> int:
+    """
+    Write every buffered run to the database, `batch_size` runs per transaction.
+
+    Only one process flushes at a time; others return straight away. A flush
+    that outlives its lock stops before trimming, leaving the batch it wrote to
+    be written again by whoever holds the lock now. Returns the number of runs
+    written.
+    """
+    connection = get_buffer_connection()
+    lock = connection.lock(LOCK_KEY, timeout=LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        return 0
+
+    flushed = 0
+    try:
+        while raw_records := connection.lrange(BUFFER_KEY, 0, batch_size - 1):
+            write_runs([deserialize(raw) for raw in raw_records])
+            # Renewing the lock fails if it expired, so the trim can't race a
+            # second flush that started in the meantime.
+            lock.reacquire()
+            # Only drop the runs from Redis once they are safely in the database.
+            connection.ltrim(BUFFER_KEY, len(raw_records), -1)
+            flushed += len(raw_records)
+    except LockError:
+        logger.warning(f"Run buffer lock expired mid-flush after {flushed} runs")
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            pass
+    return flushed
+
+
+@transaction.atomic
+def write_runs(records: list):
+    """
+    Write a batch of run records, oldest first, and bring their cron jobs up to date.
+
+    Writing the same batch twice is harmless: runs that already exist are updated
+    rather than inserted again, and aren't rolled up again.
+    """
+    names = {record["cron_job"] for record in records}
+    cron_jobs = CronJob.objects.in_bulk(names, field_name="name")
+    if len(cron_jobs) < len(names):
+        CronJob.objects.bulk_create(
+            [CronJob(name=name) for name in names - cron_jobs.keys()],
+            ignore_conflicts=True,
+        )
+        cron_jobs = CronJob.objects.in_bulk(names, field_name="name")
+
+    now = timezone.now()
+    runs = [
+        CronJobRun(
+            id=uuid.UUID(record["id"]),
+            cron_job=cron_jobs[record["cron_job"]],
+            modification_date=now,
+            **{field: record[field] for field in RUN_FIELDS},
+        )
+        for record in records
+    ]
+    existing = set(
+        CronJobRun.objects.filter(pk__in=[run.pk for run in runs]).values_list(
+            "pk", flat=True
+        )
+    )
+    CronJobRun.objects.bulk_create([run for run in runs if run.pk not in existing])
+    # `creation_date` is stamped with the flush time on insert; put the real one back.
+    CronJobRun.objects.bulk_update(runs, RUN_FIELDS + ("modification_date",))
+
+    # Runs that were already written have already been rolled up.
+    outcomes = defaultdict(list)
+    for record in records:
+        if uuid.UUID(record["id"]) in existing:
+            continue
+        failed = record["status"] in CronJobRun.FAILED_STATUSES
+        if failed or record["status"] == CronJobRun.Status.SUCCEEDED:
+            day = (record["completion_date"] or record["creation_date"]).date()
+            outcomes[cron_jobs[record["cron_job"]].pk, day].append(
+                (failed, record["wall_time"])
+            )
+    for (cron_job_id, day), job_outcomes in outcomes.items():
+        rollups.record_runs(cron_job_id, day, rollups.Delta.of(job_outcomes))
+
+    transitions = []
+    for name, cron_job in cron_jobs.items():
+        status = cron_job.status
+        fields = {}
+        for record in records:
+            # A run that will be retried doesn't count against the job yet.
+            if (
+                record["cron_job"] != name
+                or record["status"] == CronJobRun.Status.RETRYING
+            ):
+                continue
+            succeeded = record["status"] == CronJobRun.Status.SUCCEEDED
+            new_status = (
+                CronJob.Status.SUCCEEDING if succeeded else CronJob.Status.FAILING
+            )
+            if new_status != status:
+                transitions.append(
+                    CronJobStatusTransition(
+                        parent=cron_job,
+                        old_value=status,
+                        new_value=new_status,
+                        creation_date=record["completion_date"]
+                        or record["creation_date"],
+                    )
+                )
+                fields["latest_status_change"] = transitions[-1].creation_date
+                status = new_status
+            if succeeded:
+                fields["latest_run_date"] = record["completion_date"]
+                fields["cadence"] = record["cadence"]
+                fields["description"] = record["description"]
+        if fields:
+            CronJob.objects.filter(pk=cron_job.pk).update(
+                status=status, modification_date=now, **fields
+            )
+
+    if transitions:
+        CronJobStatusTransition.objects.bulk_create(transitions)
+        CronJobStatusTransition.objects.bulk_update(transitions, ["creation_date"])
@@ -0,0 +1,136 @@
+"""
+Resumable iteration over large querysets.
+
+`iterate` walks a queryset in chunks, paging by primary key rather than by
+offset, and after each chunk records the last primary key it finished as the
+run's cursor. A run that dies partway (a worker restart, an rq timeout) or fails
+leaves its cursor behind. Its retry, or the next run of the job if the latest
+run didn't succeed, picks up after that cursor instead of starting over. A run
+that gets through the whole queryset clears its cursor.
+
+A run keeps one cursor per model it iterates over, in its
+`CronJobRun.data["cursors"]` under the model's label, next to whatever else is
+in its `data`. With `DJANGO_RQ_CRON_BUFFER_RUNS` enabled the run isn't in the
+database yet, so they are kept in Redis, in a hash per cron job, instead.
+"""
+
+import contextvars
+import json
+import typing
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+from django_rq_cron import buffer
+from django_rq_cron.models import CronJobRun
+
+CURSOR_KEY = "django_rq_cron:cursor:{}"
+
+
+class Run(typing.NamedTuple):
+    """The run of a cron job that is in progress."""
+
+    cron_name: str
+    run_id: str
+
+
+# Set by the runner while a cron job's function runs.
+current_run: contextvars.ContextVar[typing.Optional[Run]] = contextvars.ContextVar(
+    "django_rq_cron_current_run", default=None
+)
+
+
+def iterate(
+    queryset: QuerySet,
+    chunk_size: int = 500,
+    update_fields: typing.Optional[typing.Sequence[str]] = None,
+) -> typing.Iterator[list]:
+    """
+    Yield a queryset's objects in lists of `chunk_size`, in primary key order.
+
+    Each chunk is checkpointed once the loop asks for the next one. With
+    `update_fields`, the chunk is first saved with `bulk_update`, in the same
+    transaction as its checkpoint, so a resumed run never redoes a chunk whose
+    changes were committed.
+
+    Outside of a cron job run, this is plain keyset-paginated iteration.
+    """
+    run = current_run.get()
+    label = queryset.model._meta.label_lower
+    pk_field = queryset.model._meta.pk
+    cursor = load(run, label) if run else None
+    if cursor is not None:
+        cursor = pk_field.to_python(cursor)
+    queryset = queryset.order_by("pk")
+
+    while chunk := list(
+        (queryset if cursor is None else queryset.filter(pk__gt=cursor))[:chunk_size]
+    ):
+        yield chunk
+        cursor = chunk[-1].pk
+        with transaction.atomic():
+            if update_fields:
+                queryset.bulk_update(chunk, update_fields)
+            if run:
+                save(run, label, cursor)
+    if run:
+        save(run, label, None)
+
+
+def get_cursor(data: typing.Optional[dict], label: str):
+    return ((data or {}).get("cursors") or {}).get(label)
+
+
+def load(run: Run, label: str):
+    """Get the cursor to resume from: this run's own, or a previous unfinished run's."""
+    if buffer.is_enabled():
+        cursor = buffer.get_buffer_connection().hget(
+            CURSOR_KEY.format(run.cron_name), label
+        )
+        return json.loads(cursor) if cursor else None
+
+    data = (
+        CronJobRun.objects.filter(pk=run.run_id).values_list("data", flat=True).first()
+    )
+    if get_cursor(data, label) is not None:
+        return get_cursor(data, label)
+    previous = (
+        CronJobRun.objects.filter(cron_job__name=run.cron_name)
+        .exclude(pk=run.run_id)
+        .order_by("-creation_date")
+        .values_list("status", "data")
+        .first()
+    )
+    if previous is None:
+        return None
+    status, data = previous
+    if status == CronJobRun.Status.SUCCEEDED:
+        return None
+    return get_cursor(data, label)
+
+
+def save(run: Run, label: str, cursor):
+    """Record how far a run got through a model, or that it finished with a cursor of None."""
+    if cursor is not None and not isinstance(cursor, (int, str)):
+        cursor = str(cursor)
+    if buffer.is_enabled():
+        connection = buffer.get_buffer_connection()
+        key = CURSOR_KEY.format(run.cron_name)
+        if cursor is None:
+            connection.hdel(key, label)
+        else:
+            connection.hset(key, label, json.dumps(cursor))
+        return
+    with transaction.atomic():
+        data = (
+            CronJobRun.objects.select_for_update()
+            .filter(pk=run.run_id)
+            .values_list("data", flat=True)
+            .first()
+        ) or {}
+        cursors = data.setdefault("cursors", {})
+        if cursor is None:
+            cursors.pop(label, None)
+        else:
+            cursors[label] = cursor
+        CronJobRun.objects.filter(pk=run.run_id).update(data=data)
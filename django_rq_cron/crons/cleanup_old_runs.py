@@ -1,10 +1,7 @@
 import logging
-from datetime import timedelta
 
-from django.utils import timezone
-
-from django_rq_cron.models import CronJobRun
 from django_rq_cron.registry import register_cron
+from django_rq_cron.retention import cleanup
 
 logger = logging.getLogger("django_rq_cron")
 
@@ -13,13 +10,12 @@ logger = logging.getLogger("django_rq_cron")
     description="Clean up old cron job runs to prevent database bloat", cadence="daily"
 )
 def do():
-    """Remove cron job runs older than 30 days."""
-    cutoff_date = timezone.now() - timedelta(days=30)
-
-    # Get the count of runs to be deleted
-    count = CronJobRun.objects.filter(creation_date__lt=cutoff_date).count()
-
-    # Delete the runs
-    CronJobRun.objects.filter(creation_date__lt=cutoff_date).delete()
-
-    logger.info(f"Cleaned up {count} cron job runs older than 30 days")
+    """Remove cron job runs and status transitions that are past their retention."""
+    counts = cleanup()
+
+    logger.info(
+        f"Cleaned up {counts['runs']} cron job runs and "
+        f"{counts['status_transitions']} status transitions"
+    )
+    if not counts["finished"]:
+        logger.info("Cleanup ran out of time; the rest will be removed on the next run")
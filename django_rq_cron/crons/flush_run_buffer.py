@@ -0,0 +1,22 @@
+import logging
+
+from django_rq_cron import buffer
+from django_rq_cron.models import CronJob
+from django_rq_cron.registry import register_cron
+
+logger = logging.getLogger("django_rq_cron")
+
+
+def do():
+    """Write out any cron job runs still waiting in the buffer."""
+    count = buffer.flush_runs()
+    logger.info(f"Flushed {count} buffered cron job runs")
+
+
+# Only worth a run every minute when there is a buffer to drain.
+if buffer.is_enabled():
+    register_cron(
+        do,
+        description="Write buffered cron job runs to the database",
+        cadence=CronJob.Cadence.EVERY_MINUTE,
+    )
@@ -0,0 +1,18 @@
+import logging
+
+from django_rq_cron import watchdog
+from django_rq_cron.models import CronJob
+from django_rq_cron.registry import register_cron
+
+logger = logging.getLogger("django_rq_cron")
+
+
+@register_cron(
+    description="Restart scheduler chains that have stopped ticking",
+    cadence=CronJob.Cadence.EVERY_TEN_MINUTES,
+)
+def do():
+    """Reschedule every chain that has missed a tick."""
+    repairs = watchdog.check_chains()
+    if repairs:
+        logger.info(f"Restarted {len(repairs)} stalled cron chains")
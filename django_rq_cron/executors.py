@@ -0,0 +1,206 @@
+"""
+Running cron jobs in a child process, so their memory goes away with it.
+
+A cron registered with `executor=Executor.PROCESS` isn't called in the worker.
+Its function runs in a long-lived child process, started with the `spawn`
+method so that it shares nothing with the worker, and the worker only keeps the
+bookkeeping: the run row, metrics, retries. The return value, or the exception,
+is sent back to the worker over a pipe.
+
+The child is reused from one run to the next and recycled after
+`DJANGO_RQ_CRON_PROCESS_MAX_RUNS` runs (100), or as soon as its peak RSS reaches
+`DJANGO_RQ_CRON_PROCESS_MAX_RSS_MB` (512), so the fragmentation a big job
+leaves behind is handed back to the OS instead of accumulating in a worker that
+lives for days. A child that dies mid-run fails the run and is replaced, as does
+one still running when the worker gives up on it, e.g. at rq's job timeout.
+
+rq's forking `Worker` already runs each job in a fresh work horse, so each run
+gets a fresh child there; the reuse pays off under `SimpleWorker`, where the
+child outlives the job.
+"""
+
+import logging
+import multiprocessing
+import os
+import pickle
+import traceback
+import typing
+
+from django.conf import settings
+
+from django_rq_cron.utils import ResourceMeter, ResourceUsage, peak_rss_kb
+
+logger = logging.getLogger("django_rq_cron")
+
+
+class Result(typing.NamedTuple):
+    """What a run in the child process returned, and what it cost the child."""
+
+    value: typing.Any
+    usage: ResourceUsage
+
+
+class ChildError(Exception):
+    """An exception raised in the child process that couldn't be sent back as is."""
+
+
+class RemoteError(Exception):
+    """Carries an exception the function raised in the child, to tell it from our own."""
+
+    def __init__(self, error: Exception):
+        super().__init__(error)
+        self.error = error
+
+
+class Child:
+    """A child process that runs cron functions one at a time."""
+
+    def __init__(self):
+        context = multiprocessing.get_context("spawn")
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=serve, args=(child_connection,), daemon=True
+        )
+        self.process.start()
+        child_connection.close()
+        self.runs = 0
+        self.rss_kb = 0
+
+    def call(self, cron, run_id=None) -> Result:
+        """Run a cron's function in the child, raising whatever it raised."""
+        self.runs += 1
+        self.connection.send((cron, run_id))
+        try:
+            outcome, payload, usage, self.rss_kb = self.connection.recv()
+        except (EOFError, OSError):
+            self.process.join(5)
+            raise ChildError(
+                f"Cron process exited with code {self.process.exitcode}"
+            ) from None
+        if outcome == "error":
+            raise RemoteError(payload)
+        return Result(payload, usage)
+
+    def is_spent(self) -> bool:
+        """Whether the child has run enough, or grown enough, to be replaced."""
+        max_runs = getattr(settings, "DJANGO_RQ_CRON_PROCESS_MAX_RUNS", 100)
+        max_rss_mb = getattr(settings, "DJANGO_RQ_CRON_PROCESS_MAX_RSS_MB", 512)
+        return self.runs >= max_runs or self.rss_kb >= max_rss_mb * 1024
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.connection.close()
+        self.process.join(5)
+        if self.process.is_alive():
+            self.kill()
+
+
+_child: typing.Optional[Child] = None
+# The process `_child` was started from, since forked work horses inherit it.
+_parent_pid: typing.Optional[int] = None
+
+
+def get_child() -> Child:
+    """Get this process's child, starting one if there's none or it has died."""
+    global _child, _parent_pid
+    if _child is not None and (
+        _parent_pid != os.getpid() or not _child.process.is_alive()
+    ):
+        _child = None
+    if _child is None:
+        _child = Child()
+        _parent_pid = os.getpid()
+    return _child
+
+
+def stop_child():
+    """Stop this process's child, if it has one."""
+    global _child
+    if _child is not None and _parent_pid == os.getpid():
+        _child.stop()
+    _child = None
+
+
+def call_in_process(cron, run_id=None) -> Result:
+    """
+    Run a cron's function in this process's child, recycling the child if it's spent.
+
+    The cron's function is pickled by reference, so it has to be importable by
+    name, as functions decorated with `register_cron` at module level are.
+    """
+    child = get_child()
+    try:
+        result = child.call(cron, run_id)
+    except RemoteError as e:
+        raise e.error from None
+    except BaseException:
+        # The child died, or the wait for it was cut short (by rq's job timeout,
+        # say) while the child is still busy; either way, it's no use any more.
+        child.kill()
+        stop_child()
+        raise
+    finally:
+        if _child is child and child.is_spent():
+            logger.info(
+                f"Recycling cron process: {child.runs} runs, {child.rss_kb} KB peak RSS"
+            )
+            stop_child()
+    return result
+
+
+def serve(connection):
+    """Run the cron functions the parent sends until it sends None or goes away."""
+    import django
+
+    django.setup()
+    # Only importable once Django is set up.
+    from django_rq_cron.runner import call_cron
+
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        cron, run_id = request
+        meter = ResourceMeter()
+        try:
+            with meter:
+                value = call_cron(cron, run_id)
+            response = ("ok", value, meter.usage)
+        except Exception as e:  # noqa: BLE001 - handed to the worker, which records it
+            response = ("error", e, meter.usage)
+        try:
+            # Some exceptions pickle fine but can't be rebuilt from their args.
+            pickle.loads(pickle.dumps(response[1]))
+        except (pickle.PickleError, TypeError, AttributeError):
+            # Whatever can't cross the pipe is described rather than lost.
+            if response[0] == "ok":
+                response = (
+                    "error",
+                    ChildError(f"Unpicklable return value: {response[1]!r}"),
+                    meter.usage,
+                )
+            else:
+                error = response[1]
+                response = (
+                    "error",
+                    ChildError(
+                        f"{type(error).__name__}: {error}\n"
+                        + "".join(
+                            traceback.format_exception(
+                                type(error), error, error.__traceback__
+                            )
+                        )
+                    ),
+                    meter.usage,
+                )
+        connection.send(response + (peak_rss_kb(),))
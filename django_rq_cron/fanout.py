@@ -0,0 +1,188 @@
+"""
+Fanning a cron job out into chunks that run in parallel across workers.
+
+A cron registered with a `fan_out` handler doesn't do the work itself: its
+function returns (or yields) work items, such as primary keys or key ranges
+from `key_ranges`. The items are cut into chunks of `chunk_size`, and each chunk
+is enqueued as a child job that calls the handler with it, spread round-robin
+over `fan_out_queues` and limited to the cron's `timeout`. Children are enqueued in pipelines, one per Redis
+connection and `PIPELINE_CHUNKS` chunks at a time, so even a huge table costs
+few round trips.
+
+The parent `CronJobRun` stays in progress while its children run. Their
+progress is kept in a Redis hash; whichever child finishes last (or the parent
+itself, if every child beat it) records the parent as succeeded, or as failed
+if any chunk failed.
+
+Each attempt of a run has its own hash, and its children carry the attempt
+number. Children still running from an attempt that was retried count towards
+that attempt's dropped hash, so they can't finish the retry early.
+"""
+
+import itertools
+import math
+import typing
+from collections import defaultdict
+from datetime import datetime
+
+from django.db.models import QuerySet
+from rq import Queue
+
+from django_rq_cron.queues import get_connection, get_queue
+
+PROGRESS_KEY = "django_rq_cron:fanout:{}:{}"
+
+# Keep progress around long enough for the slowest fan-out to finish.
+PROGRESS_TTL = 7 * 24 * 60 * 60
+
+# How many chunks are enqueued per pipeline.
+PIPELINE_CHUNKS = 500
+
+# Referenced by path, since the runner imports this module.
+CHUNK_JOB = "django_rq_cron.runner.run_chunk"
+
+
+class Progress(typing.NamedTuple):
+    """How the children of a fanned-out run went."""
+
+    started: datetime
+    attempt: int
+    chunks: int
+    failed: int
+    # The first error a chunk raised.
+    error: str
+
+
+def chunked(items: typing.Iterable, size: int) -> typing.Iterator[list]:
+    """Cut an iterable into lists of `size` items, the last one possibly shorter."""
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def key_ranges(
+    queryset: QuerySet, size: int
+) -> typing.Iterator[typing.Tuple[typing.Any, typing.Any]]:
+    """
+    Yield `(first, last)` primary key pairs, each covering up to `size` rows.
+
+    Pages through the primary keys in order rather than with offsets, so every
+    page is an index range scan. Filter each chunk with `pk__range`.
+    """
+    queryset = queryset.order_by("pk").values_list("pk", flat=True)
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        pks = list(page[:size])
+        if not pks:
+            return
+        yield pks[0], pks[-1]
+        last = pks[-1]
+
+
+def get_progress_connection(cron):
+    return get_connection(cron.queue)
+
+
+def progress_key(run_id: str, attempt: int) -> str:
+    return PROGRESS_KEY.format(run_id, attempt)
+
+
+def fan_out(cron, run_id: str, started: datetime, attempt: int = 1) -> bool:
+    """
+    Enqueue a child job for every chunk of a cron's items.
+
+    Returns whether every child has already finished (or there were none), in
+    which case the caller records the parent.
+    """
+    key = progress_key(run_id, attempt)
+    connection = get_progress_connection(cron)
+    with connection.pipeline() as pipeline:
+        # A retry starts its count afresh, leaving the last attempt's children
+        # nothing to finish.
+        pipeline.delete(key, progress_key(run_id, attempt - 1))
+        pipeline.hset(key, mapping={"started": started.isoformat(), "attempt": attempt})
+        pipeline.expire(key, PROGRESS_TTL)
+        pipeline.execute()
+
+    queue_names = cron.fan_out_queues or (cron.queue,)
+    chunks = enumerate(chunked(cron.function(), cron.chunk_size))
+    total = 0
+    while batch := list(itertools.islice(chunks, PIPELINE_CHUNKS)):
+        enqueue_chunks(cron, run_id, attempt, queue_names, batch)
+        total += len(batch)
+
+    with connection.pipeline() as pipeline:
+        pipeline.hset(key, "chunks", total)
+        pipeline.hget(key, "finished")
+        _, done = pipeline.execute()
+    return int(done or 0) == total
+
+
+def enqueue_chunks(cron, run_id: str, attempt: int, queue_names, batch):
+    """Enqueue a batch of `(index, chunk)` pairs, one pipeline per connection."""
+    by_connection = defaultdict(lambda: defaultdict(list))
+    for index, chunk in batch:
+        queue_name = queue_names[index % len(queue_names)]
+        by_connection[id(get_queue(queue_name).connection)][queue_name].append(
+            Queue.prepare_data(
+                CHUNK_JOB,
+                args=(cron.name, run_id, index, chunk, attempt),
+                timeout=math.ceil(cron.timeout) if cron.timeout else None,
+            )
+        )
+    for queues in by_connection.values():
+        connection = get_queue(next(iter(queues))).connection
+        with connection.pipeline() as pipeline:
+            for queue_name, job_datas in queues.items():
+                get_queue(queue_name).enqueue_many(job_datas, pipeline=pipeline)
+            pipeline.execute()
+
+
+def record_chunk(
+    cron, run_id: str, attempt: int, error: typing.Optional[Exception] = None
+) -> typing.Optional[Progress]:
+    """
+    Count a finished chunk, returning the run's progress if it was the last one.
+
+    Only one caller ever gets the progress back, however the chunks interleave,
+    and never a chunk of an attempt that has since been retried.
+    """
+    key = progress_key(run_id, attempt)
+    with get_progress_connection(cron).pipeline() as pipeline:
+        pipeline.hincrby(key, "finished", 1)
+        if error is not None:
+            pipeline.hincrby(key, "failed", 1)
+            pipeline.hsetnx(key, "error", str(error))
+        # A stale attempt's hash was dropped; don't leave its recreation behind.
+        pipeline.expire(key, PROGRESS_TTL)
+        pipeline.hgetall(key)
+        progress = {
+            field.decode(): value.decode()
+            for field, value in pipeline.execute()[-1].items()
+        }
+    if "chunks" not in progress or int(progress["finished"]) != int(progress["chunks"]):
+        return None
+    return get_progress(progress)
+
+
+def finished(cron, run_id: str, attempt: int) -> Progress:
+    """Get the progress of a run whose children have all finished."""
+    raw = get_progress_connection(cron).hgetall(progress_key(run_id, attempt))
+    return get_progress(
+        {field.decode(): value.decode() for field, value in raw.items()}
+    )
+
+
+def forget(cron, run_id: str, attempt: int):
+    get_progress_connection(cron).delete(progress_key(run_id, attempt))
+
+
+def get_progress(progress: dict) -> Progress:
+    return Progress(
+        started=datetime.fromisoformat(progress["started"]),
+        attempt=int(progress["attempt"]),
+        chunks=int(progress["chunks"]),
+        failed=int(progress.get("failed", 0)),
+        error=progress.get("error", ""),
+    )
@@ -0,0 +1,128 @@
+"""
+Time and memory limits on cron job runs.
+
+A cron's `timeout` is passed to rq as the job timeout, so a hung run is killed
+rather than holding a worker for the queue's default. Async crons are cancelled
+at their timeout instead, with some time to spare before rq steps in.
+
+A cron registered with a `memory_limit` (in MB) is watched while it runs: a
+thread samples the RSS of the process running its function every
+`DJANGO_RQ_CRON_MEMORY_SAMPLE_SECONDS` (1). Once it's over the limit, the run
+is stopped. A function running in the worker gets a `MemoryLimitExceeded` raised
+in its thread, and a child process (see `django_rq_cron.executors`) is killed.
+
+Runs stopped either way are recorded as `TIMED_OUT` or `OUT_OF_MEMORY` rather
+than `FAILED`, though they count as failures everywhere else.
+
+Sampling reads `/proc`, so it needs Linux. Elsewhere only the worker's peak RSS
+is known, which is enough for limits on functions running in the worker only.
+"""
+
+import asyncio
+import ctypes
+import logging
+import os
+import signal
+import threading
+import typing
+
+from django.conf import settings
+from rq.timeouts import JobTimeoutException
+
+from django_rq_cron.models import CronJobRun
+from django_rq_cron.utils import rss_kb
+
+logger = logging.getLogger("django_rq_cron")
+
+
+class TimedOut(asyncio.TimeoutError):
+    """An async cron ran past its timeout and was cancelled."""
+
+
+class MemoryLimitExceeded(MemoryError):
+    """A cron went over its memory limit and was stopped."""
+
+
+class MemoryGuard:
+    """
+    Stop the body of a `with` block once a process goes over a memory limit.
+
+    Without a limit, this does nothing. With a `pid`, that process is killed;
+    otherwise the block's own thread is interrupted.
+    """
+
+    def __init__(
+        self, limit_mb: typing.Optional[float] = None, pid: typing.Optional[int] = None
+    ):
+        self.limit_mb = limit_mb
+        self.pid = pid
+        # The RSS, in KB, that was over the limit.
+        self.breached: typing.Optional[int] = None
+        self.stopped = threading.Event()
+        self.watcher = None
+        self.thread_id = None
+
+    def __enter__(self):
+        if self.limit_mb is not None:
+            self.thread_id = threading.get_ident()
+            self.watcher = threading.Thread(target=self.watch, daemon=True)
+            self.watcher.start()
+        return self
+
+    def watch(self):
+        interval = getattr(settings, "DJANGO_RQ_CRON_MEMORY_SAMPLE_SECONDS", 1)
+        while not self.stopped.wait(interval):
+            usage = rss_kb(self.pid)
+            if usage > self.limit_mb * 1024:
+                self.breached = usage
+                self.interrupt()
+                return
+
+    def interrupt(self):
+        if self.pid is not None:
+            try:
+                os.kill(self.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            return
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(
+            ctypes.c_ulong(self.thread_id), ctypes.py_object(MemoryLimitExceeded)
+        )
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        if self.watcher is not None:
+            self.watcher.join()
+            if self.breached is not None and self.pid is None:
+                # The block may have ended before the exception went off.
+                ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                    ctypes.c_ulong(self.thread_id), None
+                )
+        return False
+
+    @property
+    def error(self) -> str:
+        return (
+            f"Exceeded its memory limit of {self.limit_mb} MB "
+            f"({self.breached // 1024} MB)"
+        )
+
+
+def failure_status(
+    error: Exception, guard: typing.Optional[MemoryGuard] = None
+) -> CronJobRun.Status:
+    """Get the status of a run that ended with `error`."""
+    if (guard is not None and guard.breached is not None) or isinstance(
+        error, MemoryLimitExceeded
+    ):
+        return CronJobRun.Status.OUT_OF_MEMORY
+    if isinstance(error, (JobTimeoutException, TimedOut)):
+        return CronJobRun.Status.TIMED_OUT
+    return CronJobRun.Status.FAILED
+
+
+def describe(error: Exception, guard: typing.Optional[MemoryGuard] = None) -> str:
+    """Describe how a run failed, for its `error`."""
+    if guard is not None and guard.breached is not None:
+        return guard.error
+    return str(error)
@@ -0,0 +1,120 @@
+"""
+Leases that keep runs of the same cron job from overlapping.
+
+A cron job registered with `Overlap.SKIP` or `Overlap.QUEUE_ONE` holds a lease
+in Redis while it runs. The lease expires after `DJANGO_RQ_CRON_LEASE_SECONDS`
+unless it is extended, which a heartbeat thread does every third of that for
+as long as the job is running; a worker that dies simply lets its lease lapse.
+A run queued behind the lease (`Overlap.QUEUE_ONE`) is kept alive by the same
+heartbeat, so it is never lost to a run that outlasts the lease duration. It is
+only queued while the lease is still held, checked atomically in Redis, so a
+holder finishing at that moment can't leave it behind unnoticed.
+
+Runs that find the lease taken are not recorded as `CronJobRun` rows, only
+counted alongside the other metrics when those are enabled (see `skipped_runs`
+and `django_rq_cron.metrics`).
+"""
+
+import logging
+import threading
+import typing
+from collections import Counter
+
+from django.conf import settings
+from redis.exceptions import LockError, RedisError
+
+from django_rq_cron import metrics
+from django_rq_cron.queues import get_connection
+
+logger = logging.getLogger("django_rq_cron")
+
+LEASE_KEY = "django_rq_cron:lease:{}"
+PENDING_KEY = "django_rq_cron:pending:{}"
+
+# Queue a run behind the lease: 1 if queued, 0 if one already was, -1 if the
+# lease has been released.
+QUEUE_BEHIND = """
+if redis.call("exists", KEYS[1]) == 0 then
+    return -1
+end
+if redis.call("set", KEYS[2], 1, "NX", "PX", ARGV[1]) then
+    return 1
+end
+return 0
+"""
+
+
+class Lease:
+    """An exclusive, self-renewing lease on a cron job."""
+
+    def __init__(self, cron_name: str, queue_name: str = "default"):
+        self.cron_name = cron_name
+        self.queue_name = queue_name
+        self.connection = get_connection(queue_name)
+        self.duration = getattr(settings, "DJANGO_RQ_CRON_LEASE_SECONDS", 60)
+        # The heartbeat thread has to see the token, so it can't be thread-local.
+        self.lock = self.connection.lock(
+            LEASE_KEY.format(cron_name), timeout=self.duration, thread_local=False
+        )
+        self.stopped = threading.Event()
+        self.heartbeat = None
+
+    def acquire(self) -> bool:
+        """Take the lease if it is free, and keep it alive until `release`."""
+        if not self.lock.acquire(blocking=False):
+            return False
+        self.heartbeat = threading.Thread(target=self.beat, daemon=True)
+        self.heartbeat.start()
+        return True
+
+    def beat(self):
+        while not self.stopped.wait(self.duration / 3):
+            try:
+                self.lock.reacquire()
+                # A run queued behind this one has to outlast it, however long it takes.
+                self.connection.pexpire(
+                    PENDING_KEY.format(self.cron_name), int(self.duration * 1000)
+                )
+            except LockError:
+                logger.warning(f"Cron job lost its lease: {self.cron_name}")
+                return
+            except RedisError as e:
+                # The lease has two more beats to go before it lapses.
+                logger.warning(
+                    f"Cron job lease heartbeat failed: {self.cron_name} - {e}"
+                )
+
+    def release(self) -> bool:
+        """Give up the lease, returning whether a run was queued behind it meanwhile."""
+        self.stopped.set()
+        if self.heartbeat is not None:
+            self.heartbeat.join()
+        try:
+            self.lock.release()
+        except LockError:
+            pass
+        return bool(self.connection.delete(PENDING_KEY.format(self.cron_name)))
+
+    def queue_behind(self) -> typing.Optional[bool]:
+        """
+        Ask the holder to run the job once more when it is done; only the first ask counts.
+
+        Returns None if the lease was released since it was found taken, in which
+        case nothing was queued and the caller can take the lease itself.
+        """
+        queued = self.connection.register_script(QUEUE_BEHIND)(
+            keys=[LEASE_KEY.format(self.cron_name), PENDING_KEY.format(self.cron_name)],
+            args=[int(self.duration * 1000)],
+        )
+        return None if queued < 0 else bool(queued)
+
+    def record_skip(self):
+        metrics.record_skip(self.cron_name, self.queue_name)
+
+
+def skipped_runs() -> typing.Dict[str, int]:
+    """How many runs each cron job has skipped, across all queues."""
+    counts = Counter()
+    for (cron_name, _), count in metrics.skips().items():
+        counts[cron_name] += count
+    return dict(counts)
@@ -1,11 +1,11 @@
 from django.core.management.base import BaseCommand
 
-from django_rq_cron.registry import import_crons
+from django_rq_cron.registry import get_import_profiles, import_crons
 from django_rq_cron.runner import bootstrap
 
 
 class Command(BaseCommand):
-    help = "Bootstrap cron jobs by scheduling the first run of each cadence."
+    help = "Bootstrap cron jobs by scheduling the first run of each schedule."
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -14,6 +14,11 @@ class Command(BaseCommand):
             default="default",
             help="The name of the RQ queue to use for scheduling cron jobs.",
         )
+        parser.add_argument(
+            "--profile",
+            action="store_true",
+            help="Report how long each crons module took to import, and its memory.",
+        )
 
     def handle(self, *args, **options):
         queue = options["queue"]
@@ -26,6 +31,29 @@ class Command(BaseCommand):
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"Successfully bootstrapped {len(jobs)} cron job cadences."
+                f"Successfully bootstrapped {len(jobs)} cron job schedules."
             )
         )
+
+        if options["profile"]:
+            self.write_profile()
+
+    def write_profile(self):
+        profiles = get_import_profiles()
+        self.stdout.write(f"{'module':<60} {'crons':>6} {'ms':>9} {'RSS KB':>9}  error")
+        for profile in profiles:
+            self.stdout.write(
+                f"{profile.module:<60} {profile.crons:>6} "
+                f"{profile.seconds * 1000:>9.1f} {profile.rss_kb:>9}  {profile.error}"
+            )
+
+        totals = {}
+        for profile in profiles:
+            seconds, crons = totals.get(profile.app, (0, 0))
+            totals[profile.app] = (seconds + profile.seconds, crons + profile.crons)
+        self.stdout.write("")
+        self.stdout.write(f"{'app':<60} {'crons':>6} {'ms':>9}")
+        for app, (seconds, crons) in sorted(
+            totals.items(), key=lambda item: item[1][0], reverse=True
+        ):
+            self.stdout.write(f"{app:<60} {crons:>6} {seconds * 1000:>9.1f}")
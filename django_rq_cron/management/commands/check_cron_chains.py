@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from django_rq_cron.registry import discover_crons
+from django_rq_cron.watchdog import check_chains
+
+
+class Command(BaseCommand):
+    help = "Restart any cron job schedule that has stopped ticking."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue",
+            type=str,
+            default="default",
+            help="The RQ queue to restart schedules on when it isn't known.",
+        )
+
+    def handle(self, *args, **options):
+        discover_crons()
+
+        repairs = check_chains(options["queue"])
+
+        for repair in repairs:
+            gap = f"after {repair.gap}" if repair.gap is not None else "(never ticked)"
+            self.stdout.write(self.style.WARNING(f"Restarted {repair.crontab} {gap}"))
+        self.stdout.write(
+            self.style.SUCCESS(f"Restarted {len(repairs)} stalled cron job schedules.")
+        )
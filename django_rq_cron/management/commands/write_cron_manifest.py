@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_rq_cron.registry import (
+    REGISTERED_CRON_JOBS,
+    get_manifest_path,
+    import_crons,
+    write_manifest,
+)
+
+
+class Command(BaseCommand):
+    help = "Write a manifest of every registered cron job, for lazy discovery."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            type=str,
+            default=None,
+            help="Where to write the manifest. Defaults to DJANGO_RQ_CRON_MANIFEST.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["output"] or get_manifest_path()
+        if not path:
+            raise CommandError("Pass --output or set DJANGO_RQ_CRON_MANIFEST.")
+
+        # Forget anything loaded from an existing manifest, so that crons which
+        # no longer exist don't carry over into the new one.
+        for name, cron in list(REGISTERED_CRON_JOBS.items()):
+            if cron.function is None:
+                del REGISTERED_CRON_JOBS[name]
+        import_crons()
+
+        try:
+            count = write_manifest(path)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully wrote {count} cron jobs to {path}.")
+        )
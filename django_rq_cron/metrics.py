@@ -0,0 +1,232 @@
+"""
+Counters and duration histograms for cron jobs, kept in Redis.
+
+With `DJANGO_RQ_CRON_METRICS` enabled, every finished run increments its
+counters in a single pipelined call, and every tick counts the runs it
+dispatched per queue. `render` turns the counters into OpenMetrics text without
+touching the database, so they can be scraped as often as you like. They live in
+the Redis behind `DJANGO_RQ_CRON_METRICS_QUEUE`.
+
+Skipped runs (see `django_rq_cron.locks`) and restarted scheduler chains (see
+`django_rq_cron.watchdog`) are counted here too. Like every other counter, they
+are only kept while the metrics are enabled, and a Redis error only loses the
+count, never the run or the tick that was being counted.
+"""
+
+import bisect
+import logging
+import typing
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from django_rq_cron.queues import get_connection
+
+logger = logging.getLogger("django_rq_cron")
+
+RUNS_KEY = "django_rq_cron:metrics:runs"
+DURATIONS_KEY = "django_rq_cron:metrics:durations"
+SKIPS_KEY = "django_rq_cron:metrics:skips"
+DISPATCHED_KEY = "django_rq_cron:metrics:dispatched"
+CHAIN_GAPS_KEY = "django_rq_cron:metrics:chain_gaps"
+
+# Upper bounds, in seconds, of the run duration histogram's buckets.
+DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+# Joins the labels that make up a hash field; cron and queue names never contain it.
+SEPARATOR = "|"
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def is_enabled() -> bool:
+    return getattr(settings, "DJANGO_RQ_CRON_METRICS", False)
+
+
+def get_metrics_connection():
+    """Get the Redis connection that holds the metrics."""
+    return get_connection(getattr(settings, "DJANGO_RQ_CRON_METRICS_QUEUE", "default"))
+
+
+def field(*labels) -> str:
+    return SEPARATOR.join(str(label) for label in labels)
+
+
+def record_run(
+    cron_name: str, queue_name: str, status: str, duration: typing.Optional[float]
+):
+    """Count a finished run, and its duration if its function got to run."""
+    if not is_enabled():
+        return
+    try:
+        with get_metrics_connection().pipeline(transaction=False) as pipeline:
+            pipeline.hincrby(RUNS_KEY, field(cron_name, queue_name, status), 1)
+            if duration is not None:
+                bucket = bisect.bisect_left(DURATION_BUCKETS, duration)
+                pipeline.hincrby(DURATIONS_KEY, field(cron_name, queue_name, bucket), 1)
+                pipeline.hincrbyfloat(
+                    DURATIONS_KEY, field(cron_name, queue_name, "sum"), duration
+                )
+            pipeline.execute()
+    except RedisError as e:
+        logger.warning(f"Could not record cron job metrics: {cron_name} - {e}")
+
+
+def record_dispatch(counts: typing.Mapping[str, int]):
+    """Count the runs a tick enqueued, given a mapping of queue name to count."""
+    if not is_enabled() or not counts:
+        return
+    try:
+        with get_metrics_connection().pipeline(transaction=False) as pipeline:
+            for queue_name, count in counts.items():
+                pipeline.hincrby(DISPATCHED_KEY, queue_name, count)
+            pipeline.execute()
+    except RedisError as e:
+        logger.warning(f"Could not record cron dispatch metrics: {e}")
+
+
+def record_skip(cron_name: str, queue_name: str):
+    """Count a run skipped because the previous one still held the lease."""
+    if not is_enabled():
+        return
+    try:
+        get_metrics_connection().hincrby(SKIPS_KEY, field(cron_name, queue_name), 1)
+    except RedisError as e:
+        logger.warning(f"Could not record cron job skip: {cron_name} - {e}")
+
+
+def skips() -> typing.Dict[typing.Tuple[str, str], int]:
+    """How many runs were skipped, by cron job and queue."""
+    return {
+        tuple(key.decode().split(SEPARATOR)): int(count)
+        for key, count in get_metrics_connection().hgetall(SKIPS_KEY).items()
+    }
+
+
+def record_chain_gap(schedule: str, seconds: float):
+    """Count a restarted scheduler chain, and how long it went without ticking."""
+    if not is_enabled():
+        return
+    try:
+        with get_metrics_connection().pipeline(transaction=False) as pipeline:
+            pipeline.hincrby(CHAIN_GAPS_KEY, field(schedule, "count"), 1)
+            pipeline.hincrbyfloat(CHAIN_GAPS_KEY, field(schedule, "seconds"), seconds)
+            pipeline.execute()
+    except RedisError as e:
+        logger.warning(f"Could not record cron chain gap metrics: {schedule} - {e}")
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def sample(name: str, labels: typing.Mapping[str, str], value) -> str:
+    rendered = ",".join(
+        f'{key}="{escape(str(label))}"' for key, label in labels.items()
+    )
+    return f"{name}{{{rendered}}} {value}"
+
+
+def render() -> str:
+    """Render every counter in the OpenMetrics text format."""
+    with get_metrics_connection().pipeline(transaction=False) as pipeline:
+        for key in (RUNS_KEY, DURATIONS_KEY, SKIPS_KEY, DISPATCHED_KEY, CHAIN_GAPS_KEY):
+            pipeline.hgetall(key)
+        runs, durations, skipped, dispatched, chain_gaps = (
+            {key.decode(): value.decode() for key, value in values.items()}
+            for values in pipeline.execute()
+        )
+
+    lines = [
+        "# TYPE django_rq_cron_runs counter",
+        "# HELP django_rq_cron_runs Finished cron job runs, by outcome.",
+    ]
+    for key, count in sorted(runs.items()):
+        job, queue, status = key.split(SEPARATOR)
+        lines.append(
+            sample(
+                "django_rq_cron_runs_total",
+                {"job": job, "queue": queue, "status": status},
+                count,
+            )
+        )
+
+    lines += [
+        "# TYPE django_rq_cron_run_duration_seconds histogram",
+        "# HELP django_rq_cron_run_duration_seconds Time spent in cron job functions.",
+    ]
+    histograms = {}
+    for key, value in durations.items():
+        job, queue, bucket = key.split(SEPARATOR)
+        histogram = histograms.setdefault(
+            (job, queue), {"buckets": [0] * (len(DURATION_BUCKETS) + 1), "sum": 0}
+        )
+        if bucket == "sum":
+            histogram["sum"] = float(value)
+        else:
+            histogram["buckets"][int(bucket)] = int(value)
+    for (job, queue), histogram in sorted(histograms.items()):
+        labels = {"job": job, "queue": queue}
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS + ("+Inf",), histogram["buckets"]):
+            cumulative += count
+            lines.append(
+                sample(
+                    "django_rq_cron_run_duration_seconds_bucket",
+                    {**labels, "le": str(bound)},
+                    cumulative,
+                )
+            )
+        lines.append(
+            sample("django_rq_cron_run_duration_seconds_sum", labels, histogram["sum"])
+        )
+        lines.append(
+            sample("django_rq_cron_run_duration_seconds_count", labels, cumulative)
+        )
+
+    lines += [
+        "# TYPE django_rq_cron_skips counter",
+        "# HELP django_rq_cron_skips Runs skipped because the previous run was still going.",
+    ]
+    for key, count in sorted(skipped.items()):
+        job, queue = key.split(SEPARATOR)
+        lines.append(
+            sample("django_rq_cron_skips_total", {"job": job, "queue": queue}, count)
+        )
+
+    lines += [
+        "# TYPE django_rq_cron_dispatched counter",
+        "# HELP django_rq_cron_dispatched Runs enqueued by the scheduler, by queue.",
+    ]
+    for queue, count in sorted(dispatched.items()):
+        lines.append(sample("django_rq_cron_dispatched_total", {"queue": queue}, count))
+
+    lines += [
+        "# TYPE django_rq_cron_chain_restarts counter",
+        "# HELP django_rq_cron_chain_restarts Stalled scheduler chains the watchdog restarted.",
+    ]
+    for key, count in sorted(chain_gaps.items()):
+        schedule, kind = key.split(SEPARATOR)
+        if kind == "count":
+            lines.append(
+                sample(
+                    "django_rq_cron_chain_restarts_total", {"schedule": schedule}, count
+                )
+            )
+    lines += [
+        "# TYPE django_rq_cron_chain_gap_seconds counter",
+        "# HELP django_rq_cron_chain_gap_seconds Time stalled scheduler chains went without ticking.",
+    ]
+    for key, seconds in sorted(chain_gaps.items()):
+        schedule, kind = key.split(SEPARATOR)
+        if kind == "seconds":
+            lines.append(
+                sample(
+                    "django_rq_cron_chain_gap_seconds_total",
+                    {"schedule": schedule},
+                    seconds,
+                )
+            )
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
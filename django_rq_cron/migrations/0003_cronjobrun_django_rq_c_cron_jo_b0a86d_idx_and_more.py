@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_rq_cron", "0002_alter_cronjobstatustransition_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cronjobrun",
+            index=models.Index(
+                fields=["cron_job", "status"], name="django_rq_c_cron_jo_b0a86d_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cronjobrun",
+            index=models.Index(
+                fields=["cron_job", "-creation_date"],
+                name="django_rq_c_cron_jo_d6c197_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cronjobrun",
+            index=models.Index(
+                fields=["creation_date"], name="django_rq_c_creatio_aec588_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cronjobstatustransition",
+            index=models.Index(
+                fields=["parent", "-creation_date"],
+                name="django_rq_c_parent__a372e7_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_rq_cron", "0003_cronjobrun_django_rq_c_cron_jo_b0a86d_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cronjobrun",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.AlterField(
+            model_name="cronjobrun",
+            name="status",
+            field=models.TextField(
+                choices=[
+                    ("in_progress", "In Progress"),
+                    ("succeeded", "Succeeded"),
+                    ("failed", "Failed"),
+                    ("retrying", "Retrying"),
+                ],
+                default="succeeded",
+                max_length=50,
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_rq_cron", "0004_cronjobrun_attempts_alter_cronjobrun_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cronjobrun",
+            name="cpu_system",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="cronjobrun",
+            name="cpu_user",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="cronjobrun",
+            name="gc_collections",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="cronjobrun",
+            name="rss_delta",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Growth of the worker's peak RSS, in KB.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="cronjobrun",
+            name="wall_time",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:37
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_rq_cron", "0005_cronjobrun_cpu_system_cronjobrun_cpu_user_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CronJobDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("runs", models.PositiveIntegerField(default=0)),
+                ("failures", models.PositiveIntegerField(default=0)),
+                ("total_duration", models.FloatField(default=0)),
+                ("min_duration", models.FloatField(blank=True, null=True)),
+                ("max_duration", models.FloatField(blank=True, null=True)),
+                (
+                    "bucket_0",
+                    models.PositiveIntegerField(default=0, help_text="Up to 0.1s"),
+                ),
+                (
+                    "bucket_1",
+                    models.PositiveIntegerField(default=0, help_text="Up to 0.5s"),
+                ),
+                (
+                    "bucket_2",
+                    models.PositiveIntegerField(default=0, help_text="Up to 1s"),
+                ),
+                (
+                    "bucket_3",
+                    models.PositiveIntegerField(default=0, help_text="Up to 5s"),
+                ),
+                (
+                    "bucket_4",
+                    models.PositiveIntegerField(default=0, help_text="Up to 10s"),
+                ),
+                (
+                    "bucket_5",
+                    models.PositiveIntegerField(default=0, help_text="Up to 30s"),
+                ),
+                (
+                    "bucket_6",
+                    models.PositiveIntegerField(default=0, help_text="Up to 1m"),
+                ),
+                (
+                    "bucket_7",
+                    models.PositiveIntegerField(default=0, help_text="Up to 5m"),
+                ),
+                (
+                    "bucket_8",
+                    models.PositiveIntegerField(default=0, help_text="Up to 15m"),
+                ),
+                (
+                    "bucket_9",
+                    models.PositiveIntegerField(default=0, help_text="Up to 1h"),
+                ),
+                (
+                    "bucket_10",
+                    models.PositiveIntegerField(default=0, help_text="Over 1h"),
+                ),
+                (
+                    "cron_job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="django_rq_cron.cronjob",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-day",),
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("cron_job", "day"), name="django_rq_cron_rollup_job_day"
+                    )
+                ],
+            },
+        ),
+    ]
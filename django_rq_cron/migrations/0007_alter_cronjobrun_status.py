@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_rq_cron", "0006_cronjobdailyrollup"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="cronjobrun",
+            name="status",
+            field=models.TextField(
+                choices=[
+                    ("in_progress", "In Progress"),
+                    ("succeeded", "Succeeded"),
+                    ("failed", "Failed"),
+                    ("retrying", "Retrying"),
+                    ("timed_out", "Timed Out"),
+                    ("out_of_memory", "Out Of Memory"),
+                ],
+                default="succeeded",
+                max_length=50,
+            ),
+        ),
+    ]
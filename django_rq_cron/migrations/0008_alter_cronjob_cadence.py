@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_rq_cron", "0007_alter_cronjobrun_status"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="cronjob",
+            name="cadence",
+            field=models.TextField(default="hourly", max_length=255),
+        ),
+    ]
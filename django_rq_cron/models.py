@@ -1,6 +1,8 @@
-from django.db import models
+import typing
 import uuid
 
+from django.db import models
+
 
 class CronJob(models.Model):
     """A cron job configuration."""
@@ -20,9 +22,8 @@ class CronJob(models.Model):
         WEEKLY = "weekly"
         MONTHLY = "monthly"
 
-    cadence = models.TextField(
-        max_length=50, choices=Cadence.choices, default=Cadence.HOURLY
-    )
+    # Not limited to `Cadence`: custom cadence names and crontab expressions too.
+    cadence = models.TextField(max_length=255, default=Cadence.HOURLY)
 
     class Status(models.TextChoices):
         NEW = "new"
@@ -77,6 +78,13 @@ class CronJobRun(models.Model):
         IN_PROGRESS = "in_progress"
         SUCCEEDED = "succeeded"
         FAILED = "failed"
+        RETRYING = "retrying"
+        # Failed by running past its timeout, or over its memory limit.
+        TIMED_OUT = "timed_out"
+        OUT_OF_MEMORY = "out_of_memory"
+
+    # Every way a run can end without succeeding.
+    FAILED_STATUSES = (Status.FAILED, Status.TIMED_OUT, Status.OUT_OF_MEMORY)
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     creation_date = models.DateTimeField(auto_now_add=True)
@@ -95,9 +103,28 @@ class CronJobRun(models.Model):
     )
     error = models.TextField(max_length=1000, blank=True)
     data = models.JSONField(null=True)
+    attempts = models.PositiveSmallIntegerField(default=1)
+
+    # What running the job's function cost, leaving out the bookkeeping around it.
+    # Null while the run is in progress, and for runs recorded before these existed.
+    wall_time = models.FloatField(null=True, blank=True)
+    cpu_user = models.FloatField(null=True, blank=True)
+    cpu_system = models.FloatField(null=True, blank=True)
+    rss_delta = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Growth of the worker's peak RSS, in KB."
+    )
+    gc_collections = models.PositiveIntegerField(null=True, blank=True)
 
     class Meta:
         ordering = ("-creation_date",)
+        indexes = (
+            # Clearing out stale in-progress runs after each success.
+            models.Index(fields=("cron_job", "status")),
+            # A job's most recent runs, and its expired runs during cleanup.
+            models.Index(fields=("cron_job", "-creation_date")),
+            # The run changelist, and age cutoffs across all jobs.
+            models.Index(fields=("creation_date",)),
+        )
 
 
 class CronJobStatusTransition(models.Model):
@@ -121,3 +148,98 @@ class CronJobStatusTransition(models.Model):
 
     class Meta:
         ordering = ("-creation_date",)
+        indexes = (models.Index(fields=("parent", "-creation_date")),)
+
+
+class CronJobDailyRollup(models.Model):
+    """
+    A day's worth of a cron job's finished runs, aggregated.
+
+    Rollups are kept after the runs themselves are cleaned up, so long-term
+    trends can be read from a few rows per job. Durations are the time spent in
+    the job's function, counted into the histogram `bucket_N` columns whose upper
+    bounds are `BUCKETS[N]` seconds; `bucket_10` counts everything slower.
+    """
+
+    BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    cron_job = models.ForeignKey(
+        "CronJob",
+        null=False,
+        blank=False,
+        on_delete=models.CASCADE,
+        related_name="daily_rollups",
+    )
+    day = models.DateField()
+
+    runs = models.PositiveIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    total_duration = models.FloatField(default=0)
+    min_duration = models.FloatField(null=True, blank=True)
+    max_duration = models.FloatField(null=True, blank=True)
+
+    bucket_0 = models.PositiveIntegerField(default=0, help_text="Up to 0.1s")
+    bucket_1 = models.PositiveIntegerField(default=0, help_text="Up to 0.5s")
+    bucket_2 = models.PositiveIntegerField(default=0, help_text="Up to 1s")
+    bucket_3 = models.PositiveIntegerField(default=0, help_text="Up to 5s")
+    bucket_4 = models.PositiveIntegerField(default=0, help_text="Up to 10s")
+    bucket_5 = models.PositiveIntegerField(default=0, help_text="Up to 30s")
+    bucket_6 = models.PositiveIntegerField(default=0, help_text="Up to 1m")
+    bucket_7 = models.PositiveIntegerField(default=0, help_text="Up to 5m")
+    bucket_8 = models.PositiveIntegerField(default=0, help_text="Up to 15m")
+    bucket_9 = models.PositiveIntegerField(default=0, help_text="Up to 1h")
+    bucket_10 = models.PositiveIntegerField(default=0, help_text="Over 1h")
+
+    BUCKET_FIELDS = tuple(f"bucket_{i}" for i in range(len(BUCKETS) + 1))
+
+    @property
+    def histogram(self) -> typing.List[int]:
+        return [getattr(self, field) for field in self.BUCKET_FIELDS]
+
+    @property
+    def success_rate(self) -> typing.Optional[float]:
+        if not self.runs:
+            return None
+        return (self.runs - self.failures) / self.runs
+
+    def duration_percentile(self, percentile: float) -> typing.Optional[float]:
+        """
+        Estimate a duration percentile (0-100) as the upper bound of its bucket.
+
+        Durations past the last bound are reported as `max_duration`.
+        """
+        return percentile_from_histogram(
+            self.histogram, percentile, self.BUCKETS, self.max_duration
+        )
+
+    class Meta:
+        ordering = ("-day",)
+        constraints = (
+            models.UniqueConstraint(
+                fields=("cron_job", "day"), name="django_rq_cron_rollup_job_day"
+            ),
+        )
+
+
+def percentile_from_histogram(
+    histogram: typing.Sequence[int],
+    percentile: float,
+    bounds: typing.Sequence[float],
+    max_duration: typing.Optional[float] = None,
+) -> typing.Optional[float]:
+    """
+    Estimate a percentile (0-100) from bucket counts as the upper bound of its bucket.
+
+    Pass the summed histograms of several rollups to get a percentile across days.
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = total * percentile / 100
+    seen = 0
+    for bound, count in zip(tuple(bounds) + (max_duration,), histogram):
+        seen += count
+        if count and seen >= rank:
+            return bound
+    return max_duration
@@ -0,0 +1,43 @@
+from django_rq.queues import get_queue as build_queue
+from django_rq.queues import get_redis_connection
+from django_rq.settings import QUEUES
+
+# Keys of an `RQ_QUEUES` entry that configure the queue rather than the Redis
+# connection behind it; queues that only differ in these share a connection.
+QUEUE_ONLY_KEYS = {"ASYNC", "DEFAULT_TIMEOUT", "DEFAULT_RESULT_TTL", "SERIALIZER"}
+
+CONNECTIONS = {}
+QUEUES_BY_NAME = {}
+
+
+def connection_key(queue_name: str) -> str:
+    """Return a key identifying the Redis connection a queue is configured with."""
+    config = QUEUES[queue_name]
+    return repr(
+        sorted(
+            (key, value) for key, value in config.items() if key not in QUEUE_ONLY_KEYS
+        )
+    )
+
+
+def get_connection(queue_name: str = "default"):
+    """Get the Redis connection for a queue, shared by every queue configured alike."""
+    key = connection_key(queue_name)
+    if key not in CONNECTIONS:
+        CONNECTIONS[key] = get_redis_connection(QUEUES[queue_name])
+    return CONNECTIONS[key]
+
+
+def get_queue(queue_name: str = "default"):
+    """Get an rq queue by name, building it only the first time it is asked for."""
+    if queue_name not in QUEUES_BY_NAME:
+        QUEUES_BY_NAME[queue_name] = build_queue(
+            queue_name, connection=get_connection(queue_name)
+        )
+    return QUEUES_BY_NAME[queue_name]
+
+
+def clear_cache():
+    """Forget every cached queue and connection, e.g. after settings change."""
+    CONNECTIONS.clear()
+    QUEUES_BY_NAME.clear()
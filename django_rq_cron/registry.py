@@ -1,26 +1,224 @@
+import hashlib
 import importlib
+import inspect
+import json
+import logging
+import sys
+import time
 import typing
-from dataclasses import dataclass
+from collections import defaultdict
 from functools import partial
+from types import MappingProxyType, ModuleType
 
 from django.apps import apps
+from django.conf import settings
+from django.db import models
+from django.utils.module_loading import import_string
 
 from django_rq_cron.models import CronJob
+from django_rq_cron.utils import compile_crontab, rss_kb
 
+logger = logging.getLogger("django_rq_cron")
 
-@dataclass
-class RegisteredCronJob:
+
+class Overlap(models.TextChoices):
+    """What to do when a cron job is due while its previous run is still going."""
+
+    ALLOW = "allow"
+    SKIP = "skip"
+    QUEUE_ONE = "queue_one"
+
+
+class Executor(models.TextChoices):
+    """Where a cron job's function runs."""
+
+    # In the worker itself.
+    INLINE = "inline"
+    # In a child process that is recycled regularly; see `django_rq_cron.executors`.
+    PROCESS = "process"
+
+
+# Seconds to wait before each retry of a failed run; the last delay repeats.
+DEFAULT_BACKOFF = (30, 120, 600)
+
+
+class RegisteredCronJob(typing.NamedTuple):
     """A registered cron job."""
 
     name: str
     description: str
-    cadence: CronJob.Cadence
-    function: typing.Callable
+    # A `CronJob.Cadence`, a key of `DJANGO_RQ_CRON_CUSTOM_CADENCES`, or a crontab expression.
+    cadence: str
+    # None until `module` is imported, for crons loaded from a manifest.
+    function: typing.Optional[typing.Callable]
     queue: str = "default"
+    retention_days: typing.Optional[int] = None
+    overlap: Overlap = Overlap.ALLOW
+    tries: int = 1
+    backoff: typing.Tuple[int, ...] = DEFAULT_BACKOFF
+    # Seconds after each tick to spread runs over; None defers to DJANGO_RQ_CRON_SPREAD.
+    spread: typing.Optional[int] = None
+    # Seconds a run may take before it is stopped; None defers to the queue's
+    # default timeout, or DJANGO_RQ_CRON_ASYNC_TIMEOUT for async crons.
+    timeout: typing.Optional[float] = None
+    # Whether `function` is a coroutine function, known even before it's imported.
+    asynchronous: bool = False
+    # Called with each chunk of the items `function` returns; see `django_rq_cron.fanout`.
+    fan_out: typing.Optional[typing.Callable] = None
+    chunk_size: int = 100
+    # Queues the chunks are spread over; empty means the cron's own queue.
+    fan_out_queues: typing.Tuple[str, ...] = ()
+    executor: Executor = Executor.INLINE
+    # Megabytes of RSS a run may use before it is stopped; see `django_rq_cron.limits`.
+    memory_limit: typing.Optional[float] = None
+    module: str = ""
 
 
 REGISTERED_CRON_JOBS = {}
 
+HOURLY_CRON_TAB = "0 * * * *"
+TEN_MINUTES_CRON_TAB = "*/10 * * * *"
+DAILY_CRON_TAB = "0 20 * * *"
+EVERY_MINUTE_CRON_TAB = "* * * * *"
+WEEKLY_CRON_TAB = "0 0 * * 1"
+MONTHLY_CRON_TAB = "0 0 1 * *"
+
+CRON_TAB_STRING_TO_CADENCE = {
+    HOURLY_CRON_TAB: CronJob.Cadence.HOURLY,
+    TEN_MINUTES_CRON_TAB: CronJob.Cadence.EVERY_TEN_MINUTES,
+    DAILY_CRON_TAB: CronJob.Cadence.DAILY,
+    EVERY_MINUTE_CRON_TAB: CronJob.Cadence.EVERY_MINUTE,
+    WEEKLY_CRON_TAB: CronJob.Cadence.WEEKLY,
+    MONTHLY_CRON_TAB: CronJob.Cadence.MONTHLY,
+}
+
+
+CRONTAB_MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+
+def normalize_crontab(expression: str) -> str:
+    """
+    Normalize a crontab expression so that equivalent spellings compare equal.
+
+    Whitespace is collapsed, names are lowercased and macros such as `@daily` are
+    expanded. Raises `ValueError` if the expression isn't valid.
+    """
+    normalized = " ".join(expression.lower().split())
+    normalized = CRONTAB_MACROS.get(normalized, normalized)
+    try:
+        compile_crontab(normalized)
+    except ValueError as e:
+        raise ValueError(f"Invalid crontab expression: {expression!r} ({e})") from e
+    return normalized
+
+
+def resolve_crontab(cadence: str) -> str:
+    """
+    Get the normalized crontab expression for a cadence.
+
+    `cadence` is one of the built-in `CronJob.Cadence` values, a key of
+    `DJANGO_RQ_CRON_CUSTOM_CADENCES`, or a crontab expression. Cadences in the
+    current `Schedule` are looked up rather than parsed again.
+    """
+    crontab_string = get_schedule().crontabs.get(cadence)
+    if crontab_string is not None:
+        return crontab_string
+    return compile_cadence(cadence)
+
+
+def compile_cadence(cadence: str) -> str:
+    """Work out the normalized crontab expression for a cadence, without the `Schedule`."""
+    for crontab_string, builtin_cadence in CRON_TAB_STRING_TO_CADENCE.items():
+        if cadence == builtin_cadence:
+            return crontab_string
+    custom_cadences = getattr(settings, "DJANGO_RQ_CRON_CUSTOM_CADENCES", {})
+    return normalize_crontab(custom_cadences.get(cadence, cadence))
+
+
+def chain_label(crontab_string: str) -> str:
+    """
+    Name the scheduler chain of a normalized crontab expression, for use in job ids.
+
+    Built-in schedules keep their cadence name; any other expression is named after
+    its hash, since rq job ids can't contain spaces or `*`.
+    """
+    cadence = CRON_TAB_STRING_TO_CADENCE.get(crontab_string)
+    if cadence is not None:
+        return cadence
+    return f"crontab-{hashlib.sha1(crontab_string.encode()).hexdigest()[:12]}"
+
+
+class Schedule(typing.NamedTuple):
+    """
+    An immutable view of the registry, laid out for dispatch.
+
+    `jobs` maps each distinct (normalized) crontab expression to its queues, and
+    each queue to the tuple of crons to enqueue there. Crons that share an
+    expression share one scheduler chain, however their cadence was spelled.
+    `labels` maps each of those expressions to its `chain_label`, and `crontabs`
+    maps every built-in cadence, registered spelling and expression to its
+    normalized expression, so ticks don't have to parse it again.
+    """
+
+    crontabs: typing.Mapping[str, str]
+    jobs: typing.Mapping[str, typing.Mapping[str, typing.Tuple[RegisteredCronJob, ...]]]
+    labels: typing.Mapping[str, str]
+
+
+_schedule = None
+
+
+def build_schedule() -> Schedule:
+    """Compile `REGISTERED_CRON_JOBS` into a fresh `Schedule` and make it current."""
+    global _schedule
+
+    crontabs = {
+        cadence: crontab_string
+        for crontab_string, cadence in CRON_TAB_STRING_TO_CADENCE.items()
+    }
+    jobs = defaultdict(lambda: defaultdict(list))
+    for cron in REGISTERED_CRON_JOBS.values():
+        if cron.cadence not in crontabs:
+            crontabs[cron.cadence] = compile_cadence(cron.cadence)
+        jobs[crontabs[cron.cadence]][cron.queue].append(cron)
+    crontabs.update({crontab_string: crontab_string for crontab_string in jobs})
+
+    _schedule = Schedule(
+        crontabs=MappingProxyType(crontabs),
+        jobs=MappingProxyType(
+            {
+                crontab_string: MappingProxyType(
+                    {queue: tuple(crons) for queue, crons in queues.items()}
+                )
+                for crontab_string, queues in jobs.items()
+            }
+        ),
+        labels=MappingProxyType(
+            {crontab_string: chain_label(crontab_string) for crontab_string in jobs}
+        ),
+    )
+    return _schedule
+
+
+def get_schedule() -> Schedule:
+    """
+    Get the current `Schedule`, building it if the registry changed since the last build.
+
+    Code that edits `REGISTERED_CRON_JOBS` directly rather than through
+    `register_cron` should call `build_schedule` afterwards.
+    """
+    if _schedule is None:
+        return build_schedule()
+    return _schedule
+
 
 def extract_name(runner_function: typing.Callable) -> str:
     """Extract the name of a function to use as the cron job name."""
@@ -30,12 +228,22 @@ def extract_name(runner_function: typing.Callable) -> str:
 
 
 def register_cron(
-    runner_function: typing.Callable = None,
+    runner_function: typing.Optional[typing.Callable] = None,
     *,
     description: str = "",
     tries: int = 1,
-    cadence: CronJob.Cadence = CronJob.Cadence.HOURLY,
+    cadence: str = CronJob.Cadence.HOURLY,
     queue: str = "default",
+    retention_days: typing.Optional[int] = None,
+    overlap: Overlap = Overlap.ALLOW,
+    backoff: typing.Sequence[int] = DEFAULT_BACKOFF,
+    spread: typing.Optional[int] = None,
+    timeout: typing.Optional[float] = None,
+    fan_out: typing.Optional[typing.Callable] = None,
+    chunk_size: int = 100,
+    fan_out_queues: typing.Sequence[str] = (),
+    executor: Executor = Executor.INLINE,
+    memory_limit: typing.Optional[float] = None,
 ) -> typing.Callable:
     """
     Register a function as a cron job.
@@ -52,7 +260,66 @@ def register_cron(
         )
         def my_other_cron_job():
             pass
+
+    `retention_days` overrides how long the job's run history is kept; see
+    `django_rq_cron.retention`.
+
+    `overlap` decides what happens when the job comes due while a previous run is
+    still going: run it anyway (`Overlap.ALLOW`), drop it (`Overlap.SKIP`), or run
+    it once more after the current run ends (`Overlap.QUEUE_ONE`). See
+    `django_rq_cron.locks`.
+
+    `cadence` can be a `CronJob.Cadence`, the name of one of the
+    `DJANGO_RQ_CRON_CUSTOM_CADENCES`, or any crontab expression (including macros
+    such as `@daily`). Invalid expressions raise `ValueError` straight away.
+
+    `tries` is how many times a failing run is attempted in total. Each retry is
+    scheduled on the job's queue after the next delay in `backoff` (in seconds,
+    the last one repeating), so no worker sits idle waiting for it. The job only
+    counts as failing once its last attempt fails.
+
+    `spread` delays each run by a fixed offset of up to that many seconds after
+    the tick, derived from the job's name, so jobs sharing a schedule don't all
+    start at once. It defaults to `DJANGO_RQ_CRON_SPREAD` (0, meaning no delay)
+    and is capped at the time between the schedule's ticks.
+
+    `timeout` is how many seconds a run may take. It is passed to rq as the job
+    timeout, so a run that hangs is stopped rather than holding a worker for the
+    queue's default timeout, and is recorded as `TIMED_OUT`. `memory_limit` stops
+    a run whose process goes over that many megabytes of RSS, recording it as
+    `OUT_OF_MEMORY`. See `django_rq_cron.limits`.
+
+    The function can also be a coroutine function. Each run then gets its own
+    event loop and is cancelled after `timeout` seconds (by default
+    `DJANGO_RQ_CRON_ASYNC_TIMEOUT`, 300). With `DJANGO_RQ_CRON_ASYNC_BATCH`
+    enabled, the async crons due on the same tick and queue share a single rq job
+    and event loop instead; see `django_rq_cron.runner.run_async_crons`.
+
+    With a `fan_out` handler, the function returns work items instead of doing the
+    work. They are cut into chunks of `chunk_size`, and each chunk is handed to
+    `fan_out` in a job of its own on one of `fan_out_queues`, so the work spreads
+    across every worker. The run succeeds once every chunk has; see
+    `django_rq_cron.fanout`.
+
+    With `executor=Executor.PROCESS`, the function runs in a child process that
+    is recycled every so often, so a job that loads a lot into memory doesn't
+    leave a worker bloated. The function has to be importable by name. See
+    `django_rq_cron.executors`.
     """
+    if tries < 1:
+        raise ValueError(f"tries must be at least 1, not {tries}")
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, not {chunk_size}")
+    if spread is not None and spread < 0:
+        raise ValueError(f"spread must not be negative, not {spread}")
+    if timeout is not None and timeout <= 0:
+        raise ValueError(f"timeout must be positive, not {timeout}")
+    if memory_limit is not None and memory_limit <= 0:
+        raise ValueError(f"memory_limit must be positive, not {memory_limit}")
+    if fan_out is not None and executor != Executor.INLINE:
+        raise ValueError("Cron jobs that fan out can only run inline")
+    compile_cadence(cadence)
+
     if runner_function is None:
         return partial(
             register_cron,
@@ -60,27 +327,286 @@ def register_cron(
             tries=tries,
             cadence=cadence,
             queue=queue,
+            retention_days=retention_days,
+            overlap=overlap,
+            backoff=backoff,
+            spread=spread,
+            timeout=timeout,
+            fan_out=fan_out,
+            chunk_size=chunk_size,
+            fan_out_queues=fan_out_queues,
+            executor=executor,
+            memory_limit=memory_limit,
         )
 
+    global _schedule
+
     name = extract_name(runner_function)
-    registration = RegisteredCronJob(name, description, cadence, runner_function, queue)
-    REGISTERED_CRON_JOBS[registration.name] = registration
+    registration = RegisteredCronJob(
+        name=name,
+        description=description,
+        cadence=cadence,
+        function=runner_function,
+        queue=queue,
+        retention_days=retention_days,
+        overlap=overlap,
+        tries=tries,
+        backoff=tuple(backoff),
+        spread=spread,
+        timeout=timeout,
+        asynchronous=inspect.iscoroutinefunction(runner_function),
+        fan_out=fan_out,
+        chunk_size=chunk_size,
+        fan_out_queues=tuple(fan_out_queues),
+        executor=Executor(executor),
+        memory_limit=memory_limit,
+        module=runner_function.__module__,
+    )
+    if REGISTERED_CRON_JOBS.get(registration.name) != registration:
+        REGISTERED_CRON_JOBS[registration.name] = registration
+        _schedule = None
     return runner_function
 
 
+class ImportProfile(typing.NamedTuple):
+    """What importing one crons module cost."""
+
+    app: str
+    module: str
+    seconds: float
+    # Change in the process's current RSS over the import, so what the module
+    # keeps, less anything it freed. Peak RSS where `/proc` isn't available.
+    rss_kb: int
+    crons: int
+    error: str = ""
+
+
+# Module name to profile, for every crons module this process has imported.
+IMPORT_PROFILES = {}
+
+
+def import_profiled(app_name: str, module_name: str) -> ModuleType:
+    """
+    Import a crons module, recording what it cost in `IMPORT_PROFILES`.
+
+    Modules that were already imported are returned without a new profile. A
+    module that doesn't exist raises `ModuleNotFoundError` without a profile;
+    any other failure is recorded before it is raised.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    start, rss = time.perf_counter(), rss_kb()
+    module, error = None, ""
+    try:
+        module = importlib.import_module(module_name)
+    except Exception as e:
+        if not (isinstance(e, ModuleNotFoundError) and e.name == module_name):
+            error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if module is not None or error:
+            IMPORT_PROFILES[module_name] = ImportProfile(
+                app=app_name,
+                module=module_name,
+                seconds=time.perf_counter() - start,
+                rss_kb=rss_kb() - rss,
+                crons=sum(
+                    1
+                    for cron in REGISTERED_CRON_JOBS.values()
+                    if cron.module == module_name
+                ),
+                error=error,
+            )
+    return module
+
+
+def get_import_profiles() -> typing.List[ImportProfile]:
+    """Get the profile of every crons module imported so far, most expensive first."""
+    return sorted(
+        IMPORT_PROFILES.values(), key=lambda profile: profile.seconds, reverse=True
+    )
+
+
+def get_builtin_crons() -> typing.Set[str]:
+    """
+    Get the names of the built-in crons to register.
+
+    None of them run unless listed in `DJANGO_RQ_CRON_BUILTIN_CRONS`, except
+    `flush_run_buffer`, which only registers itself when runs are buffered.
+    """
+    return set(getattr(settings, "DJANGO_RQ_CRON_BUILTIN_CRONS", ())) | {
+        "flush_run_buffer"
+    }
+
+
 def import_crons():
     """
     Import all cron job modules from installed apps.
 
     This function searches for a 'crons' module in each installed app
-    and imports it to register cron jobs.
+    and imports it to register cron jobs. This package's own crons live in
+    modules of its `crons` package, which are only imported if enabled; see
+    `get_builtin_crons`. What each import cost is recorded; see
+    `get_import_profiles`.
     """
     # Get all installed apps
     installed_apps = [app_config.name for app_config in apps.get_app_configs()]
 
     # Import crons from each app
     for app_name in installed_apps:
+        module_name = f"{app_name}.crons"
         try:
-            importlib.import_module(f"{app_name}.crons")
-        except ModuleNotFoundError:
-            pass
+            import_profiled(app_name, module_name)
+        except ModuleNotFoundError as e:
+            if e.name != module_name:
+                # The crons module exists but imports something that doesn't.
+                logger.error(f"Cron module failed to import: {module_name} - {e}")
+            continue
+        if app_name == __package__:
+            for name in sorted(get_builtin_crons()):
+                import_profiled(app_name, f"{module_name}.{name}")
+
+    build_schedule()
+
+
+def is_lazy() -> bool:
+    """Whether crons should be loaded from the manifest rather than imported up front."""
+    return getattr(settings, "DJANGO_RQ_CRON_LAZY", False)
+
+
+def get_manifest_path() -> typing.Optional[str]:
+    return getattr(settings, "DJANGO_RQ_CRON_MANIFEST", None)
+
+
+def discover_crons():
+    """
+    Populate the registry at startup.
+
+    In lazy mode (`DJANGO_RQ_CRON_LAZY`), only the manifest written by
+    `write_cron_manifest` is read, and each cron's module is imported by
+    `get_cron` the first time it runs. Otherwise, or if there's no manifest, every
+    app's crons are imported.
+    """
+    if is_lazy():
+        path = get_manifest_path()
+        if path and load_manifest(path):
+            return
+        logger.warning(f"Cron manifest not found, importing every cron instead: {path}")
+    import_crons()
+
+
+def dotted_path(function: typing.Callable) -> str:
+    return f"{function.__module__}.{function.__qualname__}"
+
+
+def import_later(path: str) -> typing.Callable:
+    """Stand in for the function at a dotted path, importing it only once it's called."""
+
+    def call(*args, **kwargs):
+        return import_string(path)(*args, **kwargs)
+
+    call.__module__, _, call.__qualname__ = path.rpartition(".")
+    return call
+
+
+def write_manifest(path: str) -> int:
+    """
+    Write every registered cron to a manifest file, returning how many were written.
+
+    Raises `ValueError` if a cron's `fan_out` handler can't be imported by its
+    dotted path, such as a lambda or a method.
+    """
+    for cron in REGISTERED_CRON_JOBS.values():
+        if cron.fan_out is not None and "." in cron.fan_out.__qualname__:
+            raise ValueError(
+                f"{cron.name} fans out to {dotted_path(cron.fan_out)}, which can't "
+                "be imported by name; make it a module-level function"
+            )
+    crons = [
+        {
+            "name": cron.name,
+            "description": cron.description,
+            "cadence": cron.cadence,
+            "queue": cron.queue,
+            "retention_days": cron.retention_days,
+            "overlap": cron.overlap,
+            "tries": cron.tries,
+            "backoff": cron.backoff,
+            "spread": cron.spread,
+            "timeout": cron.timeout,
+            "asynchronous": cron.asynchronous,
+            "executor": cron.executor,
+            "memory_limit": cron.memory_limit,
+            "fan_out": dotted_path(cron.fan_out) if cron.fan_out else None,
+            "chunk_size": cron.chunk_size,
+            "fan_out_queues": cron.fan_out_queues,
+            "module": cron.module,
+            "function": f"{cron.module}.{cron.function.__qualname__}",
+        }
+        for cron in sorted(REGISTERED_CRON_JOBS.values(), key=lambda cron: cron.name)
+    ]
+    with open(path, "w") as f:
+        json.dump({"crons": crons}, f, indent=2)
+    return len(crons)
+
+
+def load_manifest(path: str) -> bool:
+    """
+    Register every cron in a manifest without importing it.
+
+    Crons that are already registered are left alone. Returns False if there's no
+    manifest at `path`.
+    """
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return False
+
+    for entry in manifest["crons"]:
+        REGISTERED_CRON_JOBS.setdefault(
+            entry["name"],
+            RegisteredCronJob(
+                name=entry["name"],
+                description=entry["description"],
+                cadence=entry["cadence"],
+                function=None,
+                queue=entry["queue"],
+                retention_days=entry["retention_days"],
+                overlap=Overlap(entry["overlap"]),
+                tries=entry["tries"],
+                backoff=tuple(entry["backoff"]),
+                spread=entry.get("spread"),
+                timeout=entry.get("timeout"),
+                asynchronous=entry.get("asynchronous", False),
+                executor=Executor(entry.get("executor", Executor.INLINE)),
+                memory_limit=entry.get("memory_limit"),
+                fan_out=import_later(entry["fan_out"])
+                if entry.get("fan_out")
+                else None,
+                chunk_size=entry.get("chunk_size", 100),
+                fan_out_queues=tuple(entry.get("fan_out_queues", ())),
+                module=entry["module"],
+            ),
+        )
+    build_schedule()
+    return True
+
+
+def get_cron(cron_name: str) -> RegisteredCronJob:
+    """
+    Get a registered cron by name, importing its module first if it came from the manifest.
+
+    Raises `KeyError` if there's no such cron.
+    """
+    cron = REGISTERED_CRON_JOBS[cron_name]
+    if cron.function is None:
+        importlib.import_module(cron.module)
+        cron = REGISTERED_CRON_JOBS[cron_name]
+        if cron.function is None:
+            raise KeyError(
+                f"{cron_name} is in the cron manifest but {cron.module} doesn't "
+                "register it; the manifest is out of date"
+            )
+    return cron
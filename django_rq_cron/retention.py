@@ -0,0 +1,176 @@
+"""
+Pruning of old cron job history.
+
+Deleting through the ORM collects every doomed row in memory first, which falls
+over on tables with tens of millions of rows. Instead, history is deleted by
+primary key in small batches with a pause in between, walking each job's rows in
+`creation_date` order so every batch is a range scan of the job's index. Cleanup
+stops once it has used up its time budget, remembering in Redis which job it got
+to; the next run starts from that job, so no job is starved by those before it.
+
+How long history is kept is decided per job: `register_cron(retention_days=...)`
+wins, then `DJANGO_RQ_CRON_RETENTION_DAYS` (a mapping of cadence to days), then
+`DEFAULT_RETENTION_DAYS`.
+"""
+
+import itertools
+import logging
+import time
+import typing
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from django_rq_cron.models import CronJob, CronJobRun, CronJobStatusTransition
+from django_rq_cron.queues import get_connection
+from django_rq_cron.registry import REGISTERED_CRON_JOBS
+
+logger = logging.getLogger("django_rq_cron")
+
+DEFAULT_RETENTION_DAYS = 30
+
+# The name of the cron job the last cleanup ran out of time on.
+CURSOR_KEY = "django_rq_cron:cleanup:cursor"
+
+
+def retention_for(cron_job: CronJob) -> timedelta:
+    """How long to keep the history of a cron job."""
+    registration = REGISTERED_CRON_JOBS.get(cron_job.name)
+    if registration is not None and registration.retention_days is not None:
+        return timedelta(days=registration.retention_days)
+    by_cadence = getattr(settings, "DJANGO_RQ_CRON_RETENTION_DAYS", {})
+    return timedelta(days=by_cadence.get(cron_job.cadence, DEFAULT_RETENTION_DAYS))
+
+
+def delete_by_pk(model, pks: list, using: str = "default") -> int:
+    """Delete rows by primary key with a single raw DELETE, skipping the ORM collector."""
+    connection = connections[using]
+    pk = model._meta.pk
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)} "
+            f"WHERE {connection.ops.quote_name(pk.column)} "
+            f"IN ({', '.join(['%s'] * len(pks))})",
+            [pk.get_db_prep_value(value, connection) for value in pks],
+        )
+        return cursor.rowcount
+
+
+def delete_in_chunks(
+    queryset,
+    chunk_size: int = 500,
+    pause: float = 0.1,
+    deadline: typing.Optional[float] = None,
+) -> typing.Tuple[int, bool]:
+    """
+    Delete every row of `queryset`, `chunk_size` rows at a time.
+
+    Rows are walked in `(creation_date, pk)` order, resuming after the last row
+    of the previous chunk. Paging on the primary key instead would mean sorting
+    every remaining row on each chunk, since the primary keys are random UUIDs
+    that no index on `creation_date` can hand back in order.
+
+    Sleeps `pause` seconds between chunks and stops before starting a chunk once
+    `time.monotonic()` has passed `deadline`. Returns the number of rows deleted
+    and whether the queryset was exhausted.
+    """
+    deleted = 0
+    last = None
+    while deadline is None or time.monotonic() < deadline:
+        chunk = queryset.order_by("creation_date", "pk")
+        if last is not None:
+            last_date, last_pk = last
+            chunk = chunk.filter(creation_date__gte=last_date).exclude(
+                Q(creation_date=last_date) & Q(pk__lte=last_pk)
+            )
+        rows = list(chunk.values_list("creation_date", "pk")[:chunk_size])
+        if not rows:
+            return deleted, True
+        deleted += delete_by_pk(
+            queryset.model, [pk for _, pk in rows], using=queryset.db
+        )
+        if len(rows) < chunk_size:
+            return deleted, True
+        last = rows[-1]
+        time.sleep(pause)
+    return deleted, False
+
+
+def get_cursor_connection():
+    return get_connection(getattr(settings, "DJANGO_RQ_CRON_CLEANUP_QUEUE", "default"))
+
+
+def load_cursor() -> typing.Optional[str]:
+    """Get the name of the cron job to start cleaning up from, if any."""
+    try:
+        cursor = get_cursor_connection().get(CURSOR_KEY)
+    except RedisError as e:
+        logger.warning(f"Could not read the cleanup cursor, starting over: {e}")
+        return None
+    return cursor.decode() if cursor else None
+
+
+def save_cursor(cron_job_name: typing.Optional[str]):
+    """Remember the cron job cleanup stopped at, or that it got through them all."""
+    try:
+        if cron_job_name is None:
+            get_cursor_connection().delete(CURSOR_KEY)
+        else:
+            get_cursor_connection().set(CURSOR_KEY, cron_job_name)
+    except RedisError as e:
+        logger.warning(f"Could not save the cleanup cursor: {e}")
+
+
+def cleanup(now=None) -> typing.Dict[str, int]:
+    """
+    Delete run history and status transitions that are past their retention.
+
+    Jobs are cleaned up in order of name, starting from the job the previous
+    cleanup ran out of time on and wrapping around. Returns the number of rows
+    deleted per model, and whether cleanup finished within
+    `DJANGO_RQ_CRON_CLEANUP_TIME_BUDGET` seconds under `"finished"`.
+    """
+    now = now or timezone.now()
+    deadline = time.monotonic() + getattr(
+        settings, "DJANGO_RQ_CRON_CLEANUP_TIME_BUDGET", 300
+    )
+    chunk_size = getattr(settings, "DJANGO_RQ_CRON_CLEANUP_CHUNK_SIZE", 500)
+    pause = getattr(settings, "DJANGO_RQ_CRON_CLEANUP_PAUSE", 0.1)
+
+    counts = {"runs": 0, "status_transitions": 0, "finished": True}
+    cron_jobs = CronJob.objects.only("id", "name", "cadence").order_by("name")
+    start = load_cursor()
+    if start is not None:
+        cron_jobs = itertools.chain(
+            cron_jobs.filter(name__gte=start).iterator(),
+            cron_jobs.filter(name__lt=start).iterator(),
+        )
+    else:
+        cron_jobs = cron_jobs.iterator()
+    for cron_job in cron_jobs:
+        cutoff = now - retention_for(cron_job)
+        for key, queryset in (
+            ("runs", CronJobRun.objects.filter(cron_job=cron_job)),
+            (
+                "status_transitions",
+                CronJobStatusTransition.objects.filter(parent=cron_job),
+            ),
+        ):
+            deleted, finished = delete_in_chunks(
+                queryset.filter(creation_date__lt=cutoff),
+                chunk_size=chunk_size,
+                pause=pause,
+                deadline=deadline,
+            )
+            counts[key] += deleted
+            if not finished:
+                counts["finished"] = False
+                save_cursor(cron_job.name)
+                return counts
+    if start is not None:
+        save_cursor(None)
+    return counts
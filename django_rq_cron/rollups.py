@@ -0,0 +1,173 @@
+"""
+Daily rollups of cron job runs.
+
+Every finished run (not every attempt: retries only count once they give up)
+is folded into its job's `CronJobDailyRollup` row for the day with a single
+upsert. On PostgreSQL and SQLite that is one `INSERT ... ON CONFLICT DO UPDATE`
+statement that increments the counters in place; elsewhere it is an `UPDATE`,
+followed by an `INSERT` for the first run of the day.
+"""
+
+import bisect
+import typing
+import uuid
+from datetime import date
+
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from django_rq_cron.models import CronJobDailyRollup
+
+# Databases that support `INSERT ... ON CONFLICT DO UPDATE`.
+UPSERT_VENDORS = ("postgresql", "sqlite")
+
+BUCKETS = CronJobDailyRollup.BUCKETS
+BUCKET_FIELDS = CronJobDailyRollup.BUCKET_FIELDS
+
+
+class Delta(typing.NamedTuple):
+    """What a batch of runs adds to a rollup."""
+
+    runs: int
+    failures: int
+    total_duration: float
+    min_duration: typing.Optional[float]
+    max_duration: typing.Optional[float]
+    buckets: typing.Tuple[int, ...]
+
+    @classmethod
+    def of(
+        cls, outcomes: typing.Iterable[typing.Tuple[bool, typing.Optional[float]]]
+    ) -> "Delta":
+        """Sum up `(failed, duration)` pairs; runs without a duration only count as runs."""
+        runs = failures = 0
+        durations = []
+        buckets = [0] * len(BUCKET_FIELDS)
+        for failed, duration in outcomes:
+            runs += 1
+            failures += failed
+            if duration is not None:
+                durations.append(duration)
+                buckets[bisect.bisect_left(BUCKETS, duration)] += 1
+        return cls(
+            runs=runs,
+            failures=failures,
+            total_duration=sum(durations),
+            min_duration=min(durations, default=None),
+            max_duration=max(durations, default=None),
+            buckets=tuple(buckets),
+        )
+
+
+def record_run(cron_job_id, day: date, failed: bool, duration: typing.Optional[float]):
+    """Fold one finished run into its rollup."""
+    record_runs(cron_job_id, day, Delta.of([(failed, duration)]))
+
+
+def record_runs(cron_job_id, day: date, delta: Delta, using: str = "default"):
+    """Fold a batch of finished runs of one job on one day into its rollup."""
+    if connections[using].vendor in UPSERT_VENDORS:
+        upsert(cron_job_id, day, delta, using)
+        return
+
+    while True:
+        if update(cron_job_id, day, delta, using):
+            return
+        try:
+            with transaction.atomic(using=using):
+                CronJobDailyRollup.objects.using(using).create(
+                    cron_job_id=cron_job_id, day=day, **values(delta)
+                )
+            return
+        except IntegrityError:
+            # Another worker created the row first; add to it instead.
+            continue
+
+
+def values(delta: Delta) -> dict:
+    return {
+        "runs": delta.runs,
+        "failures": delta.failures,
+        "total_duration": delta.total_duration,
+        "min_duration": delta.min_duration,
+        "max_duration": delta.max_duration,
+        **dict(zip(BUCKET_FIELDS, delta.buckets)),
+    }
+
+
+def update(cron_job_id, day: date, delta: Delta, using: str) -> int:
+    fields = {
+        "runs": F("runs") + delta.runs,
+        "failures": F("failures") + delta.failures,
+        "total_duration": F("total_duration") + delta.total_duration,
+        **{
+            field: F(field) + count
+            for field, count in zip(BUCKET_FIELDS, delta.buckets)
+            if count
+        },
+    }
+    if delta.min_duration is not None:
+        # Coalesce first: some databases' LEAST and GREATEST return NULL if any
+        # argument is NULL.
+        fields["min_duration"] = Least(
+            Coalesce("min_duration", Value(delta.min_duration)),
+            Value(delta.min_duration),
+        )
+        fields["max_duration"] = Greatest(
+            Coalesce("max_duration", Value(delta.max_duration)),
+            Value(delta.max_duration),
+        )
+    return (
+        CronJobDailyRollup.objects.using(using)
+        .filter(cron_job_id=cron_job_id, day=day)
+        .update(**fields)
+    )
+
+
+def upsert(cron_job_id, day: date, delta: Delta, using: str):
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    meta = CronJobDailyRollup._meta
+    table = quote(meta.db_table)
+    row = {
+        "id": uuid.uuid4(),
+        "cron_job_id": cron_job_id,
+        "day": day,
+        **values(delta),
+    }
+    columns = [quote(meta.get_field(name).column) for name in row]
+    params = [
+        meta.get_field(name).get_db_prep_value(value, connection)
+        for name, value in row.items()
+    ]
+
+    def add(name):
+        column = quote(name)
+        return f"{column} = {table}.{column} + EXCLUDED.{column}"
+
+    def pick(name, comparison):
+        column = quote(name)
+        return (
+            f"{column} = CASE WHEN {table}.{column} IS NULL "
+            f"OR EXCLUDED.{column} {comparison} {table}.{column} "
+            f"THEN EXCLUDED.{column} ELSE {table}.{column} END"
+        )
+
+    # A NULL min or max from the batch never wins: `x < NULL` isn't true.
+    assignments = [
+        add("runs"),
+        add("failures"),
+        add("total_duration"),
+        pick("min_duration", "<"),
+        pick("max_duration", ">"),
+        *(add(field) for field in BUCKET_FIELDS),
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"ON CONFLICT ({quote('cron_job_id')}, {quote('day')}) "
+            f"DO UPDATE SET {', '.join(assignments)}",
+            params,
+        )
@@ -1,144 +1,795 @@
+import asyncio
+import inspect
+import itertools
 import logging
+import math
+import re
+import typing
+import uuid
+from collections import Counter, defaultdict
 from collections.abc import Iterable
+from datetime import datetime, timedelta
+from time import perf_counter
 
-import django_rq
+from django.conf import settings
 from django.utils import timezone
+from rq import Queue
+from rq.job import Job
+from rq.registry import ScheduledJobRegistry
 
+from django_rq_cron import (
+    buffer,
+    checkpoints,
+    executors,
+    fanout,
+    limits,
+    metrics,
+    rollups,
+    watchdog,
+)
+from django_rq_cron.locks import Lease
 from django_rq_cron.models import CronJob, CronJobRun, CronJobStatusTransition
-from django_rq_cron.registry import REGISTERED_CRON_JOBS, RegisteredCronJob
-from django_rq_cron.utils import get_next_scheduled_time
+from django_rq_cron.queues import QUEUES, get_queue
+from django_rq_cron.registry import (  # noqa: F401 - crontab constants used to live here
+    CRON_TAB_STRING_TO_CADENCE,
+    DAILY_CRON_TAB,
+    EVERY_MINUTE_CRON_TAB,
+    HOURLY_CRON_TAB,
+    MONTHLY_CRON_TAB,
+    REGISTERED_CRON_JOBS,
+    TEN_MINUTES_CRON_TAB,
+    WEEKLY_CRON_TAB,
+    Executor,
+    Overlap,
+    RegisteredCronJob,
+    chain_label,
+    get_cron,
+    get_schedule,
+    resolve_crontab,
+)
+from django_rq_cron.utils import (
+    ResourceMeter,
+    ResourceUsage,
+    get_next_scheduled_time,
+    get_tick,
+    iter_fire_times,
+    spread_offset,
+)
 
 logger = logging.getLogger("django_rq_cron")
 
 
-def crons_for_cadence(cadence: CronJob.Cadence) -> Iterable[RegisteredCronJob]:
-    """Get all cron jobs for a given cadence."""
-    for cron in REGISTERED_CRON_JOBS.values():
-        if cron.cadence == cadence:
-            yield cron
+def crons_for_cadence(cadence: str) -> Iterable[RegisteredCronJob]:
+    """Get all cron jobs that share the schedule of a given cadence."""
+    return itertools.chain.from_iterable(
+        get_schedule().jobs.get(resolve_crontab(cadence), {}).values()
+    )
+
+
+def transition_status(
+    cron_job_id, old_status: CronJob.Status, new_status: CronJob.Status, now, **fields
+) -> bool:
+    """
+    Move a cron job to `new_status`, writing any extra `fields` in the same UPDATE.
+
+    The status change is a conditional UPDATE guarded on `old_status`, so a
+    transition row is only written by the run that actually changed the status.
+    Returns whether a transition was recorded.
+    """
+    while old_status != new_status:
+        changed = CronJob.objects.filter(pk=cron_job_id, status=old_status).update(
+            status=new_status,
+            latest_status_change=now,
+            modification_date=now,
+            **fields,
+        )
+        if changed:
+            CronJobStatusTransition.objects.create(
+                parent_id=cron_job_id, old_value=old_status, new_value=new_status
+            )
+            return True
+        # Another run changed the status underneath us; re-read it and try again.
+        old_status = (
+            CronJob.objects.filter(pk=cron_job_id)
+            .values_list("status", flat=True)
+            .get()
+        )
+
+    if fields:
+        CronJob.objects.filter(pk=cron_job_id).update(modification_date=now, **fields)
+    return False
+
+
+def run_cron(cron_name: str, attempt: int = 1, run_id=None):
+    """
+    Run a cron job by name.
+
+    `attempt` and `run_id` are set when retrying a failed run (see
+    `register_cron`'s `tries`), so that every attempt is recorded on the same run.
+
+    Bookkeeping is kept to a fixed number of statements per run, once the
+    `CronJob` row exists (the very first run of a job also inserts it):
+
+    - success, status unchanged: 6 (select job, insert run, update run,
+      upsert the daily rollup, update job, delete stale in-progress runs)
+    - success, status changed: 7 (as above, plus the transition insert)
+    - failure, already failing: 4 (select job, insert run, update run, upsert
+      the daily rollup)
+    - failure, status changed: 6 (as above, plus update job and the transition insert)
+    - failure that will be retried: 3 (select job, insert run, update run)
+
+    The rollup upsert is a single statement on PostgreSQL and SQLite; elsewhere the
+    first run of each day costs an extra insert.
+
+    Retries update their run rather than inserting it, which costs the same.
+
+    With `DJANGO_RQ_CRON_BUFFER_RUNS` enabled, none of these happen here: the run is
+    handed to `django_rq_cron.buffer` and written out later in a batch.
 
+    Cron jobs that don't allow overlapping runs take a lease first (see
+    `django_rq_cron.locks`); a run that can't get it makes no queries at all.
+    """
+    cron = REGISTERED_CRON_JOBS.get(cron_name)
+    if cron is None or cron.overlap == Overlap.ALLOW:
+        execute_cron(cron_name, attempt, run_id)
+        return
+
+    lease = Lease(cron_name, cron.queue)
+    acquired = lease.acquire()
+    if not acquired and cron.overlap == Overlap.QUEUE_ONE:
+        queued = lease.queue_behind()
+        if queued:
+            logger.info(f"Cron job queued behind its running copy: {cron_name}")
+            return
+        if queued is None:
+            # The running copy finished in the meantime, so run now instead.
+            acquired = lease.acquire()
+    if not acquired:
+        logger.info(f"Cron job skipped, its previous run is still going: {cron_name}")
+        lease.record_skip()
+        return
 
-def run_cron(cron_name: str):
-    """Run a cron job by name."""
+    try:
+        execute_cron(cron_name, attempt, run_id)
+    finally:
+        if lease.release():
+            get_queue(cron.queue).enqueue(
+                run_cron, cron_name, job_timeout=get_job_timeout(cron)
+            )
+
+
+def execute_cron(cron_name: str, attempt: int = 1, run_id=None):
+    """Run a cron job and record how it went."""
     logger.info(f"Cron job started: {cron_name}")
-    cron_job, _ = CronJob.objects.get_or_create(name=cron_name)
     start = timezone.now()
-    run = CronJobRun.objects.create(
-        cron_job=cron_job, status=CronJobRun.Status.IN_PROGRESS
-    )
+    if buffer.buffers(cron_name):
+        cron_job = None
+        run_id = run_id or str(uuid.uuid4())
+    else:
+        cron_job, _ = CronJob.objects.get_or_create(name=cron_name)
+        run_id = start_run(cron_job, attempt, run_id)
+    meter = ResourceMeter()
+    guard = None
+    child_usage = None
     try:
-        cron = REGISTERED_CRON_JOBS[cron_name]
-        cron.function()
+        cron = get_cron(cron_name)
+        guard = limits.MemoryGuard(
+            cron.memory_limit,
+            executors.get_child().process.pid
+            if cron.executor == Executor.PROCESS and cron.memory_limit is not None
+            else None,
+        )
+        with meter, guard:
+            if cron.fan_out is not None:
+                complete = fanout.fan_out(cron, str(run_id), start, attempt)
+            elif cron.executor == Executor.PROCESS:
+                child_usage = executors.call_in_process(cron, run_id).usage
+            else:
+                call_cron(cron, run_id)
+        if guard.breached is not None:
+            # The function caught the exception that was meant to stop it.
+            raise limits.MemoryLimitExceeded(guard.error)
     except Exception as e:
-        logger.error(f"Cron job error: {cron_name} - {e}")
-        try:
-            # Try to log to Sentry if it's available
-            import sentry_sdk
-
-            sentry_sdk.capture_exception(e)
-        except ImportError:
-            pass
-
-        run.status = CronJobRun.Status.FAILED
-        run.error = str(e)
-        run.save()
-        if cron_job.status != CronJob.Status.FAILING:
-            cron_job.latest_status_change = timezone.now()
-            cron_job.status = CronJob.Status.FAILING
-            cron_job.save()
-            CronJobStatusTransition.objects.create(
-                parent=cron_job,
-                old_value=CronJob.Status.NEW,
-                new_value=CronJob.Status.FAILING,
+        status = limits.failure_status(e, guard)
+        error = limits.describe(e, guard)
+        logger.error(f"Cron job error: {cron_name} - {error}", exc_info=True)
+        report_exception(e)
+
+        now = timezone.now()
+        cron = REGISTERED_CRON_JOBS.get(cron_name)
+        queue_name = cron.queue if cron is not None else "default"
+        duration = meter.usage.wall_time if meter.usage else None
+        if cron is not None and attempt < cron.tries:
+            metrics.record_run(
+                cron_name, queue_name, CronJobRun.Status.RETRYING, duration
             )
+            if cron_job is not None:
+                CronJobRun.objects.filter(pk=run_id).update(
+                    status=CronJobRun.Status.RETRYING,
+                    error=error,
+                    modification_date=now,
+                    **meter.fields(),
+                )
+            retry_later(cron, attempt, run_id)
+            return
+
+        metrics.record_run(cron_name, queue_name, status, duration)
+        if cron_job is None:
+            buffer.push_run(
+                cron_name,
+                status,
+                start,
+                error=error,
+                run_id=run_id,
+                attempts=attempt,
+                usage=meter.usage,
+            )
+            return
+
+        CronJobRun.objects.filter(pk=run_id).update(
+            status=status,
+            error=error,
+            modification_date=now,
+            **meter.fields(),
+        )
+        rollups.record_run(cron_job.pk, now.date(), True, duration)
+        transition_status(cron_job.pk, cron_job.status, CronJob.Status.FAILING, now)
         return
 
+    if cron.fan_out is not None:
+        logger.info(f"Cron job fanned out: {cron_name}")
+        if complete:
+            finish_fan_out(cron, run_id, fanout.finished(cron, str(run_id), attempt))
+        return
+    if child_usage is not None:
+        # The work happened in the child; only the wall time is the worker's.
+        meter.usage = child_usage._replace(wall_time=meter.usage.wall_time)
+
     end = timezone.now()
-    run.status = CronJobRun.Status.SUCCEEDED
-    run.completion_date = end
-    run.save()
     logger.info(
-        f"Cron job finished: {cron_job.name} - Processing time: {(end - start).total_seconds()}s"
-    )
-    cron_job.latest_run_date = end
-    if cron_job.status != CronJob.Status.SUCCEEDING:
-        original_status = cron_job.status
-        cron_job.latest_status_change = timezone.now()
-        cron_job.status = CronJob.Status.SUCCEEDING
-        CronJobStatusTransition.objects.create(
-            parent=cron_job,
-            old_value=original_status,
-            new_value=CronJob.Status.SUCCEEDING,
+        f"Cron job finished: {cron_name} - Processing time: {(end - start).total_seconds()}s"
+        f" - CPU time: {meter.usage.cpu_user + meter.usage.cpu_system:.3f}s"
+    )
+    metrics.record_run(
+        cron_name, cron.queue, CronJobRun.Status.SUCCEEDED, meter.usage.wall_time
+    )
+    if cron_job is None:
+        buffer.push_run(
+            cron_name,
+            CronJobRun.Status.SUCCEEDED,
+            start,
+            completion_date=end,
+            cadence=cron.cadence,
+            description=cron.description,
+            run_id=run_id,
+            attempts=attempt,
+            usage=meter.usage,
         )
-    cron_job.cadence = cron.cadence
-    cron_job.description = cron.description
-    cron_job.save()
+        return
+
+    CronJobRun.objects.filter(pk=run_id).update(
+        status=CronJobRun.Status.SUCCEEDED,
+        completion_date=end,
+        modification_date=end,
+        **meter.fields(),
+    )
+    rollups.record_run(cron_job.pk, end.date(), False, meter.usage.wall_time)
+    transition_status(
+        cron_job.pk,
+        cron_job.status,
+        CronJob.Status.SUCCEEDING,
+        end,
+        latest_run_date=end,
+        cadence=cron.cadence,
+        description=cron.description,
+    )
 
     # If there are any previous instances of this cron job that are still in progress,
     # we need to clean them up.
     CronJobRun.objects.filter(
         cron_job=cron_job, status=CronJobRun.Status.IN_PROGRESS
-    ).exclude(id=run.id).delete()
+    ).exclude(id=run_id).delete()
+
+
+def run_chunk(cron_name: str, run_id: str, index: int, items: list, attempt: int = 1):
+    """Run one chunk of a fanned-out cron job, recording the run if it was the last."""
+    cron = get_cron(cron_name)
+    error = None
+    try:
+        cron.fan_out(items)
+    except Exception as e:
+        logger.error(f"Cron job chunk error: {cron_name} #{index} - {e}", exc_info=True)
+        report_exception(e)
+        error = e
+    progress = fanout.record_chunk(cron, run_id, attempt, error)
+    if progress is not None:
+        finish_fan_out(cron, run_id, progress)
+
+
+def finish_fan_out(cron: RegisteredCronJob, run_id, progress: fanout.Progress):
+    """Record a fanned-out run once every one of its chunks has finished."""
+    end = timezone.now()
+    failed = progress.failed > 0
+    status = CronJobRun.Status.FAILED if failed else CronJobRun.Status.SUCCEEDED
+    error = (
+        f"{progress.failed} of {progress.chunks} chunks failed, first: {progress.error}"
+        if failed
+        else ""
+    )
+    wall_time = (end - progress.started).total_seconds()
+    logger.info(
+        f"Cron job finished: {cron.name} - {progress.chunks} chunks, "
+        f"{progress.failed} failed - Processing time: {wall_time}s"
+    )
+    metrics.record_run(cron.name, cron.queue, status, wall_time)
+    fanout.forget(cron, run_id, progress.attempt)
+
+    completion_date = None if failed else end
+    if buffer.buffers(cron.name):
+        buffer.push_run(
+            cron.name,
+            status,
+            progress.started,
+            completion_date=completion_date,
+            error=error,
+            cadence=cron.cadence,
+            description=cron.description,
+            run_id=run_id,
+            attempts=progress.attempt,
+            usage=ResourceUsage(wall_time, None, None, None, None),
+        )
+        return
+
+    cron_job = CronJob.objects.get(name=cron.name)
+    CronJobRun.objects.filter(pk=run_id).update(
+        status=status,
+        completion_date=completion_date,
+        modification_date=end,
+        error=error,
+        wall_time=wall_time,
+        data={"chunks": progress.chunks, "failed_chunks": progress.failed},
+    )
+    rollups.record_run(cron_job.pk, end.date(), failed, wall_time)
+    if failed:
+        transition_status(cron_job.pk, cron_job.status, CronJob.Status.FAILING, end)
+    else:
+        transition_status(
+            cron_job.pk,
+            cron_job.status,
+            CronJob.Status.SUCCEEDING,
+            end,
+            latest_run_date=end,
+            cadence=cron.cadence,
+            description=cron.description,
+        )
+
+
+def report_exception(e: Exception):
+    try:
+        # Try to log to Sentry if it's available
+        import sentry_sdk
+
+        sentry_sdk.capture_exception(e)
+    except ImportError:
+        pass
+
+
+def get_job_timeout(cron: RegisteredCronJob) -> typing.Optional[int]:
+    """The rq job timeout for a cron's runs, or None for the queue's default."""
+    if cron.asynchronous:
+        # Leave the cron time to be cancelled and recorded.
+        return math.ceil(get_timeout(cron)) + 60
+    if cron.timeout is None:
+        return None
+    return math.ceil(cron.timeout)
+
+
+def get_timeout(cron: RegisteredCronJob) -> float:
+    """How many seconds an async cron may run before it is cancelled."""
+    if cron.timeout is not None:
+        return cron.timeout
+    return getattr(settings, "DJANGO_RQ_CRON_ASYNC_TIMEOUT", 300)
+
 
+async def await_cron(cron: RegisteredCronJob):
+    """Await an async cron's function, cancelling it once it runs out of time."""
+    timeout = get_timeout(cron)
+    try:
+        return await asyncio.wait_for(cron.function(), timeout)
+    except asyncio.TimeoutError:
+        raise limits.TimedOut(f"Timed out after {timeout}s") from None
+
+
+def call_cron(cron: RegisteredCronJob, run_id=None):
+    """
+    Call a cron's function, on an event loop of its own if it's a coroutine function.
 
-def enqueue_next_run(cadence: CronJob.Cadence, queue_name: str = "default"):
-    """Schedule the next run of all cron jobs with the given cadence."""
-    crontab_string = next(
-        (
-            crontab_string
-            for crontab_string, c in CRON_TAB_STRING_TO_CADENCE.items()
-            if c == cadence
-        ),
-        None,
+    Given the run it belongs to, the function can checkpoint its progress; see
+    `django_rq_cron.checkpoints`. Returns whatever the function returned.
+    """
+    token = checkpoints.current_run.set(
+        checkpoints.Run(cron.name, str(run_id)) if run_id else None
     )
-    if crontab_string is None:
-        raise ValueError(f"No crontab string found for cadence: {cadence}")
+    try:
+        if inspect.iscoroutinefunction(cron.function):
+            return asyncio.run(await_cron(cron))
+        return cron.function()
+    finally:
+        checkpoints.current_run.reset(token)
+
+
+def start_run(cron_job: CronJob, attempt: int, run_id=None):
+    """
+    Mark a run as in progress, returning its id.
+
+    Retries pick up the run row of their first attempt, so every attempt of a run
+    shares one row; it is only recreated if it has been deleted in the meantime.
+    """
+    if run_id is not None:
+        updated = CronJobRun.objects.filter(pk=run_id).update(
+            status=CronJobRun.Status.IN_PROGRESS,
+            attempts=attempt,
+            modification_date=timezone.now(),
+        )
+        if updated:
+            return run_id
+    return CronJobRun.objects.create(
+        id=run_id or uuid.uuid4(),
+        cron_job=cron_job,
+        status=CronJobRun.Status.IN_PROGRESS,
+        attempts=attempt,
+    ).pk
+
+
+def retry_later(cron: RegisteredCronJob, attempt: int, run_id):
+    """
+    Schedule the next attempt of a failed run after its backoff delay.
+
+    The retry goes through rq's scheduled registry rather than sleeping, so the
+    worker is free in the meantime.
+    """
+    delay = cron.backoff[min(attempt, len(cron.backoff)) - 1] if cron.backoff else 0
+    logger.info(
+        f"Cron job will retry: {cron.name} - attempt {attempt + 1} of {cron.tries} in {delay}s"
+    )
+    get_queue(cron.queue).enqueue_in(
+        timedelta(seconds=delay),
+        run_cron,
+        cron.name,
+        attempt + 1,
+        str(run_id),
+        job_timeout=get_job_timeout(cron),
+    )
+
+
+async def await_crons(
+    crons: typing.Sequence[RegisteredCronJob],
+) -> typing.List[typing.Tuple[typing.Optional[Exception], float]]:
+    """Await async crons concurrently, returning each one's exception (if any) and wall time."""
+
+    async def measure(cron):
+        start = perf_counter()
+        try:
+            await await_cron(cron)
+        except Exception as e:
+            logger.error(f"Cron job error: {cron.name} - {e}", exc_info=True)
+            report_exception(e)
+            return e, perf_counter() - start
+        return None, perf_counter() - start
+
+    return await asyncio.gather(*(measure(cron) for cron in crons))
+
+
+def run_async_crons(cron_names: typing.Sequence[str]):
+    """
+    Run async cron jobs concurrently on one event loop, then record them all at once.
+
+    Each cron has its own timeout, and one failing doesn't affect the others. The
+    runs are written in a single transaction with `buffer.write_runs` rather than
+    one by one. Only wall time is measured, since the crons share the process.
+    Failed runs with tries left are retried one at a time through `run_cron`.
+    """
+    crons = []
+    for cron_name in cron_names:
+        try:
+            crons.append(get_cron(cron_name))
+        except KeyError:
+            logger.error(f"Cron job not found: {cron_name}")
+    logger.info(f"Async cron jobs started: {', '.join(cron.name for cron in crons)}")
+
+    start = timezone.now()
+    outcomes = asyncio.run(await_crons(crons))
+    end = timezone.now()
 
-    # Only enqueue a run if there isn't already a run scheduled for this cadence at the exact time.
-    scheduled_time = get_next_scheduled_time(crontab_string)
-    job_id = f"cron-{cadence}-{scheduled_time}"
+    records, retries = [], []
+    for cron, (error, wall_time) in zip(crons, outcomes):
+        run_id = str(uuid.uuid4())
+        if error is None:
+            status = CronJobRun.Status.SUCCEEDED
+        elif cron.tries > 1:
+            status = CronJobRun.Status.RETRYING
+            retries.append((cron, run_id))
+        else:
+            status = limits.failure_status(error)
+        metrics.record_run(cron.name, cron.queue, status, wall_time)
+        records.append(
+            {
+                "id": run_id,
+                "cron_job": cron.name,
+                "status": status,
+                "creation_date": start,
+                "completion_date": end if error is None else None,
+                "error": str(error) if error else "",
+                "attempts": 1,
+                "cadence": cron.cadence,
+                "description": cron.description,
+                **dict.fromkeys(ResourceUsage._fields),
+                "wall_time": wall_time,
+            }
+        )
+    if records:
+        buffer.write_runs(records)
+    for cron, run_id in retries:
+        retry_later(cron, 1, run_id)
     logger.info(
-        f"Scheduling next cron run: cadence={cadence}, scheduled_time={scheduled_time}, job_id={job_id}"
+        f"Async cron jobs finished: {len(records)} in {(end - start).total_seconds()}s"
+    )
+
+
+# How far ahead to look for upcoming ticks. Leap days make for the longest gaps.
+HORIZON_LIMIT = timedelta(days=366 * 8)
+
+
+def get_horizon() -> typing.Tuple[int, int]:
+    """
+    How many upcoming ticks of each schedule to keep scheduled, and how many of
+    them may pass before the schedule is topped up again.
+    """
+    ticks = max(1, getattr(settings, "DJANGO_RQ_CRON_HORIZON", 1))
+    refill = getattr(settings, "DJANGO_RQ_CRON_HORIZON_REFILL", None) or max(
+        1, ticks // 2
     )
-    return django_rq.get_queue(queue_name).enqueue_at(
+    return ticks, min(refill, ticks)
+
+
+def chain_job_id(crontab_string: str, scheduled_time: datetime) -> str:
+    return f"cron-{chain_label(crontab_string)}-{scheduled_time:%Y%m%d%H%M%S}"
+
+
+# Ticks scheduled by earlier versions, e.g. "cron-hourly-2026-01-05 10:00:00+00:00".
+# Current rq rejects these ids, so they can't be kept for the built-in cadences.
+LEGACY_JOB_ID = re.compile(
+    rf"cron-({'|'.join(CronJob.Cadence.values)})-\d{{4}}-\d{{2}}-\d{{2}} "
+)
+
+
+def cancel_legacy_runs() -> int:
+    """
+    Unschedule the ticks earlier versions scheduled under their own job ids.
+
+    Left alone, they would fire alongside the chains started under the current
+    ids and run each schedule twice. Returns how many were cancelled.
+    """
+    cancelled = 0
+    for queue_name in QUEUES:
+        queue = get_queue(queue_name)
+        key = ScheduledJobRegistry(queue=queue).key
+        job_ids = [
+            job_id.decode()
+            for job_id in queue.connection.zrange(key, 0, -1)
+            if LEGACY_JOB_ID.match(job_id.decode())
+        ]
+        if not job_ids:
+            continue
+        with queue.connection.pipeline() as pipeline:
+            pipeline.zrem(key, *job_ids)
+            pipeline.delete(*(Job.key_for(job_id) for job_id in job_ids))
+            pipeline.execute()
+        logger.info(f"Cancelled legacy cron runs: queue={queue_name}, {job_ids}")
+        cancelled += len(job_ids)
+    return cancelled
+
+
+def enqueue_next_run(cadence: str, queue_name: str = "default"):
+    """
+    Schedule the next run of all cron jobs that share the schedule of `cadence`.
+
+    `cadence` can be a cadence name or a crontab expression; either way there is at
+    most one scheduled job per distinct expression and time. With a
+    `DJANGO_RQ_CRON_HORIZON`, the whole horizon is scheduled and its first job
+    returned.
+    """
+    crontab_string = resolve_crontab(cadence)
+    if get_horizon()[0] > 1:
+        jobs = schedule_horizon(crontab_string, queue_name)
+        return jobs[0] if jobs else None
+
+    # Only enqueue a run if there isn't already a run scheduled for this schedule at the exact time.
+    scheduled_time = get_next_scheduled_time(crontab_string, timezone.now())
+    job_id = chain_job_id(crontab_string, scheduled_time)
+    logger.info(
+        f"Scheduling next cron run: crontab={crontab_string}, scheduled_time={scheduled_time}, job_id={job_id}"
+    )
+    return get_queue(queue_name).enqueue_at(
         scheduled_time,
         run_crons,
         job_id=job_id,
-        args=(cadence, queue_name),
+        args=(crontab_string, queue_name),
     )
 
 
-def run_crons(cadence: CronJob.Cadence, default_queue: str = "default"):
-    """Run all cron jobs with the given cadence."""
-    relevant_crons = crons_for_cadence(cadence)
-    for cron in relevant_crons:
-        # Note that we enqueue the name and not the cron itself to cut down on
-        # the amount of data we need to serialize.
-        queue = django_rq.get_queue(cron.queue)
-        queue.enqueue(run_cron, cron.name)
-    enqueue_next_run(cadence, default_queue)
+def schedule_horizon(
+    cadence: str,
+    queue_name: str = "default",
+    after: typing.Optional[datetime] = None,
+) -> list:
+    """
+    Schedule the next `DJANGO_RQ_CRON_HORIZON` runs of a schedule in one pipeline.
+
+    Only ticks after `after` are scheduled, so topping up a horizon leaves the
+    ticks already in it alone. Returns the jobs scheduled.
+    """
+    crontab_string = resolve_crontab(cadence)
+    ticks, _ = get_horizon()
+    now = timezone.now()
+    upcoming = [
+        scheduled_time
+        for scheduled_time in itertools.islice(
+            iter_fire_times(crontab_string, now, now + HORIZON_LIMIT), ticks
+        )
+        if after is None or scheduled_time > after
+    ]
+    if not upcoming:
+        return []
 
+    logger.info(
+        f"Scheduling cron runs: crontab={crontab_string}, "
+        f"from={upcoming[0]}, to={upcoming[-1]}, count={len(upcoming)}"
+    )
+    queue = get_queue(queue_name)
+    with queue.connection.pipeline() as pipeline:
+        jobs = [
+            queue.enqueue_at(
+                scheduled_time,
+                run_crons,
+                job_id=chain_job_id(crontab_string, scheduled_time),
+                args=(crontab_string, queue_name),
+                pipeline=pipeline,
+            )
+            for scheduled_time in upcoming
+        ]
+        pipeline.execute()
+    watchdog.set_horizon(crontab_string, upcoming[-1])
+    return jobs
 
-HOURLY_CRON_TAB = "0 * * * *"
-TEN_MINUTES_CRON_TAB = "*/10 * * * *"
-DAILY_CRON_TAB = "0 20 * * *"
-EVERY_MINUTE_CRON_TAB = "* * * * *"
-WEEKLY_CRON_TAB = "0 0 * * 1"
-MONTHLY_CRON_TAB = "0 0 1 * *"
 
-CRON_TAB_STRING_TO_CADENCE = {
-    HOURLY_CRON_TAB: CronJob.Cadence.HOURLY,
-    TEN_MINUTES_CRON_TAB: CronJob.Cadence.EVERY_TEN_MINUTES,
-    DAILY_CRON_TAB: CronJob.Cadence.DAILY,
-    EVERY_MINUTE_CRON_TAB: CronJob.Cadence.EVERY_MINUTE,
-    WEEKLY_CRON_TAB: CronJob.Cadence.WEEKLY,
-    MONTHLY_CRON_TAB: CronJob.Cadence.MONTHLY,
-}
+def get_spread(cron: RegisteredCronJob) -> int:
+    """How many seconds after each tick a cron's runs may be spread over."""
+    if cron.spread is not None:
+        return cron.spread
+    return getattr(settings, "DJANGO_RQ_CRON_SPREAD", 0)
+
+
+def dispatch(
+    crons_by_queue: typing.Mapping[str, Iterable[RegisteredCronJob]],
+    tick: typing.Optional[datetime] = None,
+    period: typing.Optional[float] = None,
+) -> list:
+    """
+    Enqueue a run of each cron, given a mapping of queue name to crons.
+
+    Queues are grouped by the Redis connection behind them, so each connection gets
+    a single pipeline no matter how many crons are due.
+
+    Given the `tick` being dispatched, crons with a spread are scheduled for their
+    offset after it instead (within `period`, the time until the next tick), on
+    the same pipeline. Offsets that have already passed are enqueued right away.
+
+    With `DJANGO_RQ_CRON_ASYNC_BATCH` enabled, the async crons enqueued right away
+    on a queue share one `run_async_crons` job, unless they restrict overlapping,
+    run in a child process or have a memory limit.
+    """
+    now = timezone.now()
+    batch_async = getattr(settings, "DJANGO_RQ_CRON_ASYNC_BATCH", False)
+    batches = defaultdict(dict)
+    for queue_name, crons in crons_by_queue.items():
+        queue = get_queue(queue_name)
+        job_datas, delayed, concurrent = [], [], []
+        for cron in crons:
+            if tick is not None:
+                window = get_spread(cron)
+                if period is not None:
+                    window = min(window, period)
+                scheduled_time = tick + timedelta(
+                    seconds=spread_offset(cron.name, window)
+                )
+                if scheduled_time > now:
+                    delayed.append((scheduled_time, cron))
+                    continue
+            if (
+                batch_async
+                and cron.asynchronous
+                and cron.overlap == Overlap.ALLOW
+                and cron.executor == Executor.INLINE
+                and cron.memory_limit is None
+            ):
+                concurrent.append(cron)
+                continue
+            # Note that we enqueue the name and not the cron itself to cut down on
+            # the amount of data we need to serialize.
+            job_datas.append(
+                Queue.prepare_data(
+                    run_cron, args=(cron.name,), timeout=get_job_timeout(cron)
+                )
+            )
+        if concurrent:
+            job_datas.append(
+                Queue.prepare_data(
+                    run_async_crons,
+                    args=([cron.name for cron in concurrent],),
+                    timeout=max(get_job_timeout(cron) for cron in concurrent),
+                )
+            )
+        batches[id(queue.connection)][queue_name] = (job_datas, delayed)
+
+    jobs = []
+    for queues in batches.values():
+        connection = get_queue(next(iter(queues))).connection
+        with connection.pipeline() as pipeline:
+            for queue_name, (job_datas, delayed) in queues.items():
+                queue = get_queue(queue_name)
+                jobs.extend(queue.enqueue_many(job_datas, pipeline=pipeline))
+                for scheduled_time, cron in delayed:
+                    jobs.append(
+                        queue.enqueue_at(
+                            scheduled_time,
+                            run_cron,
+                            cron.name,
+                            job_timeout=get_job_timeout(cron),
+                            pipeline=pipeline,
+                        )
+                    )
+            pipeline.execute()
+    return jobs
+
+
+def run_crons(cadence: str, default_queue: str = "default"):
+    """
+    Run all cron jobs that share the schedule of a given cadence.
+
+    Then schedule the next tick, or, with a `DJANGO_RQ_CRON_HORIZON`, top the
+    horizon up once `DJANGO_RQ_CRON_HORIZON_REFILL` of its ticks have passed.
+    """
+    crontab_string = resolve_crontab(cadence)
+    now = timezone.now()
+    tick, period = get_tick(crontab_string, now)
+    horizon_end = watchdog.beat(crontab_string, tick, default_queue)
+    jobs = dispatch(get_schedule().jobs.get(crontab_string, {}), tick, period)
+    metrics.record_dispatch(Counter(job.origin for job in jobs))
+
+    ticks, refill = get_horizon()
+    if ticks == 1:
+        enqueue_next_run(crontab_string, default_queue)
+        return
+    remaining = (
+        sum(1 for _ in iter_fire_times(crontab_string, now, horizon_end))
+        if horizon_end
+        else 0
+    )
+    if remaining <= ticks - refill:
+        schedule_horizon(crontab_string, default_queue, after=horizon_end)
 
 
 def bootstrap(default_queue: str = "default"):
-    """Bootstrap all cron jobs by scheduling the first run of each cadence."""
-    return [
-        enqueue_next_run(cadence, default_queue)
-        for cadence in CRON_TAB_STRING_TO_CADENCE.values()
-    ]
+    """
+    Bootstrap all cron jobs by scheduling the first run of each distinct schedule.
+
+    Ticks scheduled under the job ids of earlier versions are cancelled first.
+    """
+    cancel_legacy_runs()
+    now = timezone.now()
+    jobs = []
+    for crontab_string in get_schedule().jobs:
+        jobs.append(enqueue_next_run(crontab_string, default_queue))
+        watchdog.beat(crontab_string, now, default_queue)
+    return jobs
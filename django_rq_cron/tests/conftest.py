@@ -30,3 +30,55 @@ def django_db_setup(django_db_blocker):
 def setup_django_db(db):
     """Fixture to ensure the database is set up and migrations are applied."""
     pass
+
+
+@pytest.fixture
+def fake_redis():
+    """Point every queue at a single in-memory Redis for the duration of a test."""
+    import fakeredis
+    from unittest.mock import patch
+
+    from django_rq_cron import queues
+
+    connection = fakeredis.FakeRedis()
+    queues.clear_cache()
+    with patch.object(queues, "get_redis_connection", return_value=connection):
+        yield connection
+    queues.clear_cache()
+
+
+def fail():
+    raise Exception("This is a test exception")
+
+
+@pytest.fixture
+def register():
+    """
+    Register cron jobs for the duration of a test.
+
+    `register(name, function, **kwargs)` registers an hourly cron and rebuilds
+    the schedule. Afterwards, the registry and the schedule are put back as they
+    were, so nothing a test registers (or clears) leaks into the next one.
+    """
+    from django_rq_cron.models import CronJob
+    from django_rq_cron.registry import (
+        REGISTERED_CRON_JOBS,
+        RegisteredCronJob,
+        build_schedule,
+    )
+
+    registered = dict(REGISTERED_CRON_JOBS)
+
+    def register(name, function=None, **kwargs):
+        kwargs.setdefault("cadence", CronJob.Cadence.HOURLY)
+        kwargs.setdefault("description", "")
+        REGISTERED_CRON_JOBS[name] = RegisteredCronJob(
+            name=name, function=function, **kwargs
+        )
+        build_schedule()
+        return REGISTERED_CRON_JOBS[name]
+
+    yield register
+    REGISTERED_CRON_JOBS.clear()
+    REGISTERED_CRON_JOBS.update(registered)
+    build_schedule()
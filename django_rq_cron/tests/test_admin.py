@@ -0,0 +1,153 @@
+import uuid
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from django_rq_cron.models import CronJob, CronJobRun
+
+
+def add_runs(cron_job, count):
+    CronJobRun.objects.bulk_create(
+        [
+            CronJobRun(cron_job=cron_job, status=CronJobRun.Status.SUCCEEDED)
+            for _ in range(count)
+        ]
+    )
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries), response
+
+
+@pytest.mark.django_db
+def test_admin_query_counts_dont_grow_with_history(admin_client):
+    cron_job = CronJob.objects.create(name="test_admin")
+    other = CronJob.objects.create(name="test_admin_other")
+    change_url = reverse("admin:django_rq_cron_cronjob_change", args=(cron_job.pk,))
+    runs_url = reverse("admin:django_rq_cron_cronjobrun_changelist")
+
+    add_runs(cron_job, 5)
+    add_runs(other, 5)
+    # Warm up caches, such as content types, that only cost queries once.
+    admin_client.get(change_url)
+    admin_client.get(runs_url)
+    few_change, _ = count_queries(admin_client, change_url)
+    few_runs, _ = count_queries(admin_client, runs_url)
+
+    add_runs(cron_job, 150)
+    add_runs(other, 150)
+    many_change, response = count_queries(admin_client, change_url)
+    many_runs, _ = count_queries(admin_client, runs_url)
+
+    assert many_change == few_change
+    assert many_runs == few_runs
+    # Only the latest runs are rendered inline, with a link to the rest.
+    assert response.content.decode().count('name="runs-') < 200
+    assert f"?cron_job__id__exact={cron_job.pk}" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_run_changelist_filters_by_job_without_listing_every_job(admin_client):
+    cron_job = CronJob.objects.create(name="test_admin_filtered")
+    add_runs(cron_job, 3)
+    add_runs(CronJob.objects.create(name="test_admin_unfiltered"), 2)
+    runs_url = reverse("admin:django_rq_cron_cronjobrun_changelist")
+    admin_client.get(runs_url)
+    few_jobs, _ = count_queries(admin_client, runs_url)
+
+    CronJob.objects.bulk_create(
+        CronJob(name=f"test_admin_job_{i:03}") for i in range(100)
+    )
+    many_jobs, response = count_queries(admin_client, runs_url)
+    assert many_jobs == few_jobs
+    assert "test_admin_job_" not in response.content.decode()
+
+    response = admin_client.get(runs_url, {"cron_job__id__exact": cron_job.pk})
+    assert response.status_code == 200
+    assert response.context["cl"].result_count == 3
+    content = response.content.decode()
+    assert "test_admin_filtered" in content
+    assert "test_admin_unfiltered" not in content
+
+    # A job that's gone has no runs to show, rather than everyone's.
+    response = admin_client.get(runs_url, {"cron_job__id__exact": uuid.uuid4()})
+    assert response.context["cl"].result_count == 0
+
+    # A malformed job id is reported like any other bad lookup, not a crash.
+    response = admin_client.get(runs_url, {"cron_job__id__exact": "nope"})
+    assert response.status_code == 302
+    assert response.url.endswith("?e=1")
+
+
+@pytest.mark.django_db
+def test_run_changelist_sorts_by_processing_time(admin_client):
+    cron_job = CronJob.objects.create(name="test_admin_sort")
+    add_runs(cron_job, 3)
+
+    response = admin_client.get(
+        reverse("admin:django_rq_cron_cronjobrun_changelist"), {"o": "5"}
+    )
+
+    assert response.status_code == 200
+    assert "processing_time" in str(response.context["cl"].queryset.query.order_by)
+
+
+@pytest.mark.django_db
+def test_rollup_changelist(admin_client):
+    from datetime import date
+
+    from django_rq_cron import rollups
+
+    cron_job = CronJob.objects.create(name="test_admin_rollup")
+    rollups.record_runs(
+        cron_job.pk, date(2026, 1, 1), rollups.Delta.of([(False, 2.0), (True, 0.2)])
+    )
+
+    response = admin_client.get(
+        reverse("admin:django_rq_cron_cronjobdailyrollup_changelist")
+    )
+
+    assert response.status_code == 200
+    assert "50.0%" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_jobs_with_any_cadence_can_be_listed_filtered_and_saved(admin_client):
+    cron_job = CronJob.objects.create(
+        name="test_admin_weekdays", cadence="0 9 * * mon-fri"
+    )
+    CronJob.objects.create(name="test_admin_hourly", cadence=CronJob.Cadence.HOURLY)
+    changelist_url = reverse("admin:django_rq_cron_cronjob_changelist")
+
+    response = admin_client.get(changelist_url, {"cadence": "0 9 * * mon-fri"})
+
+    assert response.status_code == 200
+    assert [job.name for job in response.context["cl"].result_list] == [
+        "test_admin_weekdays"
+    ]
+    content = response.content.decode()
+    assert "0 9 * * mon-fri" in content
+    assert "Hourly" in content
+
+    response = admin_client.post(
+        reverse("admin:django_rq_cron_cronjob_change", args=(cron_job.pk,)),
+        {
+            "name": cron_job.name,
+            "description": "Weekday mornings",
+            "cadence": cron_job.cadence,
+            "status": cron_job.status,
+            "runs-TOTAL_FORMS": "0",
+            "runs-INITIAL_FORMS": "0",
+            "status_transitions-TOTAL_FORMS": "0",
+            "status_transitions-INITIAL_FORMS": "0",
+        },
+    )
+
+    assert response.status_code == 302
+    cron_job.refresh_from_db()
+    assert cron_job.description == "Weekday mornings"
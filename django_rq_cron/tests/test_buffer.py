@@ -0,0 +1,148 @@
+import pytest
+
+from django_rq_cron import buffer
+from django_rq_cron.models import CronJob, CronJobRun, CronJobStatusTransition
+from django_rq_cron.runner import run_cron
+from django_rq_cron.tests.conftest import fail
+
+
+def succeed():
+    pass
+
+
+@pytest.fixture
+def buffered(settings, fake_redis):
+    settings.DJANGO_RQ_CRON_BUFFER_RUNS = True
+    settings.DJANGO_RQ_CRON_BUFFER_SIZE = 3
+    return fake_redis
+
+
+@pytest.mark.django_db
+def test_buffered_runs_are_flushed_in_batches(
+    setup_django_db, buffered, register, django_assert_num_queries
+):
+    register("test_buffered", succeed, cadence=CronJob.Cadence.EVERY_MINUTE)
+
+    with django_assert_num_queries(0):
+        run_cron("test_buffered")
+        run_cron("test_buffered")
+    assert buffered.llen(buffer.BUFFER_KEY) == 2
+
+    # The third run fills the buffer and flushes it.
+    run_cron("test_buffered")
+    assert buffered.llen(buffer.BUFFER_KEY) == 0
+
+    cron_job = CronJob.objects.get(name="test_buffered")
+    assert cron_job.status == CronJob.Status.SUCCEEDING
+    assert cron_job.cadence == CronJob.Cadence.EVERY_MINUTE
+    assert (
+        cron_job.latest_run_date
+        == cron_job.runs.latest("creation_date").completion_date
+    )
+    assert cron_job.runs.filter(status=CronJobRun.Status.SUCCEEDED).count() == 3
+    assert cron_job.status_transitions.count() == 1
+    assert cron_job.daily_rollups.get().runs == 3
+
+    # Writing a batch again doesn't count its runs twice.
+    buffer.write_runs(
+        [
+            {
+                "id": str(run.pk),
+                "cron_job": "test_buffered",
+                "status": run.status,
+                "creation_date": run.creation_date,
+                "completion_date": run.completion_date,
+                "error": "",
+                "attempts": 1,
+                "cadence": CronJob.Cadence.EVERY_MINUTE,
+                "description": "",
+                "wall_time": run.wall_time,
+                "cpu_user": None,
+                "cpu_system": None,
+                "rss_delta": None,
+                "gc_collections": None,
+            }
+            for run in cron_job.runs.all()
+        ]
+    )
+    assert cron_job.daily_rollups.get().runs == 3
+
+
+@pytest.mark.django_db
+def test_failures_are_flushed_immediately(setup_django_db, buffered, register):
+    register("test_buffered_failure", succeed)
+    run_cron("test_buffered_failure")
+    register("test_buffered_failure", fail)
+    run_cron("test_buffered_failure")
+
+    cron_job = CronJob.objects.get(name="test_buffered_failure")
+    assert cron_job.status == CronJob.Status.FAILING
+    assert list(
+        CronJobStatusTransition.objects.filter(parent=cron_job)
+        .order_by("creation_date")
+        .values_list("old_value", "new_value")
+    ) == [
+        (CronJob.Status.NEW, CronJob.Status.SUCCEEDING),
+        (CronJob.Status.SUCCEEDING, CronJob.Status.FAILING),
+    ]
+    assert cron_job.runs.get(status=CronJobRun.Status.FAILED).error == (
+        "This is a test exception"
+    )
+
+
+@pytest.mark.django_db
+def test_writing_a_batch_twice_does_not_duplicate_runs(
+    setup_django_db, buffered, register
+):
+    register("test_buffered_twice", succeed)
+    run_cron("test_buffered_twice")
+    records = [
+        buffer.deserialize(raw) for raw in buffered.lrange(buffer.BUFFER_KEY, 0, -1)
+    ]
+
+    # As if a flush died after committing but before trimming the buffer.
+    buffer.write_runs(records)
+    assert buffer.flush_runs() == 1
+
+    run = CronJobRun.objects.get(cron_job__name="test_buffered_twice")
+    assert run.creation_date == records[0]["creation_date"]
+
+
+@pytest.mark.django_db
+def test_the_flush_cron_is_not_buffered(setup_django_db, buffered, register):
+    from django_rq_cron.crons.flush_run_buffer import do
+
+    register("test_buffered_first", succeed)
+    run_cron("test_buffered_first")
+    register(buffer.FLUSH_CRON, do, cadence=CronJob.Cadence.EVERY_MINUTE)
+
+    run_cron(buffer.FLUSH_CRON)
+
+    # It drained the buffer without leaving its own run in it.
+    assert buffered.llen(buffer.BUFFER_KEY) == 0
+    assert CronJobRun.objects.filter(cron_job__name="test_buffered_first").exists()
+    flush = CronJobRun.objects.get(cron_job__name=buffer.FLUSH_CRON)
+    assert flush.status == CronJobRun.Status.SUCCEEDED
+
+
+@pytest.mark.django_db
+def test_a_flush_that_loses_its_lock_leaves_the_batch(
+    setup_django_db, buffered, register, monkeypatch
+):
+    register("test_buffered_lock", succeed)
+    run_cron("test_buffered_lock")
+    write_runs = buffer.write_runs
+
+    def write_runs_slowly(records):
+        write_runs(records)
+        # As if the lock expired while the batch was being written.
+        buffered.delete(buffer.LOCK_KEY)
+
+    monkeypatch.setattr(buffer, "write_runs", write_runs_slowly)
+
+    assert buffer.flush_runs() == 0
+    assert buffered.llen(buffer.BUFFER_KEY) == 1
+
+    monkeypatch.setattr(buffer, "write_runs", write_runs)
+    assert buffer.flush_runs() == 1
+    assert CronJobRun.objects.filter(cron_job__name="test_buffered_lock").count() == 1
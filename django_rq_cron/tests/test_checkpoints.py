@@ -0,0 +1,157 @@
+import json
+
+import pytest
+
+from django_rq_cron.checkpoints import CURSOR_KEY, iterate
+from django_rq_cron.models import CronJob, CronJobRun
+from django_rq_cron.runner import run_cron
+
+SEEN = []
+FAIL_AFTER = {"chunks": None}
+
+
+def mark_items():
+    items = CronJob.objects.filter(name__startswith="test_item_")
+    for i, chunk in enumerate(
+        iterate(items, chunk_size=10, update_fields=["description"])
+    ):
+        if i == FAIL_AFTER["chunks"]:
+            raise Exception("Worker went away")
+        for item in chunk:
+            item.description = "done"
+            SEEN.append(item.name)
+
+
+@pytest.fixture
+def items(setup_django_db, register):
+    CronJob.objects.bulk_create(CronJob(name=f"test_item_{i:02}") for i in range(30))
+    SEEN.clear()
+    register("test_checkpointed", mark_items, tries=2)
+    return CronJob.objects.filter(name__startswith="test_item_").order_by("pk")
+
+
+def runs():
+    return CronJobRun.objects.filter(cron_job__name="test_checkpointed").order_by(
+        "creation_date"
+    )
+
+
+@pytest.mark.django_db
+def test_next_run_resumes_after_a_failure(items, fake_redis):
+    FAIL_AFTER["chunks"] = 2
+    pks = list(items.values_list("pk", flat=True))
+
+    # On its last try, so it fails for good rather than being retried.
+    run_cron("test_checkpointed", attempt=2)
+
+    (failed,) = runs()
+    assert failed.status == CronJobRun.Status.FAILED
+    assert failed.data == {"cursors": {"django_rq_cron.cronjob": str(pks[19])}}
+    assert items.filter(description="done").count() == 20
+
+    FAIL_AFTER["chunks"] = None
+    SEEN.clear()
+    run_cron("test_checkpointed")
+
+    assert len(SEEN) == 10
+    assert items.filter(description="done").count() == 30
+    succeeded = runs().last()
+    assert succeeded.status == CronJobRun.Status.SUCCEEDED
+    assert succeeded.data == {"cursors": {}}
+
+    # Once a run has got through everything, the next one starts over.
+    SEEN.clear()
+    run_cron("test_checkpointed")
+    assert len(SEEN) == 30
+
+
+@pytest.mark.django_db
+def test_retry_resumes_its_own_run(items, fake_redis):
+    FAIL_AFTER["chunks"] = 1
+
+    run_cron("test_checkpointed")
+    (retrying,) = runs()
+    assert retrying.status == CronJobRun.Status.RETRYING
+
+    # Whatever else the run keeps in its data is left alone.
+    retrying.data["note"] = "kept"
+    retrying.save(update_fields=["data"])
+
+    FAIL_AFTER["chunks"] = None
+    SEEN.clear()
+    run_cron("test_checkpointed", attempt=2, run_id=retrying.pk)
+
+    assert len(SEEN) == 20
+    (run,) = runs()
+    assert run.status == CronJobRun.Status.SUCCEEDED
+    assert run.attempts == 2
+    assert run.data == {"note": "kept", "cursors": {}}
+
+
+def mark_items_then_their_runs():
+    for chunk in iterate(CronJob.objects.filter(name__startswith="test_item_")):
+        SEEN.extend(item.name for item in chunk)
+    item_runs = CronJobRun.objects.filter(cron_job__name__startswith="test_item_")
+    for i, chunk in enumerate(iterate(item_runs, chunk_size=2)):
+        if i == FAIL_AFTER["chunks"]:
+            raise Exception("Worker went away")
+        SEEN.extend(run.pk for run in chunk)
+
+
+@pytest.mark.django_db
+def test_each_model_keeps_its_own_cursor(items, fake_redis, register):
+    register("test_two_models", mark_items_then_their_runs)
+    CronJobRun.objects.bulk_create(CronJobRun(cron_job=items[0]) for _ in range(4))
+    run_pks = sorted(
+        CronJobRun.objects.filter(cron_job=items[0]).values_list("pk", flat=True)
+    )
+    FAIL_AFTER["chunks"] = 1
+
+    run_cron("test_two_models")
+
+    failed = CronJobRun.objects.get(cron_job__name="test_two_models")
+    assert failed.data == {"cursors": {"django_rq_cron.cronjobrun": str(run_pks[1])}}
+
+    # The items are gone through in full again, and only the runs resume.
+    FAIL_AFTER["chunks"] = None
+    SEEN.clear()
+    run_cron("test_two_models")
+
+    assert len(SEEN) == 32
+    assert SEEN[30:] == run_pks[2:]
+
+
+def test_iterate_outside_a_run_pages_by_primary_key(items):
+    chunks = list(iterate(items, chunk_size=7))
+
+    assert [len(chunk) for chunk in chunks] == [7, 7, 7, 7, 2]
+    assert [item.pk for chunk in chunks for item in chunk] == list(
+        items.values_list("pk", flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_buffered_runs_keep_a_cursor_per_model_in_redis(
+    items, fake_redis, settings, register
+):
+    settings.DJANGO_RQ_CRON_BUFFER_RUNS = True
+    register("test_two_models", mark_items_then_their_runs)
+    CronJobRun.objects.bulk_create(CronJobRun(cron_job=items[0]) for _ in range(4))
+    run_pks = sorted(
+        CronJobRun.objects.filter(cron_job=items[0]).values_list("pk", flat=True)
+    )
+    FAIL_AFTER["chunks"] = 1
+
+    run_cron("test_two_models")
+
+    assert fake_redis.hgetall(CURSOR_KEY.format("test_two_models")) == {
+        b"django_rq_cron.cronjobrun": json.dumps(str(run_pks[1])).encode()
+    }
+
+    FAIL_AFTER["chunks"] = None
+    SEEN.clear()
+    run_cron("test_two_models")
+
+    assert len(SEEN) == 32
+    assert SEEN[30:] == run_pks[2:]
+    assert not fake_redis.exists(CURSOR_KEY.format("test_two_models"))
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from django_rq_cron import executors
+from django_rq_cron.models import CronJobRun
+from django_rq_cron.registry import Executor, register_cron
+from django_rq_cron.runner import run_cron
+
+
+class NeedsContext(Exception):
+    def __init__(self, message, context):
+        super().__init__(message)
+        self.context = context
+
+
+def get_pid():
+    return os.getpid()
+
+
+def explode():
+    raise ValueError("Boom")
+
+
+def explode_oddly():
+    raise NeedsContext("Boom", context={})
+
+
+@pytest.fixture(autouse=True)
+def stop_child():
+    yield
+    executors.stop_child()
+
+
+def test_child_is_reused_until_it_is_spent(settings, register):
+    settings.DJANGO_RQ_CRON_PROCESS_MAX_RUNS = 2
+    cron = register("test_get_pid", get_pid, executor=Executor.PROCESS)
+
+    pids = [executors.call_in_process(cron).value for _ in range(3)]
+
+    assert os.getpid() not in pids
+    assert pids[0] == pids[1] != pids[2]
+
+
+def test_exceptions_come_back_from_the_child(register):
+    with pytest.raises(ValueError, match="Boom"):
+        executors.call_in_process(
+            register("test_explode", explode, executor=Executor.PROCESS)
+        )
+    with pytest.raises(executors.ChildError, match="NeedsContext: Boom"):
+        executors.call_in_process(
+            register("test_explode_oddly", explode_oddly, executor=Executor.PROCESS)
+        )
+
+
+@pytest.mark.django_db
+def test_runs_in_a_child_are_recorded_by_the_worker(setup_django_db, register):
+    register("test_get_pid", get_pid, executor=Executor.PROCESS)
+    register("test_explode", explode, executor=Executor.PROCESS)
+
+    run_cron("test_get_pid")
+    run_cron("test_explode")
+
+    succeeded = CronJobRun.objects.get(cron_job__name="test_get_pid")
+    assert succeeded.status == CronJobRun.Status.SUCCEEDED
+    assert succeeded.cpu_user is not None
+    failed = CronJobRun.objects.get(cron_job__name="test_explode")
+    assert failed.status == CronJobRun.Status.FAILED
+    assert failed.error == "Boom"
+
+
+def test_fanning_out_only_runs_inline():
+    with pytest.raises(ValueError):
+        register_cron(fan_out=get_pid, executor=Executor.PROCESS)
@@ -0,0 +1,134 @@
+from unittest.mock import patch
+
+import pytest
+
+from django_rq_cron.fanout import key_ranges
+from django_rq_cron.models import CronJob, CronJobRun
+from django_rq_cron.queues import get_queue
+from django_rq_cron.runner import run_chunk, run_cron
+
+PROCESSED = []
+
+
+def process(items):
+    if "poison" in items:
+        raise Exception("Bad item")
+    PROCESSED.extend(items)
+
+
+@pytest.fixture
+def register_fan_out(register):
+    def register_fan_out(name, items):
+        PROCESSED.clear()
+        register(
+            name,
+            lambda: iter(items),
+            fan_out=process,
+            chunk_size=100,
+            fan_out_queues=("default", "high"),
+        )
+
+    return register_fan_out
+
+
+def run_children():
+    for queue_name in ("default", "high"):
+        for job in get_queue(queue_name).get_jobs():
+            assert job.func is run_chunk
+            job.func(*job.args)
+
+
+@pytest.mark.django_db
+def test_chunks_run_as_children_of_one_run(
+    setup_django_db, fake_redis, register_fan_out
+):
+    register_fan_out("test_fan_out", range(250))
+
+    with patch.object(
+        fake_redis, "pipeline", wraps=fake_redis.pipeline
+    ) as mock_pipeline:
+        run_cron("test_fan_out")
+
+    # Starting the count, enqueueing every chunk, and setting the total.
+    assert mock_pipeline.call_count == 3
+    assert [len(get_queue(name)) for name in ("default", "high")] == [2, 1]
+    run = CronJobRun.objects.get(cron_job__name="test_fan_out")
+    assert run.status == CronJobRun.Status.IN_PROGRESS
+
+    run_children()
+
+    run.refresh_from_db()
+    assert run.status == CronJobRun.Status.SUCCEEDED
+    assert run.data == {"chunks": 3, "failed_chunks": 0}
+    assert sorted(PROCESSED) == list(range(250))
+    assert run.cron_job.status == CronJob.Status.SUCCEEDING
+
+
+@pytest.mark.django_db
+def test_a_failed_chunk_fails_the_run(setup_django_db, fake_redis, register_fan_out):
+    register_fan_out("test_fan_out_failing", [*range(150), "poison"])
+
+    run_cron("test_fan_out_failing")
+    run_children()
+
+    run = CronJobRun.objects.get(cron_job__name="test_fan_out_failing")
+    assert run.status == CronJobRun.Status.FAILED
+    assert run.error == "1 of 2 chunks failed, first: Bad item"
+    assert len(PROCESSED) == 100
+    assert run.cron_job.status == CronJob.Status.FAILING
+
+
+@pytest.mark.django_db
+def test_chunks_of_a_retried_attempt_do_not_finish_the_retry(
+    setup_django_db, fake_redis, register_fan_out
+):
+    register_fan_out("test_fan_out_retried", range(250))
+    run_cron("test_fan_out_retried")
+    run = CronJobRun.objects.get(cron_job__name="test_fan_out_retried")
+    stale = [job for name in ("default", "high") for job in get_queue(name).get_jobs()]
+    for queue_name in ("default", "high"):
+        get_queue(queue_name).empty()
+
+    run_cron("test_fan_out_retried", 2, str(run.pk))
+    for job in stale:
+        job.func(*job.args)
+
+    # Three chunks have finished, but none of the retry's.
+    run.refresh_from_db()
+    assert run.status == CronJobRun.Status.IN_PROGRESS
+
+    run_children()
+
+    run.refresh_from_db()
+    assert run.status == CronJobRun.Status.SUCCEEDED
+    assert run.attempts == 2
+    assert run.data == {"chunks": 3, "failed_chunks": 0}
+
+
+@pytest.mark.django_db
+def test_nothing_to_fan_out_finishes_straight_away(
+    setup_django_db, fake_redis, register_fan_out
+):
+    register_fan_out("test_fan_out_empty", [])
+
+    run_cron("test_fan_out_empty")
+
+    run = CronJobRun.objects.get(cron_job__name="test_fan_out_empty")
+    assert run.status == CronJobRun.Status.SUCCEEDED
+    assert run.data == {"chunks": 0, "failed_chunks": 0}
+
+
+@pytest.mark.django_db
+def test_key_ranges_cover_every_row(setup_django_db):
+    CronJob.objects.bulk_create(CronJob(name=f"test_range_{i}") for i in range(25))
+    queryset = CronJob.objects.filter(name__startswith="test_range_")
+
+    ranges = list(key_ranges(queryset, 10))
+
+    assert len(ranges) == 3
+    covered = [
+        pk
+        for first, last in ranges
+        for pk in queryset.filter(pk__range=(first, last)).values_list("pk", flat=True)
+    ]
+    assert sorted(covered) == sorted(queryset.values_list("pk", flat=True))
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+from rq.timeouts import JobTimeoutException
+
+from django_rq_cron import executors
+from django_rq_cron.limits import rss_kb
+from django_rq_cron.models import CronJob, CronJobRun
+from django_rq_cron.registry import Executor
+from django_rq_cron.runner import dispatch, run_cron
+
+
+def succeed():
+    pass
+
+
+def hang():
+    raise JobTimeoutException("Task exceeded maximum timeout value (5 seconds)")
+
+
+def hog():
+    # Written to, so the pages are really resident.
+    hoard = b"x" * (300 * 1024 * 1024)
+    for _ in range(500):
+        time.sleep(0.01)
+    return len(hoard)
+
+
+def test_timeouts_are_passed_to_rq(fake_redis, register):
+    crons = [
+        register("test_quick", succeed, timeout=5),
+        register("test_default", succeed),
+    ]
+
+    jobs = dispatch({"default": crons})
+
+    # The other keeps the queue's DEFAULT_TIMEOUT.
+    assert [job.timeout for job in jobs] == [5, 360]
+
+
+@pytest.mark.django_db
+def test_timed_out_runs_are_recorded_as_such(setup_django_db, register):
+    register("test_hang", hang, timeout=5)
+
+    run_cron("test_hang")
+
+    run = CronJobRun.objects.get(cron_job__name="test_hang")
+    assert run.status == CronJobRun.Status.TIMED_OUT
+    assert CronJob.objects.get(name="test_hang").status == CronJob.Status.FAILING
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("executor", [Executor.INLINE, Executor.PROCESS])
+def test_runs_over_their_memory_limit_are_stopped(
+    setup_django_db, settings, register, executor
+):
+    settings.DJANGO_RQ_CRON_MEMORY_SAMPLE_SECONDS = 0.05
+    # Leave room for the child to start up; either way, the hog goes far beyond it.
+    register("test_hog", hog, executor=executor, memory_limit=rss_kb() // 1024 + 150)
+
+    start = time.perf_counter()
+    run_cron("test_hog")
+    executors.stop_child()
+
+    assert time.perf_counter() - start < 5
+    run = CronJobRun.objects.get(cron_job__name="test_hog")
+    assert run.status == CronJobRun.Status.OUT_OF_MEMORY
+    assert run.error.startswith("Exceeded its memory limit")
@@ -0,0 +1,101 @@
+import time
+from unittest import mock
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from django_rq_cron.locks import PENDING_KEY, Lease, skipped_runs
+from django_rq_cron.models import CronJobRun
+from django_rq_cron.registry import Overlap
+from django_rq_cron.runner import run_cron
+
+
+@pytest.mark.django_db
+def test_skip_while_previous_run_holds_the_lease(
+    setup_django_db, fake_redis, settings, register, django_assert_num_queries
+):
+    settings.DJANGO_RQ_CRON_METRICS = True
+    register("test_skip", lambda: None, overlap=Overlap.SKIP)
+    running = Lease("test_skip")
+    assert running.acquire()
+
+    with django_assert_num_queries(0):
+        run_cron("test_skip")
+        run_cron("test_skip")
+    assert skipped_runs() == {"test_skip": 2}
+
+    assert not running.release()
+    run_cron("test_skip")
+    assert CronJobRun.objects.filter(cron_job__name="test_skip").count() == 1
+
+
+@pytest.mark.django_db
+def test_queue_one_runs_once_more_after_the_lease_is_released(
+    setup_django_db, fake_redis, settings, register
+):
+    settings.DJANGO_RQ_CRON_METRICS = True
+    register("test_queue_one", lambda: None, overlap=Overlap.QUEUE_ONE)
+    running = Lease("test_queue_one")
+    assert running.acquire()
+
+    run_cron("test_queue_one")
+    run_cron("test_queue_one")
+
+    # Only the first run to find the lease taken gets queued; the rest are skipped.
+    assert skipped_runs() == {"test_queue_one": 1}
+    assert running.release()
+    assert not running.release()
+
+
+def test_heartbeat_keeps_the_lease_alive(fake_redis, settings):
+    settings.DJANGO_RQ_CRON_LEASE_SECONDS = 0.3
+    lease = Lease("test_heartbeat")
+    assert lease.acquire()
+
+    time.sleep(0.6)
+    assert not Lease("test_heartbeat").acquire()
+
+    # So does a run queued behind it.
+    assert Lease("test_heartbeat").queue_behind()
+    time.sleep(0.6)
+    assert lease.release()
+    next_lease = Lease("test_heartbeat")
+    assert next_lease.acquire()
+    next_lease.release()
+
+
+@pytest.mark.django_db
+def test_queue_one_runs_now_if_the_lease_was_released_meanwhile(
+    setup_django_db, fake_redis, settings, register
+):
+    settings.DJANGO_RQ_CRON_METRICS = True
+    register("test_queue_race", lambda: None, overlap=Overlap.QUEUE_ONE)
+    # Nothing holds the lease any more, so nothing is left queued behind it.
+    assert Lease("test_queue_race").queue_behind() is None
+    assert not fake_redis.exists(PENDING_KEY.format("test_queue_race"))
+
+    # The holder let go between this run finding the lease taken and queueing.
+    with mock.patch.object(Lease, "acquire", side_effect=[False, True]):
+        run_cron("test_queue_race")
+    assert skipped_runs() == {}
+    assert CronJobRun.objects.filter(cron_job__name="test_queue_race").count() == 1
+
+
+def test_heartbeat_outlives_a_redis_error(fake_redis, settings):
+    settings.DJANGO_RQ_CRON_LEASE_SECONDS = 0.3
+    lease = Lease("test_heartbeat_error")
+    assert lease.acquire()
+    reacquire = lease.lock.reacquire
+    failures = [ConnectionError("Connection reset")]
+
+    def flaky_reacquire():
+        if failures:
+            raise failures.pop()
+        return reacquire()
+
+    with mock.patch.object(lease.lock, "reacquire", side_effect=flaky_reacquire):
+        time.sleep(0.6)
+        assert not failures
+        assert lease.heartbeat.is_alive()
+        assert not Lease("test_heartbeat_error").acquire()
+    lease.release()
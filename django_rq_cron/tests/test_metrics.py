@@ -0,0 +1,84 @@
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+from redis.exceptions import ConnectionError
+
+from django_rq_cron import metrics
+from django_rq_cron.locks import Lease
+from django_rq_cron.registry import Overlap
+from django_rq_cron.runner import run_cron
+from django_rq_cron.tests.conftest import fail
+
+
+@pytest.mark.django_db
+def test_runs_are_counted_in_one_round_trip(
+    setup_django_db, fake_redis, settings, register
+):
+    settings.DJANGO_RQ_CRON_METRICS = True
+    register("test_metrics", lambda: None, queue="high")
+
+    with patch.object(
+        fake_redis, "pipeline", wraps=fake_redis.pipeline
+    ) as mock_pipeline:
+        run_cron("test_metrics")
+
+    mock_pipeline.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_metrics_view_renders_without_queries(
+    setup_django_db, fake_redis, settings, register, client, django_assert_num_queries
+):
+    settings.DJANGO_RQ_CRON_METRICS = True
+    register("test_metrics_ok", lambda: None, queue="high")
+    register("test_metrics_failing", fail, queue="high")
+    register("test_metrics_skipped", lambda: None, queue="high", overlap=Overlap.SKIP)
+    run_cron("test_metrics_ok")
+    run_cron("test_metrics_ok")
+    run_cron("test_metrics_failing")
+    running = Lease("test_metrics_skipped", "high")
+    assert running.acquire()
+    try:
+        run_cron("test_metrics_skipped")
+    finally:
+        running.release()
+
+    with django_assert_num_queries(0):
+        response = client.get(reverse("django_rq_cron_metrics"))
+
+    assert response["Content-Type"].startswith("application/openmetrics-text")
+    lines = response.content.decode().splitlines()
+    assert (
+        'django_rq_cron_runs_total{job="test_metrics_ok",queue="high",status="succeeded"} 2'
+        in lines
+    )
+    assert (
+        'django_rq_cron_runs_total{job="test_metrics_failing",queue="high",status="failed"} 1'
+        in lines
+    )
+    assert (
+        'django_rq_cron_run_duration_seconds_bucket{job="test_metrics_ok",queue="high",le="+Inf"} 2'
+        in lines
+    )
+    assert (
+        'django_rq_cron_skips_total{job="test_metrics_skipped",queue="high"} 1' in lines
+    )
+    assert lines[-1] == "# EOF"
+
+
+def test_skips_and_chain_gaps_are_only_counted_with_metrics_enabled(
+    fake_redis, settings
+):
+    metrics.record_skip("test_metrics_skip", "default")
+    metrics.record_chain_gap("hourly", 60.0)
+    assert not fake_redis.exists(metrics.SKIPS_KEY, metrics.CHAIN_GAPS_KEY)
+
+    settings.DJANGO_RQ_CRON_METRICS = True
+    error = ConnectionError("Connection reset")
+    with patch.object(fake_redis, "hincrby", side_effect=error), patch.object(
+        fake_redis, "pipeline", side_effect=error
+    ):
+        metrics.record_skip("test_metrics_skip", "default")
+        metrics.record_chain_gap("hourly", 60.0)
+    assert not fake_redis.exists(metrics.SKIPS_KEY, metrics.CHAIN_GAPS_KEY)
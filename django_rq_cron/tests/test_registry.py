@@ -1,5 +1,30 @@
+import pytest
+
 from django_rq_cron.models import CronJob
-from django_rq_cron.registry import register_cron, extract_name, REGISTERED_CRON_JOBS
+from django_rq_cron.registry import (
+    DAILY_CRON_TAB,
+    HOURLY_CRON_TAB,
+    IMPORT_PROFILES,
+    REGISTERED_CRON_JOBS,
+    WEEKLY_CRON_TAB,
+    dotted_path,
+    extract_name,
+    import_profiled,
+    get_cron,
+    get_import_profiles,
+    get_schedule,
+    load_manifest,
+    register_cron,
+    resolve_crontab,
+    write_manifest,
+)
+from django_rq_cron.tests.conftest import fail
+
+CHUNKS = []
+
+
+def handle_chunk(chunk):
+    CHUNKS.append(chunk)
 
 
 def test_extract_name():
@@ -15,8 +40,8 @@ def test_extract_name():
     assert extract_name(do) == "ping"
 
 
-def test_register_cron_with_decorator():
-    # Clear the registry
+def test_register_cron_with_decorator(register):
+    # Start from an empty registry; the fixture puts it back afterwards.
     REGISTERED_CRON_JOBS.clear()
 
     @register_cron
@@ -30,8 +55,8 @@ def test_register_cron_with_decorator():
     assert REGISTERED_CRON_JOBS["test_cron"].queue == "default"
 
 
-def test_register_cron_with_parameters():
-    # Clear the registry
+def test_register_cron_with_parameters(register):
+    # Start from an empty registry; the fixture puts it back afterwards.
     REGISTERED_CRON_JOBS.clear()
 
     @register_cron(
@@ -54,3 +79,190 @@ def test_register_cron_with_parameters():
         == "Test cron with parameters"
     )
     assert REGISTERED_CRON_JOBS["test_cron_with_params"].queue == "high"
+
+
+def test_schedule_groups_crons_by_cadence_and_queue(register):
+    REGISTERED_CRON_JOBS.clear()
+
+    @register_cron(cadence=CronJob.Cadence.DAILY, queue="high")
+    def first():
+        pass
+
+    @register_cron(cadence=CronJob.Cadence.DAILY)
+    def second():
+        pass
+
+    schedule = get_schedule()
+    assert schedule.labels[DAILY_CRON_TAB] == CronJob.Cadence.DAILY
+    assert [cron.name for cron in schedule.jobs[DAILY_CRON_TAB]["high"]] == ["first"]
+    assert [cron.name for cron in schedule.jobs[DAILY_CRON_TAB]["default"]] == [
+        "second"
+    ]
+    assert HOURLY_CRON_TAB not in schedule.jobs
+
+    # Re-registering an identical cron leaves the compiled schedule alone.
+    register_cron(second, cadence=CronJob.Cadence.DAILY)
+    assert get_schedule() is schedule
+
+    register_cron(second, cadence=CronJob.Cadence.WEEKLY)
+    assert get_schedule() is not schedule
+    assert [cron.name for cron in get_schedule().jobs[WEEKLY_CRON_TAB]["default"]] == [
+        "second"
+    ]
+
+
+def test_schedule_groups_crons_by_crontab_expression(settings, register):
+    settings.DJANGO_RQ_CRON_CUSTOM_CADENCES = {"EVERY_FIVE_MINUTES": "*/5 * * * *"}
+    REGISTERED_CRON_JOBS.clear()
+
+    @register_cron(cadence="EVERY_FIVE_MINUTES")
+    def by_name():
+        pass
+
+    @register_cron(cadence="  */5 *  * * * ")
+    def by_expression():
+        pass
+
+    @register_cron(cadence="@daily")
+    def by_macro():
+        pass
+
+    schedule = get_schedule()
+    assert list(schedule.jobs) == ["*/5 * * * *", "0 0 * * *"]
+    assert [cron.name for cron in schedule.jobs["*/5 * * * *"]["default"]] == [
+        "by_name",
+        "by_expression",
+    ]
+    assert schedule.labels["*/5 * * * *"].startswith("crontab-")
+    assert resolve_crontab(CronJob.Cadence.HOURLY) == HOURLY_CRON_TAB
+
+    with pytest.raises(ValueError):
+        register_cron(by_macro, cadence="61 * * * *")
+
+
+def test_builtin_crons_are_opt_in(monkeypatch, settings, register):
+    import sys
+
+    from django_rq_cron.registry import import_crons
+
+    for name in ("ping", "cleanup_old_runs", "watchdog"):
+        monkeypatch.delitem(sys.modules, f"django_rq_cron.crons.{name}", raising=False)
+    REGISTERED_CRON_JOBS.clear()
+    import_crons()
+    assert not REGISTERED_CRON_JOBS
+
+    settings.DJANGO_RQ_CRON_BUILTIN_CRONS = ["watchdog"]
+    import_crons()
+    assert list(REGISTERED_CRON_JOBS) == ["watchdog"]
+
+
+def test_lazy_crons_are_imported_on_first_run(
+    tmp_path, monkeypatch, settings, register
+):
+    import sys
+
+    from django.core.management import call_command
+
+    settings.DJANGO_RQ_CRON_BUILTIN_CRONS = ["ping"]
+    REGISTERED_CRON_JOBS.clear()
+    monkeypatch.delitem(sys.modules, "django_rq_cron.crons.ping", raising=False)
+    path = tmp_path / "crons.json"
+    call_command("write_cron_manifest", output=str(path))
+    assert "ping" in REGISTERED_CRON_JOBS
+
+    # A fresh process in lazy mode only knows what the manifest says.
+    REGISTERED_CRON_JOBS.clear()
+    monkeypatch.delitem(sys.modules, "django_rq_cron.crons.ping", raising=False)
+    assert load_manifest(str(path))
+    assert REGISTERED_CRON_JOBS["ping"].function is None
+    assert REGISTERED_CRON_JOBS["ping"].cadence == CronJob.Cadence.HOURLY
+    assert "ping" in [
+        cron.name for cron in get_schedule().jobs[HOURLY_CRON_TAB]["default"]
+    ]
+
+    cron = get_cron("ping")
+    assert cron.function is sys.modules["django_rq_cron.crons.ping"].do
+    assert cron.module == "django_rq_cron.crons.ping"
+
+
+def test_manifest_keeps_fan_out_settings(tmp_path, register):
+    register(
+        "test_manifest_fan_out",
+        fail,
+        fan_out=handle_chunk,
+        chunk_size=5,
+        fan_out_queues=("high", "low"),
+        module=__name__,
+    )
+    path = str(tmp_path / "crons.json")
+    write_manifest(path)
+
+    REGISTERED_CRON_JOBS.clear()
+    assert load_manifest(path)
+    cron = REGISTERED_CRON_JOBS["test_manifest_fan_out"]
+    assert cron.chunk_size == 5
+    assert cron.fan_out_queues == ("high", "low")
+    CHUNKS.clear()
+    cron.fan_out([1, 2])
+    assert CHUNKS == [[1, 2]]
+
+    # Until it's imported, the handler still goes by its dotted path.
+    assert dotted_path(cron.fan_out) == f"{__name__}.handle_chunk"
+
+
+def test_manifest_refuses_fan_out_handlers_it_cant_import(tmp_path, register):
+    register("test_manifest_lambda", fail, fan_out=lambda chunk: None)
+
+    with pytest.raises(ValueError):
+        write_manifest(str(tmp_path / "crons.json"))
+    assert not (tmp_path / "crons.json").exists()
+
+
+def test_import_profiled_records_cost_and_hidden_errors(
+    tmp_path, monkeypatch, register
+):
+    import sys
+
+    crons = tmp_path / "profiled_app" / "crons"
+    crons.mkdir(parents=True)
+    (tmp_path / "profiled_app" / "__init__.py").write_text("")
+    (crons / "__init__.py").write_text("")
+    (crons / "fine.py").write_text(
+        "from django_rq_cron.registry import register_cron\n"
+        "\n"
+        "@register_cron\n"
+        "def profiled():\n"
+        "    pass\n"
+        "\n"
+        "HOARD = b'x' * (32 * 1024 * 1024)\n"
+    )
+    (tmp_path / "profiled_app" / "broken.py").write_text(
+        "import not_installed_anywhere\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    # Raise the peak beforehand, so growth of the peak alone would miss the import.
+    hoard = b"x" * (64 * 1024 * 1024)
+    del hoard
+    try:
+        import_profiled("profiled_app", "profiled_app.crons")
+        import_profiled("profiled_app", "profiled_app.crons.fine")
+        with pytest.raises(ModuleNotFoundError):
+            import_profiled("profiled_app", "profiled_app.missing")
+        with pytest.raises(ModuleNotFoundError):
+            import_profiled("profiled_app", "profiled_app.broken")
+    finally:
+        for name in list(sys.modules):
+            if name.startswith("profiled_app"):
+                del sys.modules[name]
+
+    profile = IMPORT_PROFILES["profiled_app.crons.fine"]
+    assert profile.crons == 1
+    assert profile.seconds > 0
+    assert profile.rss_kb >= 24 * 1024
+    assert profile.error == ""
+    # A module that doesn't exist isn't profiled, but one that imports something
+    # missing is.
+    assert "profiled_app.missing" not in IMPORT_PROFILES
+    assert "not_installed_anywhere" in IMPORT_PROFILES["profiled_app.broken"].error
+    assert IMPORT_PROFILES["profiled_app.crons.fine"] in get_import_profiles()
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from django_rq_cron.models import CronJob, CronJobRun, CronJobStatusTransition
+from django_rq_cron.retention import CURSOR_KEY, cleanup, delete_in_chunks
+
+
+def create_runs(cron_job, days_ago, count=1):
+    runs = CronJobRun.objects.bulk_create(
+        [CronJobRun(cron_job=cron_job) for _ in range(count)]
+    )
+    CronJobRun.objects.filter(pk__in=[run.pk for run in runs]).update(
+        creation_date=timezone.now() - timedelta(days=days_ago)
+    )
+
+
+@pytest.mark.django_db
+def test_cleanup_respects_retention_per_job(
+    setup_django_db, fake_redis, settings, register
+):
+    settings.DJANGO_RQ_CRON_RETENTION_DAYS = {CronJob.Cadence.EVERY_MINUTE: 7}
+    settings.DJANGO_RQ_CRON_CLEANUP_PAUSE = 0
+
+    minutely = CronJob.objects.create(
+        name="test_minutely", cadence=CronJob.Cadence.EVERY_MINUTE
+    )
+    hourly = CronJob.objects.create(name="test_hourly", cadence=CronJob.Cadence.HOURLY)
+    monthly = CronJob.objects.create(
+        name="test_monthly", cadence=CronJob.Cadence.MONTHLY
+    )
+    register(
+        "test_monthly",
+        lambda: None,
+        cadence=CronJob.Cadence.MONTHLY,
+        retention_days=180,
+    )
+    for cron_job in (minutely, hourly, monthly):
+        create_runs(cron_job, days_ago=1)
+        create_runs(cron_job, days_ago=10)
+        create_runs(cron_job, days_ago=60)
+    CronJobStatusTransition.objects.create(parent=minutely)
+    CronJobStatusTransition.objects.filter(parent=minutely).update(
+        creation_date=timezone.now() - timedelta(days=10)
+    )
+
+    counts = cleanup()
+
+    assert counts == {"runs": 3, "status_transitions": 1, "finished": True}
+    assert minutely.runs.count() == 1
+    assert hourly.runs.count() == 2
+    assert monthly.runs.count() == 3
+    assert not minutely.status_transitions.exists()
+
+
+@pytest.mark.django_db
+def test_delete_in_chunks_batches_and_stops_at_deadline(
+    setup_django_db, django_assert_num_queries
+):
+    cron_job = CronJob.objects.create(name="test_chunks")
+    create_runs(cron_job, days_ago=1, count=10)
+
+    # All ten share a creation date, so the chunks are told apart by pk alone.
+    # Four chunks of three: a select and a delete each, except the short last one.
+    with django_assert_num_queries(8):
+        deleted, finished = delete_in_chunks(
+            CronJobRun.objects.filter(cron_job=cron_job), chunk_size=3, pause=0
+        )
+    assert (deleted, finished) == (10, True)
+
+    create_runs(cron_job, days_ago=1, count=10)
+    deleted, finished = delete_in_chunks(
+        CronJobRun.objects.filter(cron_job=cron_job), chunk_size=3, deadline=0
+    )
+    assert (deleted, finished) == (0, False)
+    assert cron_job.runs.count() == 10
+
+
+@pytest.mark.django_db
+def test_cleanup_resumes_from_the_job_it_ran_out_of_time_on(
+    setup_django_db, fake_redis, settings
+):
+    settings.DJANGO_RQ_CRON_CLEANUP_PAUSE = 0
+    for name in ("test_a", "test_b", "test_c"):
+        create_runs(CronJob.objects.create(name=name), days_ago=60)
+
+    # Runs and transitions of test_a, then out of time on test_b.
+    with patch(
+        "django_rq_cron.retention.delete_in_chunks",
+        side_effect=[(1, True), (0, True), (0, False)],
+    ):
+        assert cleanup()["finished"] is False
+    assert fake_redis.get(CURSOR_KEY) == b"test_b"
+
+    # Out of time straight away: the cursor still points at test_b, not test_a.
+    with patch(
+        "django_rq_cron.retention.delete_in_chunks", side_effect=[(0, False)]
+    ) as delete:
+        cleanup()
+    assert delete.call_args.args[0].filter(cron_job__name="test_b").exists()
+    assert fake_redis.get(CURSOR_KEY) == b"test_b"
+
+    assert cleanup() == {"runs": 3, "status_transitions": 0, "finished": True}
+    assert not CronJobRun.objects.exists()
+    assert fake_redis.get(CURSOR_KEY) is None
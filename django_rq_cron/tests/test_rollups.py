@@ -0,0 +1,50 @@
+from datetime import date
+
+import pytest
+
+from django_rq_cron import rollups
+from django_rq_cron.models import CronJob, CronJobDailyRollup
+from django_rq_cron.runner import run_cron
+from django_rq_cron.tests.conftest import fail
+
+
+@pytest.mark.django_db
+def test_runs_are_rolled_up_by_day(setup_django_db, register):
+    register("test_rollup", lambda: None)
+    register("test_rollup_fail", fail)
+    run_cron("test_rollup")
+    run_cron("test_rollup")
+    run_cron("test_rollup_fail")
+
+    rollup = CronJobDailyRollup.objects.get(cron_job__name="test_rollup")
+    assert rollup.runs == 2
+    assert rollup.failures == 0
+    assert rollup.bucket_0 == 2
+    assert 0 <= rollup.min_duration <= rollup.max_duration
+    assert rollup.duration_percentile(95) == 0.1
+    failing = CronJobDailyRollup.objects.get(cron_job__name="test_rollup_fail")
+    assert (failing.runs, failing.failures, failing.success_rate) == (1, 1, 0)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("upsert", [True, False])
+def test_record_runs_accumulates(setup_django_db, monkeypatch, upsert):
+    if not upsert:
+        # Take the UPDATE-then-INSERT path other databases use.
+        monkeypatch.setattr(rollups, "UPSERT_VENDORS", ())
+    cron_job = CronJob.objects.create(name="test_rollup_accumulate")
+    day = date(2026, 1, 1)
+
+    rollups.record_runs(
+        cron_job.pk, day, rollups.Delta.of([(False, 2.0), (True, None)])
+    )
+    rollups.record_runs(cron_job.pk, day, rollups.Delta.of([(False, 0.05)]))
+    rollups.record_runs(cron_job.pk, day, rollups.Delta.of([(False, 7200.0)]))
+
+    rollup = CronJobDailyRollup.objects.get(cron_job=cron_job, day=day)
+    assert (rollup.runs, rollup.failures) == (4, 1)
+    assert rollup.total_duration == pytest.approx(7202.05)
+    assert (rollup.min_duration, rollup.max_duration) == (0.05, 7200.0)
+    assert rollup.histogram == [1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1]
+    assert rollup.duration_percentile(50) == 5.0
+    assert rollup.duration_percentile(100) == 7200.0
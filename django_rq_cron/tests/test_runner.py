@@ -3,8 +3,8 @@ from unittest.mock import patch, MagicMock
 from datetime import datetime, timezone
 
 from django_rq_cron.models import CronJob
-from django_rq_cron.registry import RegisteredCronJob
-from django_rq_cron.runner import run_cron, enqueue_next_run
+from django_rq_cron.registry import RegisteredCronJob, chain_label
+from django_rq_cron.runner import dispatch, run_cron, enqueue_next_run
 
 
 def immediately_fail():
@@ -35,7 +35,7 @@ def test_handle_failure(setup_django_db):
 
 # Mock the entire CronTab functionality
 @patch("django_rq_cron.runner.get_next_scheduled_time")
-@patch("django_rq.get_queue")
+@patch("django_rq_cron.runner.get_queue")
 def test_enqueue_next_run(mock_get_queue, mock_get_next_scheduled_time):
     # Mock the next scheduled time
     mock_datetime = datetime.now(tz=timezone.utc)
@@ -72,3 +72,408 @@ def test_should_create_cron_job_if_not_exists(setup_django_db):
 
     # Check that the cron job was created with the correct cadence
     assert CronJob.objects.get(name="test_create").cadence == CronJob.Cadence.DAILY
+
+
+def succeed():
+    pass
+
+
+@pytest.mark.django_db
+def test_run_cron_query_budget(setup_django_db, register, django_assert_num_queries):
+    register("test_budget", succeed)
+    CronJob.objects.create(name="test_budget")
+
+    # The first success moves the job out of NEW.
+    with django_assert_num_queries(7):
+        run_cron("test_budget")
+
+    with django_assert_num_queries(6):
+        run_cron("test_budget")
+
+    # The first failure moves the job to FAILING; later ones leave the job alone.
+    register("test_budget", immediately_fail)
+
+    with django_assert_num_queries(6):
+        run_cron("test_budget")
+
+    with django_assert_num_queries(4):
+        run_cron("test_budget")
+
+
+@pytest.mark.django_db
+def test_failure_transition_records_previous_status(setup_django_db, register):
+    register("test_transition", succeed)
+    run_cron("test_transition")
+    register("test_transition", immediately_fail)
+    run_cron("test_transition")
+    run_cron("test_transition")
+
+    cron_job = CronJob.objects.get(name="test_transition")
+    transitions = list(
+        cron_job.status_transitions.order_by("creation_date").values_list(
+            "old_value", "new_value"
+        )
+    )
+    assert transitions == [
+        (CronJob.Status.NEW, CronJob.Status.SUCCEEDING),
+        (CronJob.Status.SUCCEEDING, CronJob.Status.FAILING),
+    ]
+    assert cron_job.runs.count() == 3
+
+
+def test_dispatch_pipelines_each_connection(fake_redis):
+    crons_by_queue = {
+        queue: [
+            RegisteredCronJob(
+                name=f"test_dispatch_{queue}_{i}",
+                function=succeed,
+                cadence=CronJob.Cadence.HOURLY,
+                description="",
+                queue=queue,
+            )
+            for i in range(5)
+        ]
+        for queue in ("default", "high")
+    }
+
+    with patch.object(
+        fake_redis, "pipeline", wraps=fake_redis.pipeline
+    ) as mock_pipeline:
+        jobs = dispatch(crons_by_queue)
+
+    # Both queues share a connection, so everything goes out in one pipeline.
+    mock_pipeline.assert_called_once()
+    assert len(jobs) == 10
+    assert [job.args for job in jobs if job.origin == "high"] == [
+        (f"test_dispatch_high_{i}",) for i in range(5)
+    ]
+
+
+def test_dispatch_spreads_runs_after_the_tick(fake_redis, settings):
+    from django.utils import timezone as django_timezone
+
+    from django_rq_cron.utils import spread_offset
+
+    settings.DJANGO_RQ_CRON_SPREAD = 600
+    crons = [
+        RegisteredCronJob(
+            name=f"test_spread_{i}",
+            function=succeed,
+            cadence=CronJob.Cadence.HOURLY,
+            description="",
+        )
+        for i in range(5)
+    ] + [
+        RegisteredCronJob(
+            name="test_spread_never",
+            function=succeed,
+            cadence=CronJob.Cadence.HOURLY,
+            description="",
+            spread=0,
+        )
+    ]
+    tick = django_timezone.now().replace(microsecond=0)
+
+    with patch.object(
+        fake_redis, "pipeline", wraps=fake_redis.pipeline
+    ) as mock_pipeline:
+        jobs = dispatch({"default": crons}, tick, 3600)
+
+    mock_pipeline.assert_called_once()
+    assert len(jobs) == 6
+    # Only the crons opting out of the spread are enqueued straight away.
+    assert fake_redis.lrange("rq:queue:default", 0, -1) == [
+        job.id.encode() for job in jobs if job.args == ("test_spread_never",)
+    ]
+    scheduled = {
+        job_id.decode(): score
+        for job_id, score in fake_redis.zrange(
+            "rq:scheduled:default", 0, -1, withscores=True
+        )
+    }
+    for job in jobs:
+        name = job.args[0]
+        if name == "test_spread_never":
+            continue
+        offset = spread_offset(name, 600)
+        assert 0 < offset < 600
+        assert scheduled[job.id] == tick.timestamp() + offset
+
+
+def test_spread_is_capped_at_the_schedule_period(fake_redis):
+    cron = RegisteredCronJob(
+        name="test_spread_capped",
+        function=succeed,
+        cadence=CronJob.Cadence.EVERY_MINUTE,
+        description="",
+        spread=3600,
+    )
+    tick = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    with patch("django_rq_cron.runner.timezone.now", return_value=tick):
+        dispatch({"default": [cron]}, tick, 60)
+
+    (score,) = [
+        score
+        for _, score in fake_redis.zrange(
+            "rq:scheduled:default", 0, -1, withscores=True
+        )
+    ]
+    assert tick.timestamp() <= score < tick.timestamp() + 60
+
+
+@pytest.mark.django_db
+def test_failed_run_is_retried_on_the_same_run(setup_django_db, register):
+    from django_rq_cron.models import CronJobRun
+
+    register("test_retry", immediately_fail, tries=2, backoff=(45,))
+
+    with patch("django_rq_cron.runner.get_queue") as mock_get_queue:
+        run_cron("test_retry")
+
+    # The first failure schedules a retry instead of marking the job as failing.
+    run = CronJobRun.objects.get(cron_job__name="test_retry")
+    assert run.status == CronJobRun.Status.RETRYING
+    assert CronJob.objects.get(name="test_retry").status == CronJob.Status.NEW
+    delay, function, *args = mock_get_queue.return_value.enqueue_in.call_args.args
+    assert delay.total_seconds() == 45
+    assert function is run_cron
+    assert args == ["test_retry", 2, str(run.pk)]
+
+    with patch("django_rq_cron.runner.get_queue") as mock_get_queue:
+        function(*args)
+
+    # The last attempt fails for good, on the same run.
+    mock_get_queue.return_value.enqueue_in.assert_not_called()
+    run = CronJobRun.objects.get(cron_job__name="test_retry")
+    assert run.status == CronJobRun.Status.FAILED
+    assert run.attempts == 2
+    assert CronJob.objects.get(name="test_retry").status == CronJob.Status.FAILING
+
+
+def test_crons_sharing_an_expression_share_one_scheduled_job(fake_redis, register):
+    from django_rq_cron.registry import REGISTERED_CRON_JOBS
+    from django_rq_cron.runner import bootstrap
+
+    REGISTERED_CRON_JOBS.clear()
+    for name, cadence in [
+        ("a", "*/5 * * * *"),
+        ("b", "*/5  * * * *"),
+        ("c", "@hourly"),
+    ]:
+        register(name, succeed, cadence=cadence)
+
+    jobs = bootstrap()
+    bootstrap()
+
+    assert len(jobs) == 2
+    assert {job.args[0] for job in jobs} == {"*/5 * * * *", "0 * * * *"}
+    # Bootstrapping twice doesn't start a second chain for either schedule.
+    scheduled = fake_redis.zrange("rq:scheduled:default", 0, -1)
+    assert sorted(job_id.decode() for job_id in scheduled) == sorted(
+        job.id for job in jobs
+    )
+
+
+def test_bootstrap_cancels_ticks_scheduled_under_legacy_ids(fake_redis, register):
+    from django_rq_cron.registry import REGISTERED_CRON_JOBS
+    from django_rq_cron.runner import bootstrap
+
+    REGISTERED_CRON_JOBS.clear()
+    register("a", succeed)
+    legacy_id = "cron-hourly-2026-01-05 10:00:00+00:00"
+    fake_redis.zadd("rq:scheduled:default", {legacy_id: 1767607200})
+    fake_redis.hset(f"rq:job:{legacy_id}", "status", "scheduled")
+
+    jobs = bootstrap()
+
+    scheduled = fake_redis.zrange("rq:scheduled:default", 0, -1)
+    assert [job_id.decode() for job_id in scheduled] == [jobs[0].id]
+    assert not fake_redis.exists(f"rq:job:{legacy_id}")
+
+
+@pytest.mark.django_db
+def test_run_records_resource_usage(setup_django_db, register):
+    from django_rq_cron.models import CronJobRun
+
+    def allocate():
+        import gc
+
+        gc.collect()
+        sum(range(100_000))
+
+    register("test_resources", allocate)
+    run_cron("test_resources")
+
+    run = CronJobRun.objects.get(cron_job__name="test_resources")
+    assert 0 < run.wall_time < (run.completion_date - run.creation_date).total_seconds()
+    assert run.cpu_user >= 0
+    assert run.cpu_system >= 0
+    assert run.rss_delta >= 0
+    assert run.gc_collections >= 1
+
+
+def test_horizon_is_scheduled_in_one_pipeline(fake_redis, settings):
+    from django_rq_cron.runner import schedule_horizon
+
+    settings.DJANGO_RQ_CRON_HORIZON = 5
+    now = datetime(2026, 1, 1, 12, 0, 30, tzinfo=timezone.utc)
+
+    with patch("django_rq_cron.runner.timezone.now", return_value=now):
+        with patch.object(
+            fake_redis, "pipeline", wraps=fake_redis.pipeline
+        ) as mock_pipeline:
+            jobs = schedule_horizon("*/10 * * * *")
+
+    mock_pipeline.assert_called_once()
+    assert [job.id for job in jobs] == [
+        f"cron-{chain_label('*/10 * * * *')}-2026010112{minute}00"
+        for minute in (10, 20, 30, 40, 50)
+    ]
+
+    # Scheduling it again replaces the same jobs rather than adding more.
+    with patch("django_rq_cron.runner.timezone.now", return_value=now):
+        schedule_horizon("*/10 * * * *")
+    assert fake_redis.zcard("rq:scheduled:default") == 5
+
+
+def test_horizon_is_topped_up_every_few_ticks(fake_redis, settings):
+    from datetime import timedelta
+
+    from django_rq_cron.runner import run_crons
+
+    settings.DJANGO_RQ_CRON_HORIZON = 4
+    settings.DJANGO_RQ_CRON_HORIZON_REFILL = 2
+    start = datetime(2026, 1, 1, 12, 0, 30, tzinfo=timezone.utc)
+    minute = timedelta(minutes=1)
+
+    def scheduled():
+        return [
+            job_id.decode()[-4:]
+            for job_id in fake_redis.zrange("rq:scheduled:default", 0, -1)
+        ]
+
+    with patch("django_rq_cron.runner.timezone.now", return_value=start):
+        enqueue_next_run("* * * * *")
+    assert scheduled() == ["0100", "0200", "0300", "0400"]
+
+    for ticks, expected in [
+        (1, ["0100", "0200", "0300", "0400"]),
+        (2, ["0100", "0200", "0300", "0400", "0500", "0600"]),
+        (3, ["0100", "0200", "0300", "0400", "0500", "0600"]),
+    ]:
+        with patch(
+            "django_rq_cron.runner.timezone.now",
+            return_value=start - timedelta(seconds=30) + ticks * minute,
+        ):
+            run_crons("* * * * *")
+        assert scheduled() == expected
+
+
+async def sleep_briefly():
+    import asyncio
+
+    await asyncio.sleep(0.2)
+
+
+async def sleep_forever():
+    import asyncio
+
+    await asyncio.sleep(60)
+
+
+async def fail_async():
+    raise Exception("This is an async test exception")
+
+
+@pytest.mark.django_db
+def test_async_cron_runs_on_its_own_event_loop(setup_django_db, register):
+    from django_rq_cron.models import CronJobRun
+
+    register("test_async", sleep_briefly, asynchronous=True)
+    register("test_hang", sleep_forever, timeout=0.05, asynchronous=True)
+
+    run_cron("test_hang")
+    run_cron("test_async")
+
+    assert CronJobRun.objects.get(cron_job__name="test_async").status == (
+        CronJobRun.Status.SUCCEEDED
+    )
+    hung = CronJobRun.objects.get(cron_job__name="test_hang")
+    assert hung.status == CronJobRun.Status.TIMED_OUT
+    assert hung.error == "Timed out after 0.05s"
+
+
+@pytest.mark.django_db
+def test_async_crons_run_concurrently_and_are_recorded_together(
+    setup_django_db, register, django_assert_max_num_queries
+):
+    import time
+
+    from django_rq_cron.models import CronJobRun
+    from django_rq_cron.runner import run_async_crons
+
+    crons = {
+        "test_async_a": sleep_briefly,
+        "test_async_b": sleep_briefly,
+        "test_async_c": sleep_briefly,
+        "test_async_hang": sleep_forever,
+        "test_async_fail": fail_async,
+    }
+    for name, function in crons.items():
+        register(name, function, timeout=0.3, asynchronous=True)
+
+    start = time.perf_counter()
+    # One transaction for the lot, well under the 6 or 7 statements a run costs alone.
+    with django_assert_max_num_queries(20):
+        run_async_crons(list(crons))
+
+    assert time.perf_counter() - start < 0.6
+    runs = {
+        run.cron_job.name: run
+        for run in CronJobRun.objects.filter(cron_job__name__in=crons).select_related(
+            "cron_job"
+        )
+    }
+    assert {name: run.status for name, run in runs.items()} == {
+        "test_async_a": CronJobRun.Status.SUCCEEDED,
+        "test_async_b": CronJobRun.Status.SUCCEEDED,
+        "test_async_c": CronJobRun.Status.SUCCEEDED,
+        "test_async_hang": CronJobRun.Status.TIMED_OUT,
+        "test_async_fail": CronJobRun.Status.FAILED,
+    }
+    assert runs["test_async_hang"].error == "Timed out after 0.3s"
+    assert runs["test_async_a"].wall_time >= 0.2
+    assert runs["test_async_fail"].cron_job.status == CronJob.Status.FAILING
+
+
+def test_dispatch_batches_async_crons(fake_redis, settings):
+    from django_rq_cron.runner import run_async_crons
+
+    settings.DJANGO_RQ_CRON_ASYNC_BATCH = True
+    crons = [
+        RegisteredCronJob(
+            name=f"test_batch_{i}",
+            function=sleep_briefly,
+            cadence=CronJob.Cadence.HOURLY,
+            description="",
+            asynchronous=True,
+            timeout=30,
+        )
+        for i in range(3)
+    ] + [
+        RegisteredCronJob(
+            name="test_batch_sync",
+            function=succeed,
+            cadence=CronJob.Cadence.HOURLY,
+            description="",
+        )
+    ]
+
+    jobs = dispatch({"default": crons})
+
+    assert [(job.func, job.args) for job in jobs] == [
+        (run_cron, ("test_batch_sync",)),
+        (run_async_crons, (["test_batch_0", "test_batch_1", "test_batch_2"],)),
+    ]
+    assert jobs[1].timeout == 90
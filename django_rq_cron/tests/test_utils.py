@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+
+from django_rq_cron.utils import compile_crontab, fire_times, get_tick, spread_offset
+
+
+def next_times(crontab_string, start, end):
+    times = []
+    while (
+        start := compile_crontab(crontab_string).next(
+            now=start, return_datetime=True, default_utc=True
+        )
+    ) <= end:
+        times.append(start)
+    return times
+
+
+def test_compile_crontab_is_cached():
+    assert compile_crontab("*/5 * * * *") is compile_crontab("*/5 * * * *")
+
+
+def test_fire_times_match_crontab_next():
+    start = datetime(2026, 1, 30, 13, 7, tzinfo=timezone.utc)
+    end = start + timedelta(days=70)
+    expressions = ["*/30 */2 * * *", "0 9 * * mon-fri", "0 12 l * *", "30 4 * * l5"]
+
+    times = fire_times(expressions, start, end)
+
+    for expression in expressions:
+        assert times[expression] == next_times(expression, start, end)
+
+
+def test_fire_times_limit_and_bounds():
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    times = fire_times(["0 * * * *"], start, start + timedelta(days=1), limit=3)
+
+    # A fire time equal to `start` is excluded, as with `CronTab.next`.
+    assert times["0 * * * *"] == [start + timedelta(hours=hour) for hour in (1, 2, 3)]
+    assert fire_times(["0 * * * *"], start, start + timedelta(hours=2)) == {
+        "0 * * * *": [start + timedelta(hours=1), start + timedelta(hours=2)]
+    }
+
+
+def test_get_tick_finds_the_latest_fire_time():
+    assert get_tick("0 * * * *", datetime(2026, 1, 1, 3, 0, tzinfo=timezone.utc)) == (
+        datetime(2026, 1, 1, 3, 0, tzinfo=timezone.utc),
+        3600,
+    )
+    assert get_tick(
+        "0 20 * * *", datetime(2026, 1, 1, 3, 10, 5, tzinfo=timezone.utc)
+    ) == (datetime(2025, 12, 31, 20, 0, tzinfo=timezone.utc), 86400)
+
+
+def test_spread_offset_is_stable_and_within_the_window():
+    offsets = [spread_offset(f"cron_{i}", 600) for i in range(200)]
+
+    assert offsets == [spread_offset(f"cron_{i}", 600) for i in range(200)]
+    assert all(0 <= offset < 600 for offset in offsets)
+    # Names land all over the window rather than bunching up.
+    assert len({offset // 60 for offset in offsets}) == 10
+    assert spread_offset("cron_0", 0) == 0
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from django_rq_cron import metrics, watchdog
+from django_rq_cron.models import CronJob
+from django_rq_cron.registry import HOURLY_CRON_TAB, REGISTERED_CRON_JOBS
+from django_rq_cron.runner import run_crons
+
+
+def schedule_hourly(register):
+    REGISTERED_CRON_JOBS.clear()
+    register("test_watchdog", lambda: None)
+
+
+def scheduled_job_ids(connection):
+    return [
+        job_id.decode() for job_id in connection.zrange("rq:scheduled:default", 0, -1)
+    ]
+
+
+def test_ticking_chains_are_left_alone(fake_redis, register):
+    schedule_hourly(register)
+
+    run_crons(CronJob.Cadence.HOURLY)
+
+    assert HOURLY_CRON_TAB in watchdog.get_heartbeats()
+    assert watchdog.check_chains() == []
+    assert len(scheduled_job_ids(fake_redis)) == 1
+
+
+def test_stalled_chain_is_restarted_and_its_gap_recorded(
+    fake_redis, settings, register
+):
+    settings.DJANGO_RQ_CRON_METRICS = True
+    schedule_hourly(register)
+    last_tick = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(
+        hours=3
+    )
+    watchdog.beat(HOURLY_CRON_TAB, last_tick)
+
+    (repair,) = watchdog.check_chains()
+
+    assert repair.crontab == HOURLY_CRON_TAB
+    # From the first missed tick, two hours ago, until the next one.
+    assert repair.gap == timedelta(hours=3)
+    (job_id,) = scheduled_job_ids(fake_redis)
+    assert job_id.startswith("cron-hourly-")
+    rendered = metrics.render()
+    assert 'django_rq_cron_chain_restarts_total{schedule="hourly"} 1' in rendered
+    assert 'django_rq_cron_chain_gap_seconds_total{schedule="hourly"} 10800' in rendered
+    # Restarting a chain counts as a heartbeat, so it isn't restarted twice.
+    assert watchdog.check_chains() == []
+    assert scheduled_job_ids(fake_redis) == [job_id]
+
+
+def test_command_restarts_chains_that_never_ticked(fake_redis, register):
+    schedule_hourly(register)
+
+    call_command("check_cron_chains")
+
+    assert len(scheduled_job_ids(fake_redis)) == 1
+    assert watchdog.get_heartbeats()[HOURLY_CRON_TAB].queue == "default"
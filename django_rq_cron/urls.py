@@ -0,0 +1,7 @@
+from django.urls import path
+
+from django_rq_cron.views import metrics_view
+
+urlpatterns = [
+    path("metrics/", metrics_view, name="django_rq_cron_metrics"),
+]
@@ -1,8 +1,195 @@
-from datetime import datetime
+import functools
+import gc
+import hashlib
+import itertools
+import os
+import sys
+import typing
+from datetime import datetime, time, timedelta, timezone
+from time import perf_counter
 
 import crontab
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
-def get_next_scheduled_time(crontab_string: str) -> datetime:
+# Distinct expressions are few (one per schedule), so this comfortably holds them all.
+CRONTAB_CACHE_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=CRONTAB_CACHE_SIZE)
+def compile_crontab(crontab_string: str) -> crontab.CronTab:
+    """Parse a crontab string, reusing the parsed object on later calls."""
+    return crontab.CronTab(crontab_string)
+
+
+@functools.lru_cache(maxsize=CRONTAB_CACHE_SIZE)
+def times_of_day(crontab_string: str) -> typing.Tuple[time, ...]:
+    """Get every time of day a crontab string can fire at, in order."""
+    matchers = compile_crontab(crontab_string).matchers
+    # Hours, minutes and seconds never depend on the date, unlike days and weekdays.
+    hours = [hour for hour in range(24) if matchers.hour(hour, None)]
+    minutes = [minute for minute in range(60) if matchers.minute(minute, None)]
+    seconds = [second for second in range(60) if matchers.second(second, None)]
+    return tuple(
+        time(hour, minute, second)
+        for hour, minute, second in itertools.product(hours, minutes, seconds)
+    )
+
+
+def peak_rss_kb() -> int:
+    """Get this process's peak resident set size in kilobytes, or 0 if unknown."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes rather than kilobytes.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def rss_kb(pid: typing.Optional[int] = None) -> int:
+    """
+    Get the current RSS of a process (this one by default) in kilobytes.
+
+    Without `/proc`, falls back to this process's peak RSS, or 0 for any other.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return peak_rss_kb() if pid is None else 0
+    return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def gc_collections() -> int:
+    """Get how many garbage collections have run so far, across all generations."""
+    return sum(stats["collections"] for stats in gc.get_stats())
+
+
+class ResourceUsage(typing.NamedTuple):
+    """What a block of code cost; the fields match `CronJobRun`'s columns."""
+
+    wall_time: float
+    cpu_user: float
+    cpu_system: float
+    # Growth of the process's peak RSS, in kilobytes.
+    rss_delta: int
+    gc_collections: int
+
+
+class ResourceMeter:
+    """
+    Measure what the body of a `with` block costs, even if it raises.
+
+    CPU time is the process's, so it includes any other threads running alongside.
+    """
+
+    usage: typing.Optional[ResourceUsage] = None
+
+    def __enter__(self):
+        self.gc_collections = gc_collections()
+        self.peak_rss_kb = peak_rss_kb()
+        self.times = os.times()
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall_time = perf_counter() - self.start
+        times = os.times()
+        self.usage = ResourceUsage(
+            wall_time=wall_time,
+            cpu_user=times.user - self.times.user,
+            cpu_system=times.system - self.times.system,
+            rss_delta=peak_rss_kb() - self.peak_rss_kb,
+            gc_collections=gc_collections() - self.gc_collections,
+        )
+        return False
+
+    def fields(self) -> dict:
+        """Get the measured usage as `CronJobRun` fields, or nothing if unmeasured."""
+        return self.usage._asdict() if self.usage else {}
+
+
+def get_next_scheduled_time(
+    crontab_string: str, now: typing.Optional[datetime] = None
+) -> datetime:
     """Get the next time a cron job should run for a given crontab string."""
-    return crontab.CronTab(crontab_string).next(return_datetime=True, default_utc=True)
+    return compile_crontab(crontab_string).next(
+        now=now, return_datetime=True, default_utc=True
+    )
+
+
+def get_tick(crontab_string: str, now: datetime) -> typing.Tuple[datetime, float]:
+    """
+    Get the latest time a crontab string fired at (`now` included), and how long
+    until it fires again after that, in seconds.
+    """
+    entry = compile_crontab(crontab_string)
+    tick = entry.previous(
+        now=now + timedelta(seconds=1), return_datetime=True, default_utc=True
+    )
+    following = entry.next(now=tick, return_datetime=True, default_utc=True)
+    return tick, (following - tick).total_seconds()
+
+
+def spread_offset(name: str, window: float) -> int:
+    """
+    Get a whole number of seconds in `[0, window)` derived from `name`.
+
+    The same name always gets the same offset, in any process, and names are
+    spread evenly across the window.
+    """
+    if window < 1:
+        return 0
+    digest = hashlib.sha1(name.encode()).digest()
+    return int(int.from_bytes(digest[:8], "big") / 2**64 * window)
+
+
+def iter_fire_times(
+    crontab_string: str, start: datetime, end: datetime
+) -> typing.Iterator[datetime]:
+    """
+    Yield the times a crontab string fires at after `start` and up to `end`, in UTC.
+
+    Rather than asking the crontab for its next time over and over, this walks
+    forward a day at a time: each day is tested once, and the days that match
+    yield every time of day the expression allows.
+    """
+    start = start.astimezone(timezone.utc).replace(tzinfo=None)
+    end = end.astimezone(timezone.utc).replace(tzinfo=None)
+    entry = compile_crontab(crontab_string)
+    times = times_of_day(crontab_string)
+    if not times:
+        return
+
+    day = start.date()
+    while day <= end.date():
+        if entry.test(datetime.combine(day, times[0])):
+            for time_of_day in times:
+                moment = datetime.combine(day, time_of_day)
+                if moment > end:
+                    return
+                if moment > start:
+                    yield moment.replace(tzinfo=timezone.utc)
+        day += timedelta(days=1)
+
+
+def fire_times(
+    crontab_strings: typing.Iterable[str],
+    start: datetime,
+    end: datetime,
+    limit: typing.Optional[int] = None,
+) -> typing.Dict[str, typing.List[datetime]]:
+    """
+    Get the times each crontab string fires at after `start` and up to `end`.
+
+    Returns a mapping of crontab string to its fire times in UTC, at most `limit`
+    of them each. Like `CronTab.next`, a fire time equal to `start` isn't included.
+    """
+    return {
+        crontab_string: list(
+            itertools.islice(iter_fire_times(crontab_string, start, end), limit)
+        )
+        for crontab_string in crontab_strings
+    }
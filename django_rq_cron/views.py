@@ -0,0 +1,8 @@
+from django.http import HttpResponse
+
+from django_rq_cron import metrics
+
+
+def metrics_view(request):
+    """Serve the cron job metrics in the OpenMetrics text format, straight from Redis."""
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
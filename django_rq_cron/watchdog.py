@@ -0,0 +1,143 @@
+"""
+Heartbeats for scheduler chains, and a watchdog that restarts the ones that stall.
+
+Each distinct schedule is a chain: every tick's `run_crons` schedules the next
+tick. A tick that never gets that far (an enqueue raised partway through, or its
+job was evicted from Redis) stops the chain for good. So each tick records when
+it fired in a Redis hash, and `check_chains` compares those heartbeats with what
+each crontab expects. A chain that has missed a tick by more than
+`DJANGO_RQ_CRON_WATCHDOG_GRACE` seconds is rescheduled with `enqueue_next_run`,
+which is harmless if the next tick turns out to be scheduled after all, and the
+length of the gap is counted alongside the other metrics (see `django_rq_cron.metrics`).
+
+When `DJANGO_RQ_CRON_HORIZON` schedules several ticks ahead, a second hash keeps
+the last tick scheduled for each chain, and `beat` reads it back in the same
+round trip as the heartbeat.
+
+The `watchdog` cron checks every ten minutes. Since that cron rides on a chain
+too, `check_cron_chains` runs the same check from outside, e.g. from the system
+crontab or a liveness probe.
+"""
+
+import json
+import logging
+import typing
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from django_rq_cron import metrics
+from django_rq_cron.queues import get_connection
+from django_rq_cron.registry import chain_label, get_schedule
+from django_rq_cron.utils import compile_crontab, get_tick
+
+logger = logging.getLogger("django_rq_cron")
+
+HEARTBEATS_KEY = "django_rq_cron:heartbeats"
+HORIZONS_KEY = "django_rq_cron:horizons"
+
+
+class Heartbeat(typing.NamedTuple):
+    """The last time a chain was known to be alive, and the queue it runs on."""
+
+    time: datetime
+    queue: str
+
+
+class Repair(typing.NamedTuple):
+    """A stalled chain the watchdog rescheduled."""
+
+    crontab: str
+    # From the first missed tick to the tick the chain resumes at, or None if the
+    # chain had never recorded a heartbeat.
+    gap: typing.Optional[timedelta]
+
+
+def get_heartbeat_connection():
+    """Get the Redis connection that holds the heartbeats."""
+    return get_connection(getattr(settings, "DJANGO_RQ_CRON_WATCHDOG_QUEUE", "default"))
+
+
+def beat(
+    crontab_string: str, time: datetime, queue_name: str = "default"
+) -> typing.Optional[datetime]:
+    """
+    Record that the chain of a crontab string was alive at `time`.
+
+    Returns the last tick scheduled for the chain, if known.
+    """
+    try:
+        with get_heartbeat_connection().pipeline(transaction=False) as pipeline:
+            pipeline.hset(
+                HEARTBEATS_KEY,
+                crontab_string,
+                json.dumps({"time": time.isoformat(), "queue": queue_name}),
+            )
+            pipeline.hget(HORIZONS_KEY, crontab_string)
+            _, horizon = pipeline.execute()
+    except RedisError as e:
+        # A missing heartbeat only costs a needless repair; a broken tick costs the chain.
+        logger.warning(f"Could not record cron heartbeat: {crontab_string} - {e}")
+        return None
+    return datetime.fromisoformat(horizon.decode()) if horizon else None
+
+
+def set_horizon(crontab_string: str, time: datetime):
+    """Record the last tick scheduled for the chain of a crontab string."""
+    get_heartbeat_connection().hset(HORIZONS_KEY, crontab_string, time.isoformat())
+
+
+def get_heartbeats() -> typing.Dict[str, Heartbeat]:
+    """Get the latest heartbeat of every chain, by crontab string."""
+    heartbeats = {}
+    for key, raw in get_heartbeat_connection().hgetall(HEARTBEATS_KEY).items():
+        heartbeat = json.loads(raw)
+        heartbeats[key.decode()] = Heartbeat(
+            time=datetime.fromisoformat(heartbeat["time"]), queue=heartbeat["queue"]
+        )
+    return heartbeats
+
+
+def check_chains(default_queue: str = "default") -> typing.List[Repair]:
+    """
+    Reschedule every chain that has missed a tick, returning what was repaired.
+
+    Chains without a heartbeat are rescheduled on `default_queue`.
+    """
+    # The runner imports this module to record heartbeats.
+    from django_rq_cron.runner import cancel_legacy_runs, enqueue_next_run
+
+    now = timezone.now()
+    grace = timedelta(seconds=getattr(settings, "DJANGO_RQ_CRON_WATCHDOG_GRACE", 300))
+    heartbeats = get_heartbeats()
+    if not get_schedule().jobs.keys() <= heartbeats.keys():
+        # Chains that never beat may still be ticking under an earlier version's ids.
+        cancel_legacy_runs()
+    repairs = []
+    for crontab_string in get_schedule().jobs:
+        heartbeat = heartbeats.get(crontab_string)
+        expected, _ = get_tick(crontab_string, now - grace)
+        if heartbeat is not None and heartbeat.time >= expected:
+            continue
+
+        queue_name = heartbeat.queue if heartbeat else default_queue
+        enqueue_next_run(crontab_string, queue_name)
+        gap = None
+        if heartbeat is not None:
+            entry = compile_crontab(crontab_string)
+            missed, resumed = (
+                entry.next(now=moment, return_datetime=True, default_utc=True)
+                for moment in (heartbeat.time, now)
+            )
+            gap = resumed - missed
+            metrics.record_chain_gap(chain_label(crontab_string), gap.total_seconds())
+        logger.error(
+            f"Restarted stalled cron chain: crontab={crontab_string}, "
+            f"last_heartbeat={heartbeat.time if heartbeat else None}, gap={gap}"
+        )
+        # The chain is alive again; don't repair it twice for the same gap.
+        beat(crontab_string, now, queue_name)
+        repairs.append(Repair(crontab=crontab_string, gap=gap))
+    return repairs
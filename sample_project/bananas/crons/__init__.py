@@ -1 +1 @@
-
+from . import banana_aging  # noqa: F401